@@ -0,0 +1,56 @@
+"""
+Record fixtures
+=====
+Saves the raw upstream responses of every tracker as fixtures for
+`tracker_benchmark.py`.
+
+Run from the repository root, with network access:
+    python benchmark/record_fixtures.py [--fixture-dir DIR]
+    python benchmark/tracker_benchmark.py --fixture-dir benchmark/recorded_fixtures
+
+Live responses are written next to the committed synthetic set, not over it,
+and are kept out of the repository.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from infosquare_package.info_tracker import (DistrictTracker, FieldOfficeTracker, HQGroupTracker,  # noqa: E402
+                                             InvasionTracker, ServerTracker)
+from infosquare_package.util.data_source import DataSourceRegistry  # noqa: E402
+from infosquare_package.util.fixture_session import RecordingWebSession  # noqa: E402
+
+
+DEFAULT_FIXTURE_DIR = os.path.join("benchmark", "recorded_fixtures")
+
+
+async def record(fixture_dir: str) -> None:
+    web_session = RecordingWebSession(fixture_dir)
+    try:
+        for tracker_class in [DistrictTracker, InvasionTracker, ServerTracker, FieldOfficeTracker, HQGroupTracker]:
+            tracker = tracker_class(info_channel=None, bot_user=None)
+            tracker.web_session = web_session
+            tracker.data_sources = DataSourceRegistry(default_ttl=0.0)
+            await tracker.load_information()
+            print(f"{tracker_class.__name__}: recorded")
+    finally:
+        await web_session.close()
+
+    for name in sorted(os.listdir(fixture_dir)):
+        print(f"{name:<50} {os.path.getsize(os.path.join(fixture_dir, name)):>10} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR, help="directory to write the fixtures to")
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(record(args.fixture_dir))
+
+
+if __name__ == "__main__":
+    main()
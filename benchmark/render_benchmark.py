@@ -0,0 +1,320 @@
+"""
+Render benchmark
+=====
+Measures the render cost of every tracker on synthetic data.
+
+Run from the repository root:
+    python benchmark/render_benchmark.py [--number N]
+
+The helper section compares the formatting helpers with the implementations
+they replaced, so the gain of the precomputed tables stays visible.
+The tracker section renders each board with the per-tracker code that was in
+place before the shared formatting module (before) and with the current code
+(after), on the same data.
+"""
+
+import argparse
+import os
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Type
+
+sys.path.insert(0, os.getcwd())
+
+import discord  # noqa: E402
+from discord.embeds import Embed  # noqa: E402
+
+from infosquare_package.info_tracker import (MAX_EMBED_FIELDS, MAX_EMBED_LENGTH, DistrictTracker,  # noqa: E402
+                                             FieldOfficeTracker, HQGroupTracker, InvasionTracker, ServerTracker,
+                                             Tracker)
+from infosquare_package.util import formatting  # noqa: E402
+from infosquare_package.util.page_parser import StatusComponentExtractor  # noqa: E402
+
+
+DISTRICTS = [
+    "Acrobat Acres", "Blam Canyon", "Boingbury", "Bounceboro", "Fizzlefield", "Gulp Gulch",
+    "Hiccup Hills", "Kaboom Cliffs", "Splashport", "Splat Summit", "Thwackville", "Whoosh Rapids",
+    "Zapwood", "Zoink Falls",
+]
+COGS = ["Cold Caller", "Telemarketer", "Name Dropper", "Glad Hander", "Mover & Shaker", "Two-Face",
+        "The Mingler", "Mr. Hollywood", "Bottom Feeder", "Bloodsucker", "Double Talker", "Ambulance Chaser"]
+
+
+def legacy_convert_number_to_fullwidth(number) -> str:
+    return str(number).translate(
+                str.maketrans({chr(0x0021 + i): chr(0xFF01 + i) for i in range(94)})
+           ).replace(" ", "　")
+
+
+def legacy_convert_number_to_emoji(number) -> str:
+    num2emoji = {
+        "1": ":one:", "2": ":two:", "3": ":three:",
+        "4": ":four:", "5": ":five:", "6": ":six:",
+        "7": ":seven:", "8": ":eight:", "9": ":nine:",
+        "0": ":zero:"
+    }
+    emoji_string = ""
+    for num in str(number):
+        emoji_string += num2emoji[num]
+
+    return emoji_string
+
+
+def legacy_format_jst(format_string: str) -> str:
+    return datetime.now(timezone(timedelta(hours=+9), "JST")).strftime(format_string)
+
+
+class LegacyRenderMixin:
+    # Page splitting as it was, with the timezone and the field lengths computed on every call.
+
+    def make_embeds(self, info_string_list: List[Dict[str, str]], stale_minutes: int=0) -> List[Embed]:
+        title = "**TTR Realtime Information Board**"
+        description = f":warning: 約{stale_minutes}分前の情報を表示しています。" if stale_minutes > 0 else None
+        footer = f"最終更新　{datetime.now(timezone(timedelta(hours=+9), 'JST')).strftime('%H:%M')}"
+        base_length = len(title) + len(description or "") + len(footer) + 16
+
+        pages = [[]]
+        page_length = base_length
+        for info_string in info_string_list:
+            field_length = len(info_string["name"]) + len(info_string["value"])
+            if pages[-1] and (len(pages[-1]) >= MAX_EMBED_FIELDS or page_length + field_length > MAX_EMBED_LENGTH):
+                pages.append([])
+                page_length = base_length
+            pages[-1].append(info_string)
+            page_length += field_length
+
+        info_embeds = []
+        for page, page_info_strings in enumerate(pages):
+            page_title = title if len(pages) == 1 else f"{title} ({page + 1}/{len(pages)})"
+            info_embed = discord.Embed(title=page_title, color=self.embed_color)
+            if description is not None and page == 0:
+                info_embed.description = description
+            for info_string in page_info_strings:
+                info_embed.add_field(name=info_string["name"], value=info_string["value"], inline=False)
+            info_embed.set_footer(text=footer)
+            info_embeds.append(info_embed)
+
+        return info_embeds
+
+
+    def convert_number_to_emoji(self, number) -> str:
+        return legacy_convert_number_to_emoji(number)
+
+
+    def convert_number_to_fullwidth(self, number) -> str:
+        return legacy_convert_number_to_fullwidth(number)
+
+
+class LegacyDistrictTracker(LegacyRenderMixin, DistrictTracker):
+
+    def make_info_strings(self) -> List[Dict[str, str]]:
+        all_population_emoji = self.convert_number_to_emoji(self.total_population)
+        info_string = f"現在の総プレイ人口：{all_population_emoji}人\n\n" + \
+                       "　　人口　　　　ロビー\n" + \
+                      f"{self.make_district_string()}" + \
+                       "\n:speech_balloon:：スピードチャットのみ使用可能\n" + \
+                       ":shield:：特定のイベントが開催されない\n" + \
+                       ":sparkles:：召喚によるコグの侵略が発生しない\n" + \
+                       ":gear:：コグの侵略が進行中\n\n"
+
+        return [{"name": self.embed_field_tytle, "value": info_string}]
+
+
+    def make_district_string(self) -> str:
+        status_string = ""
+        for pd in self.population_by_district:
+            if pd[1] <= 300:
+                status_string += ":blue_circle: "
+            elif pd[1] > 500:
+                status_string += ":red_circle: "
+            else:
+                status_string += ":green_circle: "
+
+            status_string += self.convert_number_to_fullwidth(str(pd[1]).rjust(3))
+            status_string += f"　　**{pd[0]}** "
+
+            if pd[0] in ["Boingbury", "Gulp Gulch", "Whoosh Rapids"]:
+                status_string += ":speech_balloon:"
+            if pd[0] in ["Blam Canyon", "Fizzlefield", "Gulp Gulch", "Splat Summit", "Zapwood"]:
+                status_string += ":shield:"
+            if pd[0] in ["Gulp Gulch", "Splat Summit"]:
+                status_string += ":sparkles:"
+            if pd[0] in self.invasion_districts:
+                status_string += ":gear:"
+
+            status_string += "\n"
+
+        return status_string
+
+
+class LegacyServerTracker(LegacyRenderMixin, ServerTracker):
+
+    def make_info_strings(self) -> List[Dict[str, str]]:
+        self.is_stable = 1
+        info_string = ""
+        for section, components in self.STATUS_COMPONENTS:
+            info_string += f"\n**{section}**\n"
+            for keyword_group, label in components:
+                status = StatusComponentExtractor.find_status(self.component_statuses, keyword_group)
+                info_string += f"{self.get_status_emoji(status)} {label}\n"
+
+        self.set_embed_color()
+
+        return [{"name": self.embed_field_tytle, "value": info_string}]
+
+
+class LegacyInvasionTracker(LegacyRenderMixin, InvasionTracker):
+
+    def get_invasion_string(self, invasion: dict) -> str:
+        if invasion["is_mega"]:
+            time_string = "MEGA INVASION!"
+            defeat_string = "---"
+        else:
+            time_string = self.convert_epochtime_to_timestr(invasion["end_time"])
+            defeat_string = f"{invasion['defeated']} / {invasion['total']}"
+
+        info_string = f"ロビー ： **{invasion['district']}**\n" + \
+                      f"残り時間 ： **{time_string}**\n" + \
+                      f"倒されたコグの数 ： **{defeat_string}**\n\n"
+
+        return info_string
+
+
+class LegacyFieldOfficeTracker(LegacyRenderMixin, FieldOfficeTracker):
+
+    def make_info_strings(self) -> List[Dict[str, str]]:
+        info_string = "**Stars** 　　 **Annexes**　  　     **Street**\n"
+
+        for office in self.fieldoffice_list:
+            is_open = ":green_circle:" if office["open"] else ":x:"
+            stars = ":black_large_square:" * (3 - office["difficulty"]) + \
+                    ":star:" * office["difficulty"]
+            annexes = self.convert_number_to_fullwidth(str(office["annexes"]).rjust(3))
+            street = office["street"]
+            info_string += f"{stars}　 {annexes}　 {is_open}  {street}\n"
+
+        info_string += "\n:green_circle:：Open\n" + \
+                       ":x:：Closed\n\n"
+
+        return [{"name": self.embed_field_tytle, "value": info_string}]
+
+
+class LegacyHQGroupTracker(LegacyRenderMixin, HQGroupTracker):
+
+    def make_info_strings(self) -> List[Dict[str, str]]:
+        info_string_list = [{
+            "name": self.embed_field_tytle,
+            "value": "現在設立中の一部のコグ本部系グループおよびField Officeのグループを表示しています。\n" + \
+                     "グループに参加するには**[Toon HQ](https://toonhq.org/groups/)**にアクセスしてください。\n"
+        }]
+        for group in self.group_list:
+            if group["now_players"] == group["max_players"]:
+                status = ":red_circle:"
+            else:
+                status = ":green_circle:"
+            group_name = f"**{status} {group['name']}**"
+
+            info_string = f"ロビー ： **{group['district']}**\n" + \
+                          f"場所 ： **{group['location']}**\n" + \
+                          f"人数 ： **{group['now_players']} / {group['max_players']}**\n\n"
+
+            info_string_list.append({
+                "name": group_name,
+                "value": info_string
+            })
+
+        return info_string_list
+
+
+CURRENT_TRACKERS: Dict[str, Type[Tracker]] = {
+    "district": DistrictTracker, "invasion": InvasionTracker, "server": ServerTracker,
+    "fieldoffice": FieldOfficeTracker, "hqgroup": HQGroupTracker,
+}
+LEGACY_TRACKERS: Dict[str, Type[Tracker]] = {
+    "district": LegacyDistrictTracker, "invasion": LegacyInvasionTracker, "server": LegacyServerTracker,
+    "fieldoffice": LegacyFieldOfficeTracker, "hqgroup": LegacyHQGroupTracker,
+}
+
+
+def make_trackers(tracker_classes: Dict[str, Type[Tracker]]) -> Dict[str, Tracker]:
+    district_tracker = tracker_classes["district"](info_channel=None, bot_user=None)
+    district_tracker.total_population = 2345
+    district_tracker.population_by_district = [(district, 50 + 47 * i) for i, district in enumerate(DISTRICTS)]
+    district_tracker.invasion_districts = set(DISTRICTS[::3])
+
+    invasion_tracker = tracker_classes["invasion"](info_channel=None, bot_user=None)
+    now_epochtime = int(time.time())
+    invasion_tracker.invasions = [{
+        "district": district, "cog": COGS[i % len(COGS)], "status": ":green_circle:",
+        "is_mega": i == 0, "end_time": None if i == 0 else now_epochtime + 600 + 60 * i,
+        "defeated": 100 + i, "total": 1000000 if i == 0 else 3000,
+    } for i, district in enumerate(DISTRICTS)]
+
+    server_tracker = tracker_classes["server"](info_channel=None, bot_user=None)
+    server_tracker.component_statuses = {
+        "Game Servers": "Operational", "SpeedChat+": "Operational", "Game Services": "Performance Issues",
+        "Download Server": "Operational", "Website & Login": "Operational", "Support System": "Operational",
+    }
+
+    fieldoffice_tracker = tracker_classes["fieldoffice"](info_channel=None, bot_user=None)
+    fieldoffice_tracker.fieldoffice_list = [{
+        "difficulty": 1 + i % 3, "annexes": 10 * i, "street": street, "open": i % 2 == 0,
+    } for i, street in enumerate(fieldoffice_tracker.zoneid_dict.values())]
+
+    hqgroup_tracker = tracker_classes["hqgroup"](info_channel=None, bot_user=None)
+    hqgroup_tracker.group_list = [{
+        "district": district, "location": "Sellbot HQ", "name": "Factory Short",
+        "max_players": 4, "now_players": 1 + i % 4,
+    } for i, district in enumerate(DISTRICTS)]
+
+    return {
+        "district": district_tracker,
+        "invasion": invasion_tracker,
+        "server": server_tracker,
+        "fieldoffice": fieldoffice_tracker,
+        "hqgroup": hqgroup_tracker,
+    }
+
+
+def measure(function: Callable[[], object], number: int) -> float:
+    # Best of 5 runs, in microseconds per call.
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="calls per run")
+    args = parser.parse_args()
+
+    print("helper                          before [us]  after [us]")
+    for name, before, after in [
+        ("convert_number_to_fullwidth", lambda: legacy_convert_number_to_fullwidth(" 42"),
+                                        lambda: formatting.convert_number_to_fullwidth(" 42")),
+        ("convert_number_to_emoji", lambda: legacy_convert_number_to_emoji(2345),
+                                    lambda: formatting.convert_number_to_emoji(2345)),
+        ("format_jst", lambda: legacy_format_jst("%H:%M"),
+                       lambda: formatting.format_jst("%H:%M")),
+    ]:
+        print(f"{name:<30} {measure(before, args.number):>12.2f} {measure(after, args.number):>11.2f}")
+
+    print()
+    print("tracker        render before [us]  render after [us]  pages  max chars  payload [bytes]")
+    legacy_trackers = make_trackers(LEGACY_TRACKERS)
+    for name, tracker in make_trackers(CURRENT_TRACKERS).items():
+        legacy_tracker = legacy_trackers[name]
+        info_string_list = tracker.make_info_strings()
+        info_embeds = tracker.make_embeds(info_string_list)
+        # Both paths must render the same board, or the comparison means nothing.
+        assert legacy_tracker.make_info_strings() == info_string_list, name
+        before_cost = measure(lambda: legacy_tracker.make_embeds(legacy_tracker.make_info_strings()), args.number)
+        after_cost = measure(lambda: tracker.make_embeds(tracker.make_info_strings()), args.number)
+        max_chars = max(formatting.get_embed_length(info_embed) for info_embed in info_embeds)
+        payload_size = formatting.get_payload_size(info_string_list)
+        print(f"{name:<14} {before_cost:>18.2f} {after_cost:>18.2f} {len(info_embeds):>6} "
+              f"{max_chars:>10} {payload_size:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Tracker benchmark
+=====
+Runs load_information -> make_info_strings -> make_embeds of every tracker
+against fixtures, without any network access, and reports the throughput
+and the allocations of one run.
+
+Run from the repository root:
+    python benchmark/tracker_benchmark.py [--number N] [--processes] [--fixture-dir DIR]
+
+benchmark/fixtures holds a small synthetic set in the format of every upstream,
+used by default so the numbers can be compared between revisions. To measure
+live data, record it with benchmark/record_fixtures.py and pass its directory.
+
+By default the pages are parsed in a worker thread, so the parse cost is
+part of the numbers. `--processes` parses in worker processes as the bot does.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from typing import Tuple
+
+sys.path.insert(0, os.getcwd())
+
+from infosquare_package.info_tracker import (DistrictTracker, FieldOfficeTracker, HQGroupTracker,  # noqa: E402
+                                             InvasionTracker, ParseOffloader, ServerTracker, Tracker)
+from infosquare_package.util.data_source import DataSourceRegistry  # noqa: E402
+from infosquare_package.util.fixture_session import ReplayWebSession  # noqa: E402
+
+
+DEFAULT_FIXTURE_DIR = os.path.join("benchmark", "fixtures")
+
+
+async def run_once(tracker: Tracker) -> int:
+    await tracker.load_information()
+    info_embeds = tracker.make_embeds(tracker.make_info_strings())
+    return len(info_embeds)
+
+
+async def measure(tracker: Tracker, number: int) -> Tuple[float, int, int, int]:
+    # Warm up once, so the fixture reads and the pool start are not counted.
+    pages = await run_once(tracker)
+
+    started_at = time.perf_counter()
+    for _ in range(number):
+        await run_once(tracker)
+    runs_per_second = number / (time.perf_counter() - started_at)
+
+    # Only the blocks allocated during the traced run are counted, so the result is the memory a run leaves behind.
+    tracemalloc.start()
+    try:
+        await run_once(tracker)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+
+    return runs_per_second, blocks, peak, pages
+
+
+async def benchmark(fixture_dir: str, number: int, use_processes: bool) -> None:
+    parse_offloader = ParseOffloader(use_processes=use_processes)
+    print("tracker             runs/s  kept blocks  peak [KiB]  pages  requests")
+    try:
+        for tracker_class in [DistrictTracker, InvasionTracker, ServerTracker, FieldOfficeTracker, HQGroupTracker]:
+            tracker = tracker_class(info_channel=None, bot_user=None)
+            tracker.web_session = ReplayWebSession(fixture_dir)
+            tracker.data_sources = DataSourceRegistry(default_ttl=0.0)
+            tracker.parse_offloader = parse_offloader
+
+            try:
+                runs_per_second, blocks, peak, pages = await measure(tracker, number)
+            except Exception as e:
+                # A fixture that no longer parses is a finding too, so the other trackers still run.
+                print(f"{tracker_class.__name__:<18} failed ({type(e).__name__}: {e})")
+                continue
+            print(f"{tracker_class.__name__:<18} {runs_per_second:>7.0f} {blocks:>12} {peak / 1024:>11.1f} "
+                  f"{pages:>6} {tracker.web_session.requests:>9}")
+    finally:
+        parse_offloader.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200, help="runs per tracker")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR, help="directory of the recorded fixtures")
+    parser.add_argument("--processes", action="store_true", help="parse in worker processes")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixture_dir):
+        print(f"ERROR: No fixtures in '{args.fixture_dir}'.")
+        sys.exit(1)
+
+    asyncio.get_event_loop().run_until_complete(benchmark(args.fixture_dir, args.number, args.processes))
+
+
+if __name__ == "__main__":
+    main()
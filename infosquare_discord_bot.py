@@ -1,9 +1,8 @@
+import asyncio
 import os
-from datetime import datetime, timedelta, timezone
 
 import discord
 from discord.channel import DMChannel, TextChannel
-from discord.ext import tasks
 
 from infosquare_package.autodelete import AutoDeleteListner
 from infosquare_package.connect4 import Connect4Listner
@@ -12,7 +11,13 @@ from infosquare_package.info_tracker import (DistrictTracker,
                                              HQGroupTracker, InvasionTracker,
                                              ServerTracker)
 from infosquare_package.minesweeper import MinesweeperListner
+from infosquare_package.population_stats import PopulationStatsListner
 from infosquare_package.seaturtle_soup import SeaTurtleSoupListner
+from infosquare_package.subscription import SubscriptionListner
+from infosquare_package.util.formatting import format_jst
+from infosquare_package.util.metrics import MetricsServer, shared_metrics
+from infosquare_package.util.outbound_queue import shared_outbound_queue
+from infosquare_package.util.polling_scheduler import PollingPolicy, PollingScheduler
 from infosquare_package.wordwolf import WordWolfListner
 
 
@@ -23,55 +28,81 @@ SERVER_CHANNEL_ID = int(os.environ["SERVER_CHANNEL_ID"])
 FIELDOFFICE_CHANNEL_ID = int(os.environ["FIELDOFFICE_CHANNEL_ID"])
 HQGROUP_CHANNEL_ID = int(os.environ["HQGROUP_CHANNEL_ID"])
 DEBUG_ID = int(os.environ["DEBUG_ID"])
-RENEW_INFO_INTERVAL = 10
+BOARD_HEARTBEAT_INTERVAL = int(os.environ.get("BOARD_HEARTBEAT_INTERVAL", 300))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))
+
+LISTENER_SECONDS = shared_metrics.histogram(
+    "infosquare_listener_seconds", "Time listeners spend handling a Discord event.", ["listener", "handler"])
 
 intents = discord.Intents.all()
 client = discord.Client(intents=intents)
+tracker_scheduler = PollingScheduler()
+metrics_server = MetricsServer()
 
 
 @client.event
 async def on_ready():
-    global autodelete_listner, connect4_listner, minesweeper_listner, seaturtle_listner, wordwolf_listner
+    global autodelete_listner, connect4_listner, minesweeper_listner, population_listner, seaturtle_listner, wordwolf_listner
 
     autodelete_listner = AutoDeleteListner()
     connect4_listner = Connect4Listner(bot_user=client.user)
     minesweeper_listner = MinesweeperListner()
+    population_listner = PopulationStatsListner()
     seaturtle_listner = SeaTurtleSoupListner(bot_user=client.user)
     wordwolf_listner = WordWolfListner()
 
     global district_tracker, fieldoffice_tracker, hqgroup_tracker, invasion_tracker, server_tracker
 
     district_tracker = DistrictTracker(info_channel=client.get_channel(DISTRICT_CHANNEL_ID),
-                                       bot_user=client.user)
+                                       bot_user=client.user,
+                                       heartbeat_interval=BOARD_HEARTBEAT_INTERVAL)
     fieldoffice_tracker = FieldOfficeTracker(info_channel=client.get_channel(FIELDOFFICE_CHANNEL_ID),
-                                             bot_user=client.user)
+                                             bot_user=client.user,
+                                             heartbeat_interval=BOARD_HEARTBEAT_INTERVAL)
     hqgroup_tracker = HQGroupTracker(info_channel=client.get_channel(HQGROUP_CHANNEL_ID),
-                                     bot_user=client.user)
+                                     bot_user=client.user,
+                                     heartbeat_interval=BOARD_HEARTBEAT_INTERVAL)
     invasion_tracker = InvasionTracker(info_channel=client.get_channel(INVASION_CHANNEL_ID),
-                                       bot_user=client.user)
+                                       bot_user=client.user,
+                                       heartbeat_interval=BOARD_HEARTBEAT_INTERVAL)
     server_tracker = ServerTracker(info_channel=client.get_channel(SERVER_CHANNEL_ID), 
-                                   bot_user=client.user)
-                                             
-    renew_infomation.start()
-    countdown.start()
+                                   bot_user=client.user,
+                                   heartbeat_interval=BOARD_HEARTBEAT_INTERVAL)
+
+    global subscription_listner
+
+    subscription_listner = SubscriptionListner(trackers={
+        "district": district_tracker,
+        "fieldoffice": fieldoffice_tracker,
+        "hqgroup": hqgroup_tracker,
+        "invasion": invasion_tracker,
+        "server": server_tracker,
+    })
+    subscription_listner.manager.restore_subscriptions(client.get_channel)
+
+    # Render the boards from the last snapshots while the upstreams are polled for the first time.
+    await asyncio.gather(*[tracker.warm_start() for tracker in [district_tracker, fieldoffice_tracker, hqgroup_tracker,
+                                                                invasion_tracker, server_tracker]])
+
+    # Data that rarely changes is polled less often, invasions more often.
+    tracker_scheduler.add_job("district", district_tracker.poll,
+                              PollingPolicy(idle_interval=30, active_interval=10))
+    tracker_scheduler.add_job("invasion", invasion_tracker.poll,
+                              PollingPolicy(idle_interval=15, active_interval=5))
+    tracker_scheduler.add_job("server", server_tracker.poll,
+                              PollingPolicy(idle_interval=60, active_interval=15))
+    tracker_scheduler.add_job("fieldoffice", fieldoffice_tracker.poll,
+                              PollingPolicy(idle_interval=60, active_interval=20))
+    tracker_scheduler.add_job("hqgroup", hqgroup_tracker.poll,
+                              PollingPolicy(idle_interval=30, active_interval=10))
+    tracker_scheduler.start()
+
+    # Prometheus endpoint, reachable from the host only.
+    await metrics_server.start(host="127.0.0.1", port=METRICS_PORT)
 
     print("Login suceeded.")
 
 
-@tasks.loop(seconds=RENEW_INFO_INTERVAL)
-async def renew_infomation():
-    await district_tracker.notice()
-    await server_tracker.notice()
-    await fieldoffice_tracker.notice()
-    await hqgroup_tracker.notice()
-    invasion_tracker.load_information()
-
-
-@tasks.loop(seconds=1)
-async def countdown():
-    await invasion_tracker.countdown(interval=1)
-
-
 @client.event
 async def on_message(message):
 
@@ -80,23 +111,36 @@ async def on_message(message):
         return
     
     # Auto message delete app
-    await autodelete_listner.listen_command(message)
+    with LISTENER_SECONDS.time(listener="autodelete", handler="command"):
+        await autodelete_listner.listen_command(message)
 
     # Find four (Connect 4)
-    await connect4_listner.listen_command(message)
+    with LISTENER_SECONDS.time(listener="connect4", handler="command"):
+        await connect4_listner.listen_command(message)
 
     # Minesweeper
-    await minesweeper_listner.listen_command(message)
+    with LISTENER_SECONDS.time(listener="minesweeper", handler="command"):
+        await minesweeper_listner.listen_command(message)
+
+    # Population statistics
+    with LISTENER_SECONDS.time(listener="population", handler="command"):
+        await population_listner.listen_command(message)
 
     # Sea turtle soup supporter
-    await seaturtle_listner.listen_command(message)
+    with LISTENER_SECONDS.time(listener="seaturtle", handler="command"):
+        await seaturtle_listner.listen_command(message)
 
     # Word wolf
-    await wordwolf_listner.listen_command(message)
+    with LISTENER_SECONDS.time(listener="wordwolf", handler="command"):
+        await wordwolf_listner.listen_command(message)
+
+    # Information board subscriptions
+    with LISTENER_SECONDS.time(listener="subscription", handler="command"):
+        await subscription_listner.listen_command(message)
 
     # Debug
     if isinstance(message.channel, DMChannel):
-        sended_time = datetime.now(timezone(timedelta(hours=+9), "JST")).strftime("%Y/%m/%d %H:%M:%S")
+        sended_time = format_jst("%Y/%m/%d %H:%M:%S")
         debugger = await client.fetch_user(user_id=DEBUG_ID)
         await debugger.send(f"{sended_time}\n**{message.author}**\n{message.content}")
 
@@ -112,18 +156,21 @@ async def on_reaction_add(reaction, user):
     flags = []
 
     # Find four (Connect 4)
-    flags.append(await connect4_listner.listen_reaction(channel, reaction, user))
+    with LISTENER_SECONDS.time(listener="connect4", handler="reaction"):
+        flags.append(await connect4_listner.listen_reaction(channel, reaction, user))
 
     # Sea turtle soup
-    flags.append(await seaturtle_listner.listen_reaction(reaction, user))
+    with LISTENER_SECONDS.time(listener="seaturtle", handler="reaction"):
+        flags.append(await seaturtle_listner.listen_reaction(reaction, user))
 
     # Word wolf
-    flags.append(await wordwolf_listner.listen_reaction(reaction, user))
+    with LISTENER_SECONDS.time(listener="wordwolf", handler="reaction"):
+        flags.append(await wordwolf_listner.listen_reaction(reaction, user))
 
     try:
         # Bot cannot remove reactions sended by user on DMChannel :(
         if isinstance(channel, TextChannel) and any(flags):
-            await reaction.remove(user)
+            await shared_outbound_queue.remove_reaction(reaction.message, reaction.emoji, user)
     except:
         # TODO: Write exception handling.
         pass
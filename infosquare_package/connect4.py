@@ -4,8 +4,12 @@ Connect 4
 author: Snow Rabbit
 """
 
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 import discord
 from discord.channel import DMChannel, TextChannel
@@ -16,84 +20,96 @@ from discord.user import ClientUser
 
 from . import embed_color
 from .util import firebase_operator
-from .util.web_stream import JsonStream
+from .util.connect4_solver import COLUMN_ORDER, CELL_NUM, INVALID_SCORE, get_next_histories, search_scores
+from .util.metrics import shared_metrics
+from .util.opening_book import OpeningBook, shared_opening_book
+from .util.outbound_queue import shared_outbound_queue
+
+
+AI_SCORE_LOOKUPS = shared_metrics.counter(
+    "infosquare_connect4_ai_lookups_total", "Score vectors of AI moves by where they came from.", ["source"])
+AI_PREFETCHES = shared_metrics.counter(
+    "infosquare_connect4_ai_prefetches_total", "Speculative searches of the AI by outcome.", ["outcome"])
+AI_SEARCH_SECONDS = shared_metrics.histogram(
+    "infosquare_connect4_ai_search_seconds",
+    "Time AI searches take in the worker pool, including the wait for a worker.", ["kind"])
+AI_SEARCH_DEPTH = shared_metrics.histogram(
+    "infosquare_connect4_ai_search_depth", "Depth of the deepest search finished within the time budget.",
+    ["kind", "exact"], buckets=tuple(range(1, CELL_NUM + 1, 4)))
 
 
 class Connect4Board:
+    """
+    Connect4Board
+    ----------
+
+    Board of a game as one bitboard per player.
+    Each column takes `row_num + 1` bits from the bottom up, the extra bit keeps
+    the shifts of the win check from wrapping into the next column.
+    The winner is decided when a piece is pushed, from the lines through that piece only.
+
+    Attributes:
+        stones (:class:`Dict[int, int]`):
+            Bitboard of the pieces of each player (1 or -1).
+        heights (:class:`List[int]`):
+            Number of pieces in each column.
+        move_num (:class:`int`):
+            Number of pieces on the board.
+        winner (:class:`int`):
+            1 or -1 once a player has connected four, 0 otherwise.
+    """
+
+    CELL_STRINGS = {0: ":white_square_button: ", 1: ":yellow_square: ", -1: ":red_square: "}
+
 
     def __init__(self, column_num: int=7, row_num: int=6) -> None:
         self.column_num = column_num
         self.row_num = row_num
-        self.board = [[0 for x in range(self.column_num)] for y in range(self.row_num)]
+        self.stones: Dict[int, int] = {1: 0, -1: 0}
+        self.heights: List[int] = [0] * column_num
+        self.move_num: int = 0
+        self.winner: int = 0
 
     
     def push(self, piece: int, column: int) -> bool:
-        is_push = False
-        if self.board[0][column] == 0:
-            for i in range(self.row_num-1, -1, -1):
-                if self.board[i][column] == 0:
-                    self.board[i][column] = piece
-                    is_push = True
-                    break
-        return is_push
+        if self.heights[column] >= self.row_num:
+            return False
 
+        move = 1 << (column * (self.row_num + 1) + self.heights[column])
+        self.stones[piece] |= move
+        self.heights[column] += 1
+        self.move_num += 1
+        if self.is_connected(self.stones[piece], move):
+            self.winner = piece
 
-    def is_filled(self) -> bool:
-        for i in range(0, self.row_num):
-            for j in range(0, self.column_num):
-                if self.board[i][j] == 0:
-                    return False
         return True
 
+
+    def is_connected(self, stones: int, move: int) -> bool:
+        # Count the pieces in a row on both sides of the new piece. The shifts step to the next cell
+        # vertically, horizontally and along both diagonals.
+        for shift in (1, self.row_num + 1, self.row_num, self.row_num + 2):
+            count = 1
+            cell = move << shift
+            while stones & cell:
+                count += 1
+                cell <<= shift
+            cell = move >> shift
+            while stones & cell:
+                count += 1
+                cell >>= shift
+            if count >= 4:
+                return True
+        return False
+
+
+    def is_filled(self) -> bool:
+        return self.move_num == self.column_num * self.row_num
+
     
     def check_winner(self) -> int:
-        for i in range(0, self.row_num):
-            for j in range(0, self.column_num):
-                # FIXME: There is a bug for checking 2-dim list index.
-                # Check vertical
-                try:
-                    x1 = self.board[i][j]
-                    x2 = self.board[i+1][j]
-                    x3 = self.board[i+2][j]
-                    x4 = self.board[i+3][j]
-                    sum_value = x1 + x2 + x3 + x4
-                    if abs(sum_value) == 4:
-                        return int(sum_value / 4)
-                except(IndexError):
-                    pass
-                # Check horizon
-                try:
-                    x1 = self.board[i][j]
-                    x2 = self.board[i][j+1]
-                    x3 = self.board[i][j+2]
-                    x4 = self.board[i][j+3]
-                    sum_value = x1 + x2 + x3 + x4
-                    if abs(sum_value) == 4:
-                        return int(sum_value / 4)
-                except(IndexError):
-                    pass
-                # Check diagonally left (\)
-                try:
-                    x1 = self.board[i][j]
-                    x2 = self.board[i+1][j+1]
-                    x3 = self.board[i+2][j+2]
-                    x4 = self.board[i+3][j+3]
-                    sum_value = x1 + x2 + x3 + x4
-                    if abs(sum_value) == 4:
-                        return int(sum_value / 4)
-                except(IndexError):
-                    pass
-                # Check diagonally right (/)
-                try:
-                    x1 = self.board[i][j]
-                    x2 = self.board[i-1][j+1] if i-1 >= 0 else 0
-                    x3 = self.board[i-2][j+2] if i-2 >= 0 else 0
-                    x4 = self.board[i-3][j+3] if i-3 >= 0 else 0
-                    sum_value = x1 + x2 + x3 + x4
-                    if abs(sum_value) == 4:
-                        return int(sum_value / 4)
-                except(IndexError):
-                    pass
+        if self.winner != 0:
+            return self.winner
         
         # Check draw
         if self.is_filled():
@@ -101,17 +117,21 @@ class Connect4Board:
 
         return 0
 
+
+    def get_piece(self, row: int, column: int) -> int:
+        # Rows are counted from the top, as they are shown.
+        cell = 1 << (column * (self.row_num + 1) + self.row_num - 1 - row)
+        if self.stones[1] & cell:
+            return 1
+        elif self.stones[-1] & cell:
+            return -1
+        return 0
+
     
     def get_discord_string(self) -> str:
         string = "\n:one: :two: :three: :four: :five: :six: :seven:\n"
-        for xs in self.board:
-            for i in range(0, self.column_num):
-                if xs[i] == 0:
-                    string += ":white_square_button: "
-                elif xs[i] == 1:
-                    string += ":yellow_square: "
-                elif xs[i] == -1:
-                    string += ":red_square: "
+        for row in range(self.row_num):
+            string += "".join(self.CELL_STRINGS[self.get_piece(row, column)] for column in range(self.column_num))
             string += "\n"
             
         return string
@@ -212,12 +232,138 @@ class Connect4Listner:
         return False
 
 
+class Connect4Statistics:
+    """
+    Connect4Statistics
+    ----------
+
+    Totals of the Find four results, kept in Firestore next to the results.
+    Each result is added to the totals in the same batch that stores it, so
+    reading the statistics costs one document however many games were played.
+
+    Firestore layout:
+        findfour_statistics/summary: all_match_num, vs_ai_num, ai_win_num, is_complete
+        findfour_player_statistics/<player id>: win, lose, draw
+
+    Attributes:
+        bot_user_id (:class:`int`):
+            User id of the bot, whose wins are the AI wins.
+        lock (:class:`threading.Lock`):
+            Guards `is_rebuilding` and `pending_docs`, and is held while a result is stored,
+            since the rebuild runs in an executor thread.
+        rebuild_lock (:class:`threading.Lock`):
+            Held for a whole rebuild, so two rebuilds never run at the same time.
+        is_rebuilding (:class:`bool`):
+            Whether a rebuild is reading the results right now.
+        pending_docs (:class:`List[dict]`):
+            Results held back while a rebuild runs, stored once it has finished.
+    """
+
+    RESULT_COLLECTION = "findfour_results"
+    SUMMARY_COLLECTION = "findfour_statistics"
+    SUMMARY_ID = "summary"
+    PLAYER_COLLECTION = "findfour_player_statistics"
+
+
+    def __init__(self, bot_user_id: int) -> None:
+        self.bot_user_id: int = bot_user_id
+        self.lock: threading.Lock = threading.Lock()
+        self.rebuild_lock: threading.Lock = threading.Lock()
+        self.is_rebuilding: bool = False
+        self.pending_docs: List[dict] = []
+
+
+    def get_increments(self, doc_dict: dict) -> Dict[Tuple[str, str], Dict[str, int]]:
+        # "winner" is the index of the winning player, or negative for a draw.
+        winner = doc_dict["winner"]
+        is_ai_win = doc_dict["vs_ai"] and winner >= 0 and doc_dict["players"][winner] == self.bot_user_id
+        counters = {
+            (self.SUMMARY_COLLECTION, self.SUMMARY_ID): {
+                "all_match_num": 1,
+                "vs_ai_num": int(doc_dict["vs_ai"]),
+                "ai_win_num": int(is_ai_win),
+            }
+        }
+        for i, player_id in enumerate(doc_dict["players"]):
+            result = "draw" if winner < 0 else "win" if winner == i else "lose"
+            counters.setdefault((self.PLAYER_COLLECTION, str(player_id)), {"win": 0, "lose": 0, "draw": 0})[result] += 1
+
+        return counters
+
+
+    def record(self, doc_dict: dict) -> None:
+        with self.lock:
+            # A result stored while the rebuild reads the results could be counted twice or not at all,
+            # so it waits until the rebuild has written the totals.
+            if self.is_rebuilding:
+                self.pending_docs.append(doc_dict)
+                return
+            firebase_operator.set_doc_and_increment(self.RESULT_COLLECTION, doc_dict, self.get_increments(doc_dict))
+
+
+    def get_summary(self) -> Optional[Tuple[int, int, int]]:
+        summary = firebase_operator.get_doc(self.SUMMARY_COLLECTION, self.SUMMARY_ID)
+        # Only a rebuild sets is_complete, so totals started by increments before any rebuild are not trusted.
+        if summary is None or not summary.get("is_complete", False):
+            return None
+        return summary.get("all_match_num", 0), summary.get("vs_ai_num", 0), summary.get("ai_win_num", 0)
+
+
+    def rebuild(self) -> Tuple[int, int, int]:
+        """
+        Recounts the totals from every result, reading the results one page at a time.
+        Results of games finished meanwhile are held back and stored on top of the new totals.
+        Player documents without any result left are deleted.
+        """
+        with self.rebuild_lock:
+            with self.lock:
+                self.is_rebuilding = True
+            try:
+                all_match_num, vs_ai_num, ai_win_num = self.write_totals()
+            finally:
+                with self.lock:
+                    self.is_rebuilding = False
+                    pending_docs, self.pending_docs = self.pending_docs, []
+                # Increments add up in any order, so new results may be stored alongside these.
+                for doc_dict in pending_docs:
+                    firebase_operator.set_doc_and_increment(self.RESULT_COLLECTION, doc_dict,
+                                                            self.get_increments(doc_dict))
+
+        for doc_dict in pending_docs:
+            increments = self.get_increments(doc_dict)[(self.SUMMARY_COLLECTION, self.SUMMARY_ID)]
+            all_match_num += increments["all_match_num"]
+            vs_ai_num += increments["vs_ai_num"]
+            ai_win_num += increments["ai_win_num"]
+        return all_match_num, vs_ai_num, ai_win_num
+
+
+    def write_totals(self) -> Tuple[int, int, int]:
+        totals: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for doc_dict in firebase_operator.iterate_doc_list(self.RESULT_COLLECTION):
+            for key, increments in self.get_increments(doc_dict).items():
+                total = totals.setdefault(key, {})
+                for field, amount in increments.items():
+                    total[field] = total.get(field, 0) + amount
+
+        summary = totals.pop((self.SUMMARY_COLLECTION, self.SUMMARY_ID),
+                             {"all_match_num": 0, "vs_ai_num": 0, "ai_win_num": 0})
+        player_totals = {player_id: total for (_, player_id), total in totals.items()}
+        stale_player_ids = set(firebase_operator.get_doc_ids(self.PLAYER_COLLECTION)) - set(player_totals)
+        firebase_operator.delete_doc_ids(self.PLAYER_COLLECTION, stale_player_ids)
+        firebase_operator.set_doc_dict(self.PLAYER_COLLECTION, player_totals)
+        firebase_operator.set_doc(self.SUMMARY_COLLECTION, dict(summary, is_complete=True), doc_id=self.SUMMARY_ID)
+
+        return summary["all_match_num"], summary["vs_ai_num"], summary["ai_win_num"]
+
+
 class Connect4GameMaster:
     
     def __init__(self, bot_user: ClientUser) -> None:
         self.games = {}
         self.bot_user = bot_user
         self.ai = UnbeatableAI()
+        self.statistics = Connect4Statistics(bot_user_id=bot_user.id)
+        self.outbound_queue = shared_outbound_queue
 
 
     def get_player_name(self, user: ClientUser) -> str:
@@ -284,30 +430,26 @@ class Connect4GameMaster:
             "winner": int((1 - winner) / 2)
         }
 
-        firebase_operator.set_doc(
-            collection_name="findfour_results",
-            doc_dict=doc_dict
-        )
+        self.statistics.record(doc_dict)
 
     
     def get_results(self) -> Tuple[int, int, int]:
-        doc_list = firebase_operator.get_doc_list("findfour_results")
-        all_match_num = len(doc_list)
-        vs_ai_num = len([doc for doc in doc_list if doc["vs_ai"]])
-        ai_win_num = len([doc for doc in doc_list if doc["vs_ai"] and doc["winner"] >= 0 and
-                          doc["players"][doc["winner"]] == self.bot_user.id])
-        return all_match_num, vs_ai_num, ai_win_num
+        results = self.statistics.get_summary()
+        if results is None:
+            # First use, or totals written by increments alone: count every result once.
+            results = self.statistics.rebuild()
+        return results
 
 
     async def reset(self, channel: TextChannel) -> None:
         if self.games[channel.id]["menu_message"] is not None:
-            await self.games[channel.id]["menu_message"].delete()
+            await self.outbound_queue.delete(self.games[channel.id]["menu_message"])
         if self.games[channel.id]["board_message"] is not None:
-            await self.games[channel.id]["board_message"].delete()
+            await self.outbound_queue.delete(self.games[channel.id]["board_message"])
         del self.games[channel.id]
         
         info_string = "Find fourのグループが解散されました。\n新しくゲームを始めるには`/findfour`を入力してください。"
-        await channel.send(info_string)
+        await self.outbound_queue.send(channel, info_string)
 
 
     async def establish(self, message: Message) -> None:
@@ -315,8 +457,8 @@ class Connect4GameMaster:
         if channel_id in self.games:
             info_string = "既にFind fourのグループが設立されています。\n" + \
                           "グループに参加する場合は、メニュー画面の:person_raising_hand:を押してください。"
-            info_message = await message.channel.send(info_string)
-            await info_message.delete(delay=30)
+            info_message = await self.outbound_queue.send(message.channel, info_string)
+            await self.outbound_queue.delete(info_message, delay=30)
             return
         
         self.initialize_game(channel=message.channel)
@@ -346,17 +488,17 @@ class Connect4GameMaster:
         menu_embed = menu_embed.add_field(name="メニュー画面", value=info_string)
 
         if self.games[channel.id]["menu_message"] is None:
-            menu_message = await channel.send(embed=menu_embed)
-            await menu_message.add_reaction("▶️")
-            await menu_message.add_reaction("↔️")
+            menu_message = await self.outbound_queue.send(channel, embed=menu_embed)
+            await self.outbound_queue.add_reaction(menu_message, "▶️")
+            await self.outbound_queue.add_reaction(menu_message, "↔️")
             if isinstance(self.games[channel.id]["channel"], TextChannel):
-                await menu_message.add_reaction("🙋")
-                await menu_message.add_reaction("👋")
+                await self.outbound_queue.add_reaction(menu_message, "🙋")
+                await self.outbound_queue.add_reaction(menu_message, "👋")
             else:
-                await menu_message.add_reaction("👋")
+                await self.outbound_queue.add_reaction(menu_message, "👋")
             self.games[channel.id]["menu_message"] = menu_message
         else:
-            await self.games[channel.id]["menu_message"].edit(embed=menu_embed)
+            await self.outbound_queue.edit(self.games[channel.id]["menu_message"], embed=menu_embed)
     
 
     async def show_board(self, channel: Union[DMChannel, TextChannel], result: Optional[int]=None) -> None:
@@ -388,9 +530,9 @@ class Connect4GameMaster:
         board_embed = board_embed.add_field(name=player_string, value=board_string)
 
         if self.games[channel.id]["board_message"] is None:
-            self.games[channel.id]["board_message"] = await channel.send(embed=board_embed)
+            self.games[channel.id]["board_message"] = await self.outbound_queue.send(channel, embed=board_embed)
         else:
-            await self.games[channel.id]["board_message"].edit(embed=board_embed)
+            await self.outbound_queue.edit(self.games[channel.id]["board_message"], embed=board_embed)
 
 
     async def push_board(self, channel: Union[DMChannel, TextChannel], column_num: int) -> None:
@@ -407,15 +549,18 @@ class Connect4GameMaster:
             await self.show_board(channel)
             next_index = int((self.games[channel.id]["now_turn"] - 1) / (-2))
             if self.games[channel.id]["players"][next_index].bot:
-                hand = self.ai.get_hand(pos=self.games[channel.id]["history"])
+                hand = await self.ai.get_hand(pos=self.games[channel.id]["history"])
                 await self.push_board(channel, hand)
+            elif self.games[channel.id]["vs_ai"]:
+                # Search the replies to every move while the player is thinking.
+                self.ai.prefetch(pos=self.games[channel.id]["history"])
         else:
             self.games[channel.id]["is_playing"] = False
             self.games[channel.id]["can_push"] = False
             await self.show_board(channel, result=result)
             self.set_result(channel.id, result)
-            await self.games[channel.id]["board_message"].add_reaction("🔁")
-            await self.games[channel.id]["board_message"].add_reaction("🔧")
+            await self.outbound_queue.add_reaction(self.games[channel.id]["board_message"], "🔁")
+            await self.outbound_queue.add_reaction(self.games[channel.id]["board_message"], "🔧")
     
 
     async def join(self, channel: Union[DMChannel, TextChannel], user: Member) -> None:        
@@ -448,15 +593,15 @@ class Connect4GameMaster:
 
         emoji_number_list = ["1️⃣","2️⃣","3️⃣","4️⃣","5️⃣","6️⃣","7️⃣"]
         for emoji_number in emoji_number_list:
-            await self.games[channel.id]["board_message"].add_reaction(emoji_number)
+            await self.outbound_queue.add_reaction(self.games[channel.id]["board_message"], emoji_number)
 
         if self.games[channel.id]["players"][0].bot:
-            hand = self.ai.get_hand(pos="")
+            hand = await self.ai.get_hand(pos="")
             await self.push_board(channel, hand)
     
 
     async def repeat_game(self, channel: Union[DMChannel, TextChannel]) -> None:
-        await self.games[channel.id]["board_message"].delete()
+        await self.outbound_queue.delete(self.games[channel.id]["board_message"])
         self.games[channel.id]["board_message"] = None
         self.games[channel.id]["board"].__init__()
         await self.start_game(channel)
@@ -464,36 +609,306 @@ class Connect4GameMaster:
 
     async def back_to_menu(self, channel: Union[DMChannel, TextChannel]) -> None:
         self.games[channel.id]["board"].__init__()
-        await self.games[channel.id]["board_message"].delete()
+        await self.outbound_queue.delete(self.games[channel.id]["board_message"])
         self.games[channel.id]["board_message"] = None
-        await self.games[channel.id]["menu_message"].delete()
+        await self.outbound_queue.delete(self.games[channel.id]["menu_message"])
         self.games[channel.id]["menu_message"] = None
         await self.show_menu(channel)
 
     
     async def show_statistics(self, channel: Union[DMChannel, TextChannel]) -> None:
-        all_match_num, vs_ai_num, ai_win_num = self.get_results()
+        # Firestore calls block, and a rebuild reads every result, so they run off the event loop.
+        all_match_num, vs_ai_num, ai_win_num = await asyncio.get_event_loop().run_in_executor(None, self.get_results)
         ai_win_rate = f"{100 * ai_win_num / vs_ai_num:.2f} %" if vs_ai_num else "---"
         info_string = f"合計対戦回数：{all_match_num}\n" + \
                       f"   対人戦：{all_match_num - vs_ai_num}\n" + \
                       f"   AI戦：{vs_ai_num}\n" + \
                       f"   AIの勝利回数：{ai_win_num}（勝率：{ai_win_rate}）"
-        await channel.send(info_string)
+        await self.outbound_queue.send(channel, info_string)
         
 
-class UnbeatableAI:
+class SolverPool:
+    """
+    SolverPool
+    ----------
+
+    Runs the searches of the AI in a bounded pool of worker processes, so
+    a search in one game never blocks the event loop, the other games or the trackers.
+    Every search has a time budget, and returns the scores of the deepest
+    search finished in time.
+
+    Attributes:
+        max_workers (:class:`int`):
+            Number of worker processes.
+        max_prefetching (:class:`int`):
+            Maximum number of speculative searches running at the same time,
+            so that the moves of waiting players always find a free worker soon.
+        timeout_margin (:class:`float`):
+            Seconds allowed on top of the time budget before giving up on a search.
+        queue_depth (:class:`int`):
+            Number of searches waiting or running right now.
+        max_queue_depth (:class:`int`):
+            The largest `queue_depth` observed.
+        completed (:class:`int`):
+            Number of searches finished successfully.
+        timeouts (:class:`int`):
+            Number of searches that exceeded their time budget and `timeout_margin`.
+    """
+
+    def __init__(self, max_workers: int=2, max_prefetching: int=1, timeout_margin: float=5.0) -> None:
+        self.max_workers: int = max_workers
+        self.max_prefetching: int = max_prefetching
+        self.timeout_margin: float = timeout_margin
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.prefetch_semaphore: Optional[asyncio.Semaphore] = None
+
+        self.queue_depth: int = 0
+        self.max_queue_depth: int = 0
+        self.completed: int = 0
+        self.timeouts: int = 0
+
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        # The pool is created on first use, not when the module is imported.
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.semaphore = asyncio.Semaphore(self.max_workers)
+            self.prefetch_semaphore = asyncio.Semaphore(self.max_prefetching)
+
+        return self.executor
+
+
+    async def run(self, pos: str, time_budget: float, kind: str="move",
+                  on_start: Optional[Callable[[], None]]=None) -> Tuple[List[int], bool]:
+        # Returns the scores and whether they are exact. `on_start` is called once a worker takes the search.
+        executor = self.get_executor()
+        prefetch_semaphore = self.prefetch_semaphore if kind == "prefetch" else None
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            with AI_SEARCH_SECONDS.time(kind=kind):
+                if prefetch_semaphore is not None:
+                    await prefetch_semaphore.acquire()
+                try:
+                    async with self.semaphore:
+                        if on_start is not None:
+                            on_start()
+                        future = asyncio.get_event_loop().run_in_executor(executor, search_scores, pos, time_budget)
+                        score_list, depth, is_exact = await asyncio.wait_for(
+                            future, timeout=time_budget + self.timeout_margin)
+                finally:
+                    if prefetch_semaphore is not None:
+                        prefetch_semaphore.release()
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        self.completed += 1
+        AI_SEARCH_DEPTH.observe(depth, kind=kind, exact=str(is_exact).lower())
+        return score_list, is_exact
+
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+        }
 
-    def __init__(self) -> None:
-        pass
 
-    
-    def get_score(self, pos: str) -> list:
-        url = f"https://connect4.gamesolver.org/solve?pos={pos}"
-        json_object = JsonStream().get_json_object(url=url)
-        return json_object["score"]
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = None
+
+
+# The worker pool shared by all games in the bot.
+shared_solver_pool = SolverPool()
+shared_metrics.callback("infosquare_connect4_ai_queue_depth", "AI searches waiting or running in the worker pool.",
+                        lambda: shared_solver_pool.queue_depth)
+shared_metrics.callback("infosquare_connect4_ai_timeouts_total", "AI searches that exceeded their timeout.",
+                        lambda: shared_solver_pool.timeouts, type_="counter")
 
 
-    def get_hand(self, pos: str) -> int:
-        score_list = [-100 if score == 100 else score for score in self.get_score(pos)]
+class UnbeatableAI:
+    """
+    UnbeatableAI
+    ----------
+
+    Chooses the moves of the bot with the opening book, and with the local
+    Connect 4 solver for the positions the book does not cover.
+    Searches run in the shared worker pool with a time budget, so many games
+    against the AI can think at the same time.
+
+    While a player is thinking, the replies to each of their possible moves are
+    searched ahead of time. When the real move arrives, the searches of the
+    other moves are cancelled and the reply usually comes from the cache.
+
+    A move is perfect only when its score vector is exact: a position of the
+    opening book, or one the solver finishes within `time_budget`. Without a book,
+    the solver in pure Python rarely finishes before the middle of the game, and
+    those moves come from the deepest search finished in time, which can miss a
+    result beyond its horizon. This is accepted so that no move keeps a game waiting
+    for more than `time_budget`; install a book built with `opening_book` to play
+    the opening perfectly. Whether each move was exact is reported by the
+    `infosquare_connect4_ai_search_depth` metric.
+
+    Attributes:
+        book (:class:`OpeningBook`):
+            Solved scores of the early positions.
+        pool (:class:`SolverPool`):
+            Worker processes running the searches.
+        time_budget (:class:`float`):
+            Seconds a search for a move may take.
+        prefetch_time_budget (:class:`float`):
+            Seconds a speculative search may take.
+        cache_size (:class:`int`):
+            Number of score vectors kept in `score_cache`.
+        score_cache (:class:`OrderedDict[str, List[int]]`):
+            Exact score vectors by history, least recently used first.
+            A vector cut off by a time budget is never cached,
+            so the position is searched again the next time it is played.
+        prefetches (:class:`Dict[str, asyncio.Task]`):
+            Speculative searches waiting or running, by history.
+        started_prefetches (:class:`Set[str]`):
+            Histories of the speculative searches a worker has taken.
+            The others may wait behind the searches of other games, so a move never waits for them.
+        prefetched_scores (:class:`OrderedDict[str, List[int]]`):
+            Score vectors of finished speculative searches that are not exact,
+            kept only until the move they were searched for is played or dropped.
+        fallback_executor (:class:`ThreadPoolExecutor`):
+            Single thread running the shallowest search when the pool fails.
+            The solver of the bot process is not thread-safe, so only one thread uses it.
+    """
+
+    def __init__(self, time_budget: float=3.0, prefetch_time_budget: float=2.0, cache_size: int=4096) -> None:
+        self.book: OpeningBook = shared_opening_book
+        self.pool: SolverPool = shared_solver_pool
+        self.time_budget: float = time_budget
+        self.prefetch_time_budget: float = prefetch_time_budget
+        self.cache_size: int = cache_size
+        self.score_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+        self.prefetches: Dict[str, asyncio.Task] = {}
+        self.prefetched_scores: "OrderedDict[str, List[int]]" = OrderedDict()
+        self.started_prefetches: Set[str] = set()
+        self.fallback_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+
+
+    async def get_hand(self, pos: str) -> int:
+        source = "cache" if pos in self.score_cache else "book"
+        score_list = self.get_known_score(pos)
+        if score_list is None:
+            source = "prefetch"
+            score_list = await self.wait_prefetch(pos)
+        if score_list is None:
+            source = "search"
+            try:
+                score_list, is_exact = await self.pool.run(pos, self.time_budget)
+                if is_exact:
+                    self.put_score(pos, score_list)
+            except Exception as e:
+                # The shallowest search always finishes soon, so the game goes on even without the pool.
+                print(f"WARNING: The AI search failed. ({type(e).__name__}: {e})")
+                score_list, _, _ = await asyncio.get_event_loop().run_in_executor(
+                    self.fallback_executor, search_scores, pos, 0.0)
+        AI_SCORE_LOOKUPS.inc(source=source)
+
+        score_list = [-100 if score == INVALID_SCORE else score for score in score_list]
         max_score = max(score_list)
-        return score_list.index(max_score)
+        # Among equal scores the most central column is the strongest.
+        return next(column for column in COLUMN_ORDER if score_list[column] == max_score)
+
+
+    def get_known_score(self, pos: str) -> Optional[List[int]]:
+        # A book lookup is a few reads of the mapped file, so it is done on the event loop.
+        if pos in self.score_cache:
+            self.score_cache.move_to_end(pos)
+            return self.score_cache[pos]
+        return self.book.get_scores(pos)
+
+
+    def put_score(self, pos: str, score_list: List[int]) -> None:
+        self.score_cache[pos] = score_list
+        self.score_cache.move_to_end(pos)
+        while len(self.score_cache) > self.cache_size:
+            self.score_cache.popitem(last=False)
+
+
+    def prefetch(self, pos: str) -> None:
+        for next_pos in get_next_histories(pos):
+            if next_pos in self.prefetches or next_pos in self.prefetched_scores or \
+               self.get_known_score(next_pos) is not None:
+                continue
+            task = asyncio.ensure_future(self.run_prefetch(next_pos))
+            task.add_done_callback(lambda task, next_pos=next_pos: self.finish_prefetch(next_pos, task))
+            self.prefetches[next_pos] = task
+
+
+    async def run_prefetch(self, pos: str) -> Optional[List[int]]:
+        try:
+            score_list, is_exact = await self.pool.run(pos, self.prefetch_time_budget, kind="prefetch",
+                                                       on_start=lambda: self.started_prefetches.add(pos))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
+
+        if is_exact:
+            self.put_score(pos, score_list)
+        else:
+            self.prefetched_scores[pos] = score_list
+            # Games left in the middle never play their move, so only the latest vectors are kept.
+            while len(self.prefetched_scores) > self.cache_size:
+                self.prefetched_scores.popitem(last=False)
+        return score_list
+
+
+    def finish_prefetch(self, pos: str, task: asyncio.Task) -> None:
+        # A done callback, so that a task cancelled before it started is removed too.
+        if self.prefetches.get(pos) is task:
+            del self.prefetches[pos]
+            self.started_prefetches.discard(pos)
+        if task.cancelled():
+            AI_PREFETCHES.inc(outcome="cancelled")
+        elif task.result() is None:
+            AI_PREFETCHES.inc(outcome="failed")
+        else:
+            AI_PREFETCHES.inc(outcome="completed")
+
+
+    async def wait_prefetch(self, pos: str) -> Optional[List[int]]:
+        # The other moves of the player were not played, so their searches are dropped.
+        # A search already running in a worker finishes within its time budget, and its result is discarded.
+        for other_pos, task in list(self.prefetches.items()):
+            if other_pos != pos and other_pos[:-1] == pos[:-1]:
+                task.cancel()
+        for other_pos in list(self.prefetched_scores):
+            if other_pos != pos and other_pos[:-1] == pos[:-1]:
+                del self.prefetched_scores[other_pos]
+
+        if pos in self.prefetched_scores:
+            return self.prefetched_scores.pop(pos)
+        task = self.prefetches.get(pos)
+        if task is None:
+            return None
+        if pos not in self.started_prefetches:
+            # Still queued behind the speculative searches of other games, so the move is searched at once instead.
+            task.cancel()
+            return None
+        try:
+            score_list = await asyncio.wait_for(asyncio.shield(task), timeout=self.time_budget)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.CancelledError:
+            # Dropped by another game at the same position; the move is searched instead.
+            if task.cancelled():
+                return None
+            raise
+
+        self.prefetched_scores.pop(pos, None)
+        return score_list
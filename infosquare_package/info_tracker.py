@@ -4,22 +4,160 @@ Information tracker
 author: Snow Rabbit
 """
 
-import ast
+import asyncio
+import hashlib
+import json
 import operator
-import re
+import time
 from abc import abstractmethod
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import discord
-from bs4.element import ResultSet
 from discord.channel import TextChannel
 from discord.embeds import Embed
 from discord.message import Message
 from discord.user import ClientUser
 
 from . import embed_color
-from .util.web_stream import HTMLStream, JsonStream
+from .util.board_store import BoardStore, shared_board_store
+from .util.data_source import DataSourceRegistry, Loader, StalePayloadError, Validator, shared_data_sources
+from .util.formatting import (convert_number_to_emoji, convert_number_to_fullwidth, format_jst,
+                              get_district_marks, get_embed_length, get_field_length, get_population_emoji)
+from .util.metrics import shared_metrics
+from .util.outbound_queue import PRIORITY_BOARD, OutboundQueue, shared_outbound_queue
+from .util.page_parser import StatusComponentExtractor, parse_toonhq_groups
+from .util.population_history import PopulationHistory, shared_population_history
+from .util.snapshot_store import SnapshotStore, shared_snapshot_store
+from .util.web_stream import AsyncHTMLStream, AsyncJsonStream, AsyncWebSession, shared_web_session
+
+
+INVASION_URL = "https://toonhq.org/api/v1/invasion/"
+
+# Limits of a single embed on Discord.
+MAX_EMBED_FIELDS = 25
+MAX_EMBED_LENGTH = 6000
+
+TRACKER_FETCH_SECONDS = shared_metrics.histogram(
+    "infosquare_tracker_fetch_seconds", "Time trackers wait for upstream data.", ["tracker", "kind"])
+TRACKER_PARSE_SECONDS = shared_metrics.histogram(
+    "infosquare_tracker_parse_seconds", "Time spent in load_information apart from waiting for upstream data.",
+    ["tracker"])
+TRACKER_LOAD_FAILURES = shared_metrics.counter(
+    "infosquare_tracker_load_failures_total", "Loads that did not finish.", ["tracker", "reason"])
+TRACKER_RENDER_SECONDS = shared_metrics.histogram(
+    "infosquare_tracker_render_seconds", "Time spent rendering boards.", ["tracker", "stage"])
+TRACKER_NOTICE_SECONDS = shared_metrics.histogram(
+    "infosquare_tracker_notice_seconds", "Time spent in Tracker.notice, including the Discord edit.", ["tracker"])
+BOARD_EDITS = shared_metrics.counter(
+    "infosquare_board_edits_total", "Boards sent or edited on Discord.", ["tracker"])
+BOARD_EDITS_SKIPPED = shared_metrics.counter(
+    "infosquare_board_edits_skipped_total", "Board edits skipped because nothing changed.", ["tracker", "reason"])
+BOARD_EMBED_CHARS = shared_metrics.histogram(
+    "infosquare_board_embed_chars", "Characters of each published board page, counted against the 6000 limit.",
+    ["tracker"], buckets=(250, 500, 1000, 2000, 3000, 4000, 5000, 6000))
+PARSE_OFFLOAD_SECONDS = shared_metrics.histogram(
+    "infosquare_parse_offload_seconds", "Time parse jobs take in the worker pool, including the wait for a worker.",
+    ["function"])
+
+
+class ParseOffloader:
+    """
+    ParseOffloader
+    ----------
+
+    Runs CPU-heavy page parsing in a bounded worker pool, off the event loop.
+    Parse functions must be module-level functions that take the raw bytes
+    and return plain data, so that they can run in another process.
+
+    Attributes:
+        use_processes (:class:`bool`):
+            Whether to parse in worker processes instead of worker threads.
+        max_workers (:class:`int`):
+            Number of workers in the pool.
+        max_pending (:class:`int`):
+            Maximum number of parse jobs submitted to the pool at the same time.
+            Further jobs wait on the event loop until a slot is free.
+        timeout (:class:`float`):
+            Seconds to wait for a parse job before giving up on it.
+        queue_depth (:class:`int`):
+            Number of parse jobs waiting or running right now.
+        max_queue_depth (:class:`int`):
+            The largest `queue_depth` observed.
+        completed (:class:`int`):
+            Number of parse jobs finished successfully.
+        timeouts (:class:`int`):
+            Number of parse jobs that exceeded `timeout`.
+    """
+
+    def __init__(self, use_processes: bool=True, max_workers: int=1, max_pending: int=4, timeout: float=5.0) -> None:
+        self.use_processes: bool = use_processes
+        self.max_workers: int = max_workers
+        self.max_pending: int = max_pending
+        self.timeout: float = timeout
+
+        self.executor: Optional[Executor] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+        self.queue_depth: int = 0
+        self.max_queue_depth: int = 0
+        self.completed: int = 0
+        self.timeouts: int = 0
+
+
+    def get_executor(self) -> Executor:
+        # The pool is created on first use, not when the module is imported.
+        if self.executor is None:
+            if self.use_processes:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.semaphore = asyncio.Semaphore(self.max_pending)
+
+        return self.executor
+
+
+    async def run(self, parse_function: Callable[..., Any], *args: Any) -> Any:
+        executor = self.get_executor()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            with PARSE_OFFLOAD_SECONDS.time(function=parse_function.__name__):
+                async with self.semaphore:
+                    future = asyncio.get_event_loop().run_in_executor(executor, parse_function, *args)
+                    result = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        self.completed += 1
+        return result
+
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+        }
+
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = None
+
+
+# The worker pool shared by all trackers in the bot.
+shared_parse_offloader = ParseOffloader()
+shared_metrics.callback("infosquare_parse_queue_depth", "Parse jobs waiting or running in the worker pool.",
+                        lambda: shared_parse_offloader.queue_depth)
+shared_metrics.callback("infosquare_parse_timeouts_total", "Parse jobs that exceeded their timeout.",
+                        lambda: shared_parse_offloader.timeouts, type_="counter")
 
 
 class Tracker:
@@ -28,63 +166,437 @@ class Tracker:
     ----------
 
     Super class of the tracker that collect and display information.
-    The subclasses need to implement `load_information` and `make_info_strings`.
+    The subclasses need to implement `load_information`, `get_normalized_payload`,
+    `make_info_strings`, `get_snapshot` and `restore_snapshot`.
 
     Attributes:
-        info_channel (:class:`TextChannel`):
-            Channel to display information.
+        info_channel (:class:`Optional[TextChannel]`):
+            Home channel to display information.
+            It is the only channel the tracker is allowed to purge.
         bot_user (:class:`ClientUser`):
             The bot user to be used for tracking.
-        info_message (:class:`Optional[Message]`):
-            Message displaying information.
-            It is set to :class:`None`: at initialization.
+        channels (:class:`Dict[int, TextChannel]`):
+            Every channel displaying the board, the home channel and the subscribed ones, keyed by id.
+        info_messages (:class:`Dict[int, List[Message]]`):
+            Messages displaying the pages of the board, keyed by channel id.
+        published_embeds (:class:`List[Embed]`):
+            The pages last published, shown right away in newly subscribed channels.
+        publish_lock (:class:`Optional[asyncio.Lock]`):
+            Lock held while the board is published, so a channel subscribing at the same time is not posted twice.
+            Created on first use, on the running event loop.
+        page_fingerprints (:class:`Dict[int, List[str]]`):
+            Fingerprint of each page shown in a channel, keyed by channel id, used to skip the edit of unchanged pages.
+            A channel is left out until its pages have been published without an error,
+            and the board is published again on every poll until no channel is left out.
         embed_color: (:class:`int`): 
             Hex value of color for `discord.Embed`.
         embed_field_tytle: (:class:`str`): 
             Title string of the information.
             (It is not the `title` argument of `discord.Embed`.)
             Defined in the subclasses and used inside `make_info_strings`.
+        data_sources (:class:`DataSourceRegistry`):
+            Registry through which every upstream request of the tracker is made.
+        web_session (:class:`AsyncWebSession`):
+            Transport of the upstream requests. Replaced by a fixture session to run the tracker offline.
+        parse_offloader (:class:`ParseOffloader`):
+            Worker pool used for parsing heavy upstream pages.
+        board_name (:class:`str`):
+            Name of the board in `board_store`.
+            Defined in the subclasses.
+        board_store (:class:`BoardStore`):
+            Store of the message id displaying the board, used to reattach after a restart.
+        outbound_queue (:class:`OutboundQueue`):
+            Queue through which the board is sent and edited.
+        heartbeat_interval (:class:`float`):
+            Seconds after which the board is edited even if nothing has changed,
+            so that the footer keeps showing a recent update time.
+        payload_fingerprint (:class:`Optional[str]`):
+            Fingerprint of the normalized upstream payload of the published board.
+        embed_fingerprint (:class:`Optional[str]`):
+            Fingerprint of the rendered fields and color of the published board.
+        published_at (:class:`Optional[float]`):
+            Monotonic time when the board was last published.
+        fetch_deadline (:class:`float`):
+            Seconds `refresh` waits for `load_information` before giving up
+            and keeping the data of the last successful load.
+        loaded_at (:class:`Optional[float]`):
+            Monotonic time of the last successful load.
+            It is set to :class:`None` until the first load succeeds.
+        loaded_fingerprint (:class:`Optional[str]`):
+            Fingerprint of the normalized payload of the last successful load.
+        is_changed (:class:`bool`):
+            Whether the last successful load changed the normalized payload.
+        last_error (:class:`Optional[Exception]`):
+            Error of the last load, or :class:`None` if it succeeded.
+        stale_error (:class:`Optional[StalePayloadError]`):
+            Error of the upstream whose last good payload the last load used, or :class:`None`.
+            `poll` raises it once the board is published, so the polling job backs off during an outage.
+        fetch_seconds (:class:`float`):
+            Seconds the current load has spent waiting for upstream data.
+        data_fetched_at (:class:`Optional[float]`):
+            Monotonic time the oldest upstream payload of the displayed data was fetched.
+            It falls behind while the registry serves stale payloads during an outage.
+        stale_after (:class:`float`):
+            Age in seconds after which the board is marked as showing old data.
+        published_stale_minutes (:class:`int`):
+            Age in minutes shown by the stale marker of the published board.
+        snapshot_store (:class:`SnapshotStore`):
+            Store of the last good model, used to render the board right after a restart.
+        snapshot_max_age (:class:`float`):
+            Seconds after which a snapshot is too old to be displayed.
+        recorded_fetched_at (:class:`Dict[str, float]`):
+            Fetch time of the payload last passed to `record_history`, by URL.
     """
 
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        self.info_channel: TextChannel = info_channel
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser,
+                 heartbeat_interval: float=300.0) -> None:
+        self.info_channel: Optional[TextChannel] = info_channel
         self.bot_user: ClientUser = bot_user
-        self.info_message: Optional[Message] = None
+        self.channels: Dict[int, TextChannel] = {} if info_channel is None else {info_channel.id: info_channel}
+        self.info_messages: Dict[int, List[Message]] = {}
+        self.published_embeds: List[Embed] = []
+        self.publish_lock: Optional[asyncio.Lock] = None
+        self.page_fingerprints: Dict[int, List[str]] = {}
         self.embed_color: int
         self.embed_field_tytle: str
+        self.data_sources: DataSourceRegistry = shared_data_sources
+        self.web_session: AsyncWebSession = shared_web_session
+        self.parse_offloader: ParseOffloader = shared_parse_offloader
+        self.board_name: str
+        self.board_store: BoardStore = shared_board_store
+        self.outbound_queue: OutboundQueue = shared_outbound_queue
+
+        self.heartbeat_interval: float = heartbeat_interval
+        self.payload_fingerprint: Optional[str] = None
+        self.embed_fingerprint: Optional[str] = None
+        self.published_at: Optional[float] = None
+
+        self.fetch_deadline: float = 8.0
+        self.loaded_at: Optional[float] = None
+        self.loaded_fingerprint: Optional[str] = None
+        self.is_changed: bool = False
+        self.last_error: Optional[Exception] = None
+        self.stale_error: Optional[StalePayloadError] = None
+        self.fetch_seconds: float = 0.0
+        self.loading_fetched_at: Optional[float] = None
+        self.loading_stale_error: Optional[StalePayloadError] = None
+        self.data_fetched_at: Optional[float] = None
+        self.stale_after: float = 120.0
+        self.published_stale_minutes: int = 0
+        self.snapshot_store: SnapshotStore = shared_snapshot_store
+        self.snapshot_max_age: float = 6 * 3600.0
+        self.recorded_fetched_at: Dict[str, float] = {}
 
     
-    def make_embed(self, info_string_list: List[Dict[str, str]]) -> Embed:
-        info_embed = discord.Embed(title="**TTR Realtime Information Board**", color=self.embed_color)
+    def make_embeds(self, info_string_list: List[Dict[str, str]], stale_minutes: int=0) -> List[Embed]:
+        # Split the fields into pages that each stay within the limits of a single embed.
+        title = "**TTR Realtime Information Board**"
+        description = f":warning: 約{stale_minutes}分前の情報を表示しています。" if stale_minutes > 0 else None
+        footer = f"最終更新　{format_jst('%H:%M')}"
+        # Room for the title, the description, the footer and the page number.
+        base_length = len(title) + len(description or "") + len(footer) + 16
+
+        pages = [[]]
+        page_length = base_length
         for info_string in info_string_list:
-            info_embed.add_field(name=info_string["name"], value=info_string["value"], inline=False)
-        renew_time_string = f"最終更新　{datetime.now(timezone(timedelta(hours=+9), 'JST')).strftime('%H:%M')}"
-        info_embed = info_embed.set_footer(text=renew_time_string)
-        
-        return info_embed
+            field_length = get_field_length(info_string)
+            if pages[-1] and (len(pages[-1]) >= MAX_EMBED_FIELDS or page_length + field_length > MAX_EMBED_LENGTH):
+                pages.append([])
+                page_length = base_length
+            pages[-1].append(info_string)
+            page_length += field_length
+
+        info_embeds = []
+        for page, page_info_strings in enumerate(pages):
+            page_title = title if len(pages) == 1 else f"{title} ({page + 1}/{len(pages)})"
+            info_embed = discord.Embed(title=page_title, color=self.embed_color)
+            if description is not None and page == 0:
+                info_embed.description = description
+            for info_string in page_info_strings:
+                info_embed.add_field(name=info_string["name"], value=info_string["value"], inline=False)
+            info_embed.set_footer(text=footer)
+            info_embeds.append(info_embed)
+
+        return info_embeds
 
     
+    async def poll(self) -> bool:
+        is_loaded = await self.refresh()
+        await self.notice()
+        if not is_loaded:
+            raise self.last_error
+        if self.stale_error is not None:
+            raise self.stale_error
+
+        return self.is_changed
+
+
+    async def refresh(self) -> bool:
+        self.fetch_seconds = 0.0
+        self.loading_fetched_at = None
+        self.loading_stale_error = None
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.load_information(), timeout=self.fetch_deadline)
+        except asyncio.TimeoutError as e:
+            print(f"WARNING: {type(self).__name__} could not load information within {self.fetch_deadline} seconds.")
+            TRACKER_LOAD_FAILURES.inc(tracker=self.board_name, reason="timeout")
+            self.last_error = e
+            return False
+        except Exception as e:
+            print(f"WARNING: {type(self).__name__} could not load information. ({type(e).__name__}: {e})")
+            TRACKER_LOAD_FAILURES.inc(tracker=self.board_name, reason="error")
+            self.last_error = e
+            return False
+        # Fetches running side by side can add up to more than the load itself.
+        parse_seconds = max(0.0, time.perf_counter() - started_at - self.fetch_seconds)
+        TRACKER_PARSE_SECONDS.observe(parse_seconds, tracker=self.board_name)
+
+        loaded_fingerprint = self.make_fingerprint(self.get_normalized_payload())
+        self.is_changed = loaded_fingerprint != self.loaded_fingerprint
+        self.loaded_fingerprint = loaded_fingerprint
+        self.loaded_at = time.monotonic()
+        self.data_fetched_at = self.loaded_at if self.loading_fetched_at is None else self.loading_fetched_at
+        self.last_error = None
+        self.stale_error = self.loading_stale_error
+        if self.is_changed:
+            self.save_snapshot()
+        self.record_history()
+        return True
+
+
+    def record_history(self) -> None:
+        # Overridden by the trackers whose data is kept in the history.
+        pass
+
+
+    def get_new_fetch_time(self, url: str) -> Optional[float]:
+        # Epoch time of the payload of `url` if it has not been recorded yet, so stale payloads are recorded once.
+        fetched_at = self.data_sources.get_fetched_at(url)
+        if fetched_at is None or fetched_at == self.recorded_fetched_at.get(url):
+            return None
+
+        self.recorded_fetched_at[url] = fetched_at
+        return time.time() - (time.monotonic() - fetched_at)
+
+
+    def save_snapshot(self) -> None:
+        # The snapshot outlives the process, so its time is stored as an epoch time.
+        fetched_at = time.time() - (time.monotonic() - self.data_fetched_at)
+        self.snapshot_store.set_snapshot(self.board_name, self.get_snapshot(), fetched_at)
+
+
+    async def warm_start(self) -> None:
+        snapshot = self.snapshot_store.get_snapshot(self.board_name, max_age=self.snapshot_max_age)
+        if snapshot is None:
+            return
+
+        model, fetched_at = snapshot
+        try:
+            self.restore_snapshot(model)
+            self.loaded_fingerprint = self.make_fingerprint(self.get_normalized_payload())
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"WARNING: {type(self).__name__} could not restore its snapshot. ({type(e).__name__}: {e})")
+            return
+
+        self.loaded_at = time.monotonic()
+        self.data_fetched_at = self.loaded_at - max(0.0, time.time() - fetched_at)
+        try:
+            await self.notice()
+        except Exception as e:
+            print(f"WARNING: {type(self).__name__} could not display its snapshot. ({type(e).__name__}: {e})")
+
+
     async def notice(self) -> None:
-        # HACK: Shouldn't handle 'load_information' in 'notice'.
-        if type(self) is not InvasionTracker:
-            self.load_information()
-        info_string_list = self.make_info_strings()
-        info_embed = self.make_embed(info_string_list)
-
-        if self.info_message is None:
-            history = await self.info_channel.history().flatten()
-            if len(history) == 1 and history[0].author.id == self.bot_user.id:
-                self.info_message = history[0]
-            else:
-                await self.info_channel.purge(limit=None)
-                self.info_message = await self.info_channel.send(embed=info_embed)
+        # Nothing to display until the first load succeeds.
+        if self.loaded_at is None:
+            return
+
+        with TRACKER_NOTICE_SECONDS.time(tracker=self.board_name):
+            # Skip rendering and editing while neither the data nor the board has changed.
+            is_heartbeat = self.is_heartbeat_due()
+            stale_minutes = self.get_stale_minutes()
+            is_stale_changed = stale_minutes != self.published_stale_minutes
+            payload_fingerprint = self.loaded_fingerprint
+            is_published = self.is_published_everywhere()
+            if payload_fingerprint == self.payload_fingerprint and is_published and \
+               not is_heartbeat and not is_stale_changed:
+                BOARD_EDITS_SKIPPED.inc(tracker=self.board_name, reason="payload")
+                return
+
+            with TRACKER_RENDER_SECONDS.time(tracker=self.board_name, stage="info_strings"):
+                info_string_list = self.make_info_strings()
+            embed_fingerprint = self.make_fingerprint([self.embed_color, info_string_list, stale_minutes])
+            if embed_fingerprint == self.embed_fingerprint and is_published and not is_heartbeat:
+                BOARD_EDITS_SKIPPED.inc(tracker=self.board_name, reason="embed")
+                self.payload_fingerprint = payload_fingerprint
                 return
 
-        await self.info_message.edit(embed=info_embed)
+            with TRACKER_RENDER_SECONDS.time(tracker=self.board_name, stage="embed"):
+                info_embeds = self.make_embeds(info_string_list, stale_minutes)
+            for info_embed in info_embeds:
+                BOARD_EMBED_CHARS.observe(get_embed_length(info_embed), tracker=self.board_name)
+            await self.publish(info_embeds, is_heartbeat=is_heartbeat)
+            BOARD_EDITS.inc(tracker=self.board_name)
+
+        self.payload_fingerprint = payload_fingerprint
+        self.embed_fingerprint = embed_fingerprint
+        self.published_stale_minutes = stale_minutes
+        self.published_at = time.monotonic()
+
+
+    def get_publish_lock(self) -> asyncio.Lock:
+        if self.publish_lock is None:
+            self.publish_lock = asyncio.Lock()
+        return self.publish_lock
+
+
+    async def publish(self, info_embeds: List[Embed], is_heartbeat: bool=False) -> None:
+        # The board is rendered once and the same pages go to every channel through the outbound queue.
+        page_fingerprints = self.make_page_fingerprints(info_embeds)
+        async with self.get_publish_lock():
+            channels = list(self.channels.values())
+            results = await asyncio.gather(*[self.publish_to(channel, info_embeds, page_fingerprints, is_heartbeat)
+                                             for channel in channels],
+                                           return_exceptions=True)
+            self.published_embeds = info_embeds
+
+        errors = []
+        for channel, result in zip(channels, results):
+            if isinstance(result, discord.Forbidden) and self.drop_subscription(channel.id):
+                print(f"WARNING: {type(self).__name__} is not allowed to publish to channel {channel.id}, "
+                      f"so its subscription has been removed.")
+                errors.append(result)
+            elif isinstance(result, Exception):
+                print(f"WARNING: {type(self).__name__} could not publish to channel {channel.id}. "
+                      f"({type(result).__name__}: {result})")
+                errors.append(result)
+        if errors and len(errors) == len(channels):
+            raise errors[0]
+
+
+    async def publish_to(self, channel: TextChannel, info_embeds: List[Embed],
+                         page_fingerprints: Optional[List[str]]=None, is_heartbeat: bool=False) -> None:
+        if page_fingerprints is None:
+            page_fingerprints = self.make_page_fingerprints(info_embeds)
+        # The fingerprints are taken out until the edits succeed, so a failed edit is retried on the next poll.
+        published_fingerprints = self.page_fingerprints.pop(channel.id, None)
+
+        info_messages = self.info_messages.get(channel.id)
+        if info_messages is None:
+            # Messages that are not cached may show anything, so every page is edited.
+            published_fingerprints = None
+            info_messages = await self.reattach_messages(channel)
+
+        if not info_messages and self.info_channel is not None and channel.id == self.info_channel.id:
+            # Fall back to scanning the home channel when the messages are not recorded.
+            history = await channel.history().flatten()
+            if history and len(history) <= len(info_embeds) and \
+               all(message.author.id == self.bot_user.id for message in history):
+                info_messages = list(reversed(history))
+            else:
+                await channel.purge(limit=None)
+        # Subscribed channels belong to other servers, so they are never purged.
+
+        self.info_messages[channel.id] = info_messages
+        try:
+            for page, info_embed in enumerate(info_embeds):
+                if page >= len(info_messages):
+                    info_messages.append(await self.outbound_queue.send(channel, embed=info_embed,
+                                                                        priority=PRIORITY_BOARD))
+                # Pages whose content has not moved keep their message untouched, except on the heartbeat.
+                elif is_heartbeat or published_fingerprints is None or page >= len(published_fingerprints) or \
+                     published_fingerprints[page] != page_fingerprints[page]:
+                    await self.outbound_queue.edit(info_messages[page], embed=info_embed, priority=PRIORITY_BOARD)
+
+            # The board got shorter, so remove the pages left over.
+            while len(info_messages) > len(info_embeds):
+                try:
+                    await self.outbound_queue.delete(info_messages.pop(), priority=PRIORITY_BOARD)
+                except discord.NotFound:
+                    pass
+        except discord.NotFound:
+            # A message has been deleted, so post the board again next time.
+            self.info_messages.pop(channel.id, None)
+            self.board_store.remove_message_ids(self.board_name, channel.id)
+            raise
+        finally:
+            if channel.id in self.info_messages:
+                self.board_store.set_message_ids(self.board_name, channel.id,
+                                                 [info_message.id for info_message in info_messages])
+
+        if channel.id in self.channels:
+            self.page_fingerprints[channel.id] = page_fingerprints
+
+
+    def is_published_everywhere(self) -> bool:
+        # A channel whose last publish failed has no fingerprints, so it is retried even if nothing has changed.
+        return all(channel_id in self.page_fingerprints for channel_id in self.channels)
+
+
+    def make_page_fingerprints(self, info_embeds: List[Embed]) -> List[str]:
+        return [self.make_fingerprint([info_embed.title, info_embed.description, info_embed.color.value,
+                                       [[field.name, field.value] for field in info_embed.fields]])
+                for info_embed in info_embeds]
+
+
+    async def reattach_messages(self, channel: TextChannel) -> List[Message]:
+        info_messages = []
+        for message_id in self.board_store.get_message_ids(self.board_name, channel.id):
+            try:
+                info_messages.append(await channel.fetch_message(message_id))
+            except (discord.NotFound, discord.Forbidden):
+                # Keep the pages in front of the missing one, the rest is posted again.
+                break
+
+        return info_messages
+
+
+    def add_channel(self, channel: TextChannel) -> None:
+        self.channels[channel.id] = channel
+
+
+    def remove_channel(self, channel_id: int) -> None:
+        self.channels.pop(channel_id, None)
+        self.info_messages.pop(channel_id, None)
+        self.page_fingerprints.pop(channel_id, None)
+
+
+    def drop_subscription(self, channel_id: int) -> bool:
+        # A subscribed channel that no longer lets the bot in is dropped, instead of failing on every poll.
+        # The home channel is never dropped.
+        if self.info_channel is not None and channel_id == self.info_channel.id:
+            return False
+
+        self.remove_channel(channel_id)
+        self.board_store.remove_subscription(self.board_name, channel_id)
+        return True
+
+
+    def get_stale_minutes(self) -> int:
+        # The age of the displayed data, or 0 while it is recent enough to show without a marker.
+        if self.data_fetched_at is None:
+            return 0
+        age = time.monotonic() - self.data_fetched_at
+        return int(age // 60) if age >= self.stale_after else 0
+
+
+    def is_heartbeat_due(self) -> bool:
+        return self.published_at is None or time.monotonic() - self.published_at >= self.heartbeat_interval
+
+
+    def make_fingerprint(self, data: Any) -> str:
+        data_string = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(data_string.encode("utf-8")).hexdigest()
+
+
+    @abstractmethod
+    async def load_information(self) -> None:
+        raise NotImplementedError()
 
 
     @abstractmethod
-    def load_information(self) -> None:
+    def get_normalized_payload(self) -> Any:
         raise NotImplementedError()
 
 
@@ -93,135 +605,219 @@ class Tracker:
         raise NotImplementedError()
 
 
-    def load_data_api(self, url: str) -> dict:
-        return JsonStream().get_json_object(url=url)
+    @abstractmethod
+    def get_snapshot(self) -> Any:
+        raise NotImplementedError()
 
 
-    def load_data_scraping(self, url: str, tag: Optional[str]=None, class_: Optional[str]=None) -> ResultSet:
-        if class_ is not None:
-            return HTMLStream().get_soup_object(url=url, class_=class_)
-        else:
-            return HTMLStream().get_soup_object(url=url, tag=tag)
+    @abstractmethod
+    def restore_snapshot(self, model: Any) -> None:
+        raise NotImplementedError()
 
-    
-    def convert_number_to_emoji(self, number: Union[int, str]) -> str:
-        num2emoji = {
-            "1": ":one:", "2": ":two:", "3": ":three:",
-            "4": ":four:", "5": ":five:", "6": ":six:",
-            "7": ":seven:", "8": ":eight:", "9": ":nine:",
-            "0": ":zero:"
-        }
-        emoji_string = ""
-        for num in str(number):
-            emoji_string += num2emoji[num]
 
-        return emoji_string
+    @contextmanager
+    def measure_fetch(self, kind: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.fetch_seconds += elapsed
+            TRACKER_FETCH_SECONDS.observe(elapsed, tracker=self.board_name, kind=kind)
+
+
+    async def load_data(self, url: str, loader: Loader, kind: str, validator: Optional[Validator]=None,
+                        max_age: Optional[float]=None) -> Any:
+        with self.measure_fetch(kind):
+            payload = await self.data_sources.get(url, loader=loader, validator=validator, max_age=max_age)
+
+        # The registry may have answered with a stale payload, so remember how old the data is.
+        fetched_at = self.data_sources.get_fetched_at(url)
+        if fetched_at is not None and (self.loading_fetched_at is None or fetched_at < self.loading_fetched_at):
+            self.loading_fetched_at = fetched_at
+        stale_error = self.data_sources.get_stale_error(url, max_age=max_age)
+        if stale_error is not None:
+            self.loading_stale_error = stale_error
+
+        return payload
+
+
+    async def load_data_api(self, url: str, required_keys: Sequence[str]=(), max_age: Optional[float]=None) -> dict:
+        # An error page or an empty body is treated as a failure of the upstream, not as data.
+        return await self.load_data(url, loader=AsyncJsonStream(self.web_session).get_json_object, kind="api",
+                                    validator=lambda payload: self.has_keys(payload, required_keys), max_age=max_age)
+
+
+    @staticmethod
+    def has_keys(payload: Any, keys: Sequence[str]) -> bool:
+        return isinstance(payload, dict) and all(key in payload for key in keys)
+
+
+    async def load_data_raw(self, url: str) -> bytes:
+        return await self.load_data(url, loader=AsyncHTMLStream(self.web_session).get_html_object, kind="raw",
+                                    validator=lambda payload: bool(payload))
+
+
+    def convert_number_to_emoji(self, number: Union[int, str]) -> str:
+        return convert_number_to_emoji(number)
 
     
     def convert_number_to_fullwidth(self, number: Union[int, str]) -> str:
-        return str(number).translate(
-                    str.maketrans({chr(0x0021 + i): chr(0xFF01 + i) for i in range(94)})
-               ).replace(" ", "\u3000")
+        return convert_number_to_fullwidth(number)
 
 
 class DistrictTracker(Tracker):
 
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        super().__init__(info_channel, bot_user)
+    LEGEND_STRING = "\n:speech_balloon:：スピードチャットのみ使用可能\n" \
+                    ":shield:：特定のイベントが開催されない\n" \
+                    ":sparkles:：召喚によるコグの侵略が発生しない\n" \
+                    ":gear:：コグの侵略が進行中\n\n"
+
+
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser,
+                 heartbeat_interval: float=300.0) -> None:
+        super().__init__(info_channel, bot_user, heartbeat_interval)
         self.embed_color: int = embed_color.DISTRICT_INFO_COLOR
         self.embed_field_tytle: str = ":park: ロビー情報"
+        self.board_name: str = "district"
         self.url: str = "https://toontownrewritten.com/api/population"
+        self.invasion_url: str = INVASION_URL
+        # The invasion board polls the same feed at least every 15 seconds, so its payload is reused
+        # up to that age instead of being fetched again for the invasion marks.
+        self.invasion_max_age: float = 15.0
+        self.population_history: PopulationHistory = shared_population_history
 
         self.total_population: int
         self.population_by_district: list
-        self.invasions: list
-
-        # HACK: There is no need to create an InvasionTracker instance just to find out invasion information.
-        self.invasions_tracker = InvasionTracker(info_channel=None, bot_user=None)
+        self.invasion_districts: set
     
 
-    def load_information(self) -> None:
-        json_object = self.load_data_api(url=self.url)
+    async def load_information(self) -> None:
+        json_object = await self.load_data_api(url=self.url, required_keys=("totalPopulation", "populationByDistrict"))
+        try:
+            invasion_object = await self.load_data_api(url=self.invasion_url, required_keys=("invasions",),
+                                                       max_age=self.invasion_max_age)
+            invasion_districts = {invasion["district"] for invasion in invasion_object["invasions"]}
+        except Exception as e:
+            # The invasion marks are secondary, so ToonHQ being down must not hide the population.
+            print(f"WARNING: DistrictTracker could not load invasions. ({type(e).__name__}: {e})")
+            invasion_districts = getattr(self, "invasion_districts", set())
+
         self.total_population = json_object["totalPopulation"]
         self.population_by_district = sorted(json_object["populationByDistrict"].items())
-        self.invasions = self.invasions_tracker.get_invasions()
+        self.invasion_districts = invasion_districts
+
+
+    def get_normalized_payload(self) -> Any:
+        return [self.total_population, self.population_by_district, sorted(self.invasion_districts)]
+
+
+    def record_history(self) -> None:
+        fetched_at = self.get_new_fetch_time(self.url)
+        if fetched_at is not None:
+            self.population_history.record_population(fetched_at, self.total_population, self.population_by_district)
+
+
+    def get_snapshot(self) -> Any:
+        return self.get_normalized_payload()
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        total_population, population_by_district, invasion_districts = model
+        self.total_population = int(total_population)
+        self.population_by_district = [(district, int(population)) for district, population in population_by_district]
+        self.invasion_districts = set(invasion_districts)
 
     
     def make_info_strings(self) -> List[Dict[str, str]]:
-        all_population_emoji = self.convert_number_to_emoji(self.total_population)
-        info_string = f"現在の総プレイ人口：{all_population_emoji}人\n\n" + \
-                       "　　人口　　　　ロビー\n" + \
-                      f"{self.make_district_string()}" + \
-                       "\n:speech_balloon:：スピードチャットのみ使用可能\n" + \
-                       ":shield:：特定のイベントが開催されない\n" + \
-                       ":sparkles:：召喚によるコグの侵略が発生しない\n" + \
-                       ":gear:：コグの侵略が進行中\n\n"
+        info_string = "".join([
+            f"現在の総プレイ人口：{convert_number_to_emoji(self.total_population)}人\n\n",
+            "　　人口　　　　ロビー\n",
+            self.make_district_string(),
+            self.LEGEND_STRING,
+        ])
         
         return [{"name": self.embed_field_tytle, "value": info_string}]
 
     
     def make_district_string(self) -> str:
-        status_string = ""
-        for pd in self.population_by_district:
-            if pd[1] <= 300:
-                status_string += ":blue_circle: "
-            elif pd[1] > 500:
-                status_string += ":red_circle: "
-            else:
-                status_string += ":green_circle: "
-
-            status_string += self.convert_number_to_fullwidth(str(pd[1]).rjust(3))
-            status_string += f"　　**{pd[0]}** "
+        return "".join([
+            f"{get_population_emoji(population)} {convert_number_to_fullwidth(str(population).rjust(3))}"
+            f"　　**{district}** {get_district_marks(district, self.invasion_districts)}\n"
+            for district, population in self.population_by_district
+        ])
 
-            if pd[0] in ["Boingbury", "Gulp Gulch", "Whoosh Rapids"]:
-                status_string += ":speech_balloon:"
-            if pd[0] in ["Blam Canyon", "Fizzlefield", "Gulp Gulch", "Splat Summit", "Zapwood"]:
-                status_string += ":shield:"
-            if pd[0] in ["Gulp Gulch", "Splat Summit"]:
-                status_string += ":sparkles:"
-            
-            # HACK: Need refactoring.
-            if pd[0] in str(self.invasions):
-                status_string += ":gear:"
-                
-            status_string += "\n"
 
-        return status_string
+class ServerTracker(Tracker):
 
+    # (section, [(lower case keywords of the component name, label)])
+    STATUS_COMPONENTS = [
+        ("Game Servers", [(("game server",), "ゲームサーバー"),
+                          (("speedchat",), "スピードチャット＋"),
+                          (("game service",), "ゲームサービス全般")]),
+        ("Website", [(("download",), "ダウンロードサーバー"),
+                     (("website", "login"), "公式ホームページ/ログインサーバー")]),
+        ("Support System", [(("support",), "メールサポート")]),
+    ]
 
-class ServerTracker(Tracker):
 
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        super().__init__(info_channel, bot_user)
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser,
+                 heartbeat_interval: float=300.0) -> None:
+        super().__init__(info_channel, bot_user, heartbeat_interval)
         self.embed_field_tytle: str = ":chart_with_downwards_trend: サーバー稼働状況"
+        self.board_name: str = "server"
         self.url: str = "https://status.toontownrewritten.com/"
 
-        self.pr_soup: ResultSet = None
+        self.component_statuses: Dict[str, str] = {}
         self.is_stable: int = 1
 
     
-    def load_information(self) -> None:
-        self.pr_soup = self.load_data_scraping(url=self.url, class_="list-group-item sub-component")
+    async def load_information(self) -> None:
+        # The extraction runs while the page streams in, so it is measured as part of the fetch.
+        self.component_statuses = await self.load_data(self.url, loader=self.extract_component_statuses, kind="stream",
+                                                       validator=lambda components: bool(components))
+
+
+    async def extract_component_statuses(self, url: str) -> Dict[str, str]:
+        keywords = [keyword_group for _, components in self.STATUS_COMPONENTS for keyword_group, _ in components]
+        extractor = StatusComponentExtractor(keywords=keywords)
+        # Each chunk is tokenized between network reads and the download stops early,
+        # so this extraction stays on the event loop instead of going through the parse offloader.
+        await AsyncHTMLStream(self.web_session).feed_html_object(url, extractor.feed_bytes)
+        return extractor.components
+
+
+    def get_normalized_payload(self) -> Any:
+        return sorted(self.component_statuses.items())
+
+
+    def get_snapshot(self) -> Any:
+        return self.component_statuses
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        self.component_statuses = {str(name): str(status) for name, status in model.items()}
 
     
     def make_info_strings(self) -> List[Dict[str, str]]:
-        info_string = "\n**Game Servers**\n" + \
-                      self.get_status_emoji(self.pr_soup[1].small.string) + " ゲームサーバー\n" + \
-                      self.get_status_emoji(self.pr_soup[2].small.string) + " スピードチャット＋\n" + \
-                      self.get_status_emoji(self.pr_soup[3].small.string) + " ゲームサービス全般\n" + \
-                      "\n**Website**\n" + \
-                      self.get_status_emoji(self.pr_soup[4].small.string) + " ダウンロードサーバー\n" + \
-                      self.get_status_emoji(self.pr_soup[5].small.string) + " 公式ホームページ/ログインサーバー\n" + \
-                      "\n**Support System**\n" + \
-                      self.get_status_emoji(self.pr_soup[0].small.string) + " メールサポート\n"
+        self.is_stable = 1
+        lines = []
+        for section, components in self.STATUS_COMPONENTS:
+            lines.append(f"\n**{section}**\n")
+            for keyword_group, label in components:
+                status = StatusComponentExtractor.find_status(self.component_statuses, keyword_group)
+                lines.append(f"{self.get_status_emoji(status)} {label}\n")
         
         self.set_embed_color()
 
-        return [{"name": self.embed_field_tytle, "value": info_string}]
+        return [{"name": self.embed_field_tytle, "value": "".join(lines)}]
 
     
-    def get_status_emoji(self, string: str) -> str:
-        if string == "Operational":
+    def get_status_emoji(self, string: Optional[str]) -> str:
+        if string is None:
+            # The component is not listed on the status page.
+            return ":grey_question:"
+        elif string == "Operational":
             return ":white_check_mark:"
         elif string == "Performance Issues":
             self.is_stable = 2 if self.is_stable < 2 else self.is_stable
@@ -247,20 +843,36 @@ class ServerTracker(Tracker):
 
 class InvasionTracker(Tracker):
 
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        super().__init__(info_channel, bot_user)
+    SNAPSHOT_KEYS = ("district", "cog", "status", "is_mega", "end_time", "defeated", "total")
+
+
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser, heartbeat_interval: float=300.0,
+                 eta_threshold: float=60.0) -> None:
+        super().__init__(info_channel, bot_user, heartbeat_interval)
         self.embed_color: int = embed_color.INVASION_INFO_COLOR
         self.embed_field_tytle: str = ":gear: 現在進行中のコグ侵略情報"
-        self.url: str = "https://toonhq.org/api/v1/invasion/"
+        self.board_name: str = "invasion"
+        self.url: str = INVASION_URL
+        self.population_history: PopulationHistory = shared_population_history
 
         self.invasions: list = []
+        # Rendered field and its monotonic render time by visible state of each invasion,
+        # so unchanged invasions are not formatted again.
+        self.field_cache: Dict[tuple, Tuple[Dict[str, str], float]] = {}
+        # The estimated end time is only moved when a poll changes it by more than this many seconds.
+        self.eta_threshold: float = eta_threshold
 
     
-    def load_information(self) -> None:
-        json_object = self.load_data_api(self.url)
-        self.invasions = []
+    async def load_information(self) -> None:
+        json_object = await self.load_data_api(self.url, required_keys=("invasions",))
+        now_epochtime = time.time()
+        previous_end_times = {(invasion["district"], invasion["cog"]): invasion["end_time"]
+                              for invasion in self.invasions}
+        invasions = []
 
         for invasion in json_object["invasions"]:
+            # The payload is shared through the registry, so leave it untouched.
+            invasion = dict(invasion)
 
             progress = invasion["defeated"] / invasion["total"]
             if progress < 0.75:
@@ -274,12 +886,46 @@ class InvasionTracker(Tracker):
             # HACK: Is this correct to check mega invasions?
             if invasion["total"] == 1000000:
                 invasion["is_mega"] = True
-                invasion["estimated"] = -1000000
+                invasion["end_time"] = None
             else:
                 invasion["is_mega"] = False
-                invasion["estimated"] = (invasion["total"] - invasion["defeated"]) / invasion["defeat_rate"]
+                estimated = (invasion["total"] - invasion["defeated"]) / invasion["defeat_rate"]
+                end_time = int(now_epochtime + estimated)
+                previous_end_time = previous_end_times.get((invasion["district"], invasion["cog"]))
+                if previous_end_time is not None and abs(end_time - previous_end_time) <= self.eta_threshold:
+                    end_time = previous_end_time
+                invasion["end_time"] = end_time
+
+            invasions.append(invasion)
 
-            self.invasions.append(invasion)
+        self.invasions = invasions
+
+
+    def get_normalized_payload(self) -> Any:
+        # The raw defeated count moves on every poll, so only its bucketed status and the end time are compared.
+        # Whether the invasion is about to end changes the board without any change upstream, so it is compared too.
+        now_epochtime = time.time()
+        return [[invasion["district"], invasion["cog"], invasion["status"], invasion["is_mega"], invasion["end_time"],
+                 invasion["total"], self.is_ending(invasion, now_epochtime)]
+                for invasion in self.invasions]
+
+
+    def record_history(self) -> None:
+        fetched_at = self.get_new_fetch_time(self.url)
+        if fetched_at is not None:
+            self.population_history.record_invasions(fetched_at, [(invasion["district"], invasion["cog"])
+                                                                   for invasion in self.invasions])
+
+
+    def get_snapshot(self) -> Any:
+        return [{key: invasion[key] for key in self.SNAPSHOT_KEYS} for invasion in self.invasions]
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        # The end times are absolute, so invasions that ended while the bot was down are dropped.
+        now_epochtime = time.time()
+        self.invasions = [{key: invasion[key] for key in self.SNAPSHOT_KEYS} for invasion in model
+                          if invasion["is_mega"] or invasion["end_time"] > now_epochtime]
 
     
     def make_info_strings(self) -> List[Dict[str, str]]:
@@ -287,22 +933,34 @@ class InvasionTracker(Tracker):
             "name": self.embed_field_tytle,
             "value": "表示されている残り時間は実際と異なる場合があります。\n"
         }]
+        field_cache = {}
+        now_epochtime = time.time()
+        now = time.monotonic()
         for invasion in self.invasions:
-            cog_name = f"**{invasion['status']} {invasion['cog']}**"
-            info_string = self.get_invasion_string(invasion)
-            info_string_list.append({
-                "name": cog_name,
-                "value": info_string
-            })
-        
+            field_key = self.get_field_key(invasion, now_epochtime)
+            cached_field = self.field_cache.get(field_key)
+            # The defeated count is not part of the key, so it is brought up to date at least on every heartbeat.
+            if cached_field is None or now - cached_field[1] >= self.heartbeat_interval:
+                cached_field = ({
+                    "name": f"**{invasion['status']} {invasion['cog']}**",
+                    "value": self.get_invasion_string(invasion)
+                }, now)
+            field_cache[field_key] = cached_field
+            info_string_list.append(cached_field[0])
+        # Only the invasions on the board are kept, so the cache never grows.
+        self.field_cache = field_cache
+
         return info_string_list
 
-    
-    async def countdown(self, interval: int=1) -> None:
-        for i, invasion in enumerate(self.invasions[:]):
-            if invasion["estimated"] >= 0:
-                self.invasions[i]["estimated"] -= interval
-        await self.notice()
+
+    def get_field_key(self, invasion: dict, now_epochtime: float) -> tuple:
+        # The identity of the invasion and its bucketed progress, so the field only changes with the end time.
+        return (invasion["district"], invasion["cog"], invasion["status"], invasion["is_mega"],
+                invasion["end_time"], invasion["total"], self.is_ending(invasion, now_epochtime))
+
+
+    def is_ending(self, invasion: dict, now_epochtime: float) -> bool:
+        return not invasion["is_mega"] and invasion["end_time"] - now_epochtime < 30
 
 
     def get_invasion_string(self, invasion: dict) -> str:
@@ -310,45 +968,32 @@ class InvasionTracker(Tracker):
             time_string = "MEGA INVASION!"
             defeat_string = "---"
         else:
-            time_string = self.convert_sec_to_timestr(invasion["estimated"])
+            time_string = self.convert_epochtime_to_timestr(invasion["end_time"])
             defeat_string = f"{invasion['defeated']} / {invasion['total']}"
 
-        info_string = f"ロビー ： **{invasion['district']}**\n" + \
-                      f"残り時間 ： **{time_string}**\n" + \
+        info_string = f"ロビー ： **{invasion['district']}**\n" \
+                      f"残り時間 ： **{time_string}**\n" \
                       f"倒されたコグの数 ： **{defeat_string}**\n\n"
 
         return info_string
 
     
-    def convert_sec_to_timestr(self, left_sec: str) -> str:
-        if left_sec < 30:
+    def convert_epochtime_to_timestr(self, end_time: int) -> str:
+        if end_time - time.time() < 30:
             return "まもなく終了"
-        
-        time_string = ""
-        if left_sec > 3600:
-            hour = int(left_sec / 3600)
-            time_string += f"{hour} : "
-            left_sec = left_sec - 3600 * hour
-        minute = int(left_sec / 60)
-        time_string += f"{minute:02} : "
-        second = int(left_sec - minute * 60)
-        time_string += f"{second:02}"
-
-        return time_string
 
-    
-    # HACK: This method is just used for DistrictTracker.
-    def get_invasions(self) -> dict:
-        self.load_information()
-        return self.invasions
+        # Discord clients count the dynamic timestamp down by themselves.
+        return f"<t:{end_time}:R>"
 
 
 class FieldOfficeTracker(Tracker):
 
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        super().__init__(info_channel, bot_user)
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser,
+                 heartbeat_interval: float=300.0) -> None:
+        super().__init__(info_channel, bot_user, heartbeat_interval)
         self.embed_color: int = embed_color.FIELDOFFICE_INFO_COLOR
         self.embed_field_tytle: str = ":office: Field Office情報"
+        self.board_name: str = "fieldoffice"
         self.url: str = "https://www.toontownrewritten.com/api/fieldoffices"
 
         self.fieldoffice_list: list
@@ -360,114 +1005,86 @@ class FieldOfficeTracker(Tracker):
         }
 
     
-    def load_information(self) -> None:
-        json_object = self.load_data_api(url=self.url)
-        
-        self.fieldoffice_list = []
-        # FIXME: It seems that sometimes 'load_data_api(url)' may return 'None'.
-        try:
-            for street_id, office in json_object["fieldOffices"].items():
-                self.fieldoffice_list.append({
-                    "difficulty": office["difficulty"] + 1,
-                    "annexes": office["annexes"],
-                    "street": self.zoneid_dict[street_id],
-                    "open": office["open"]
-                })
-            self.fieldoffice_list = sorted(self.fieldoffice_list, key=operator.itemgetter("difficulty", "annexes"))
-        except:
-            print("WARNING: 'load_data_api(url)' might return 'None'.")
+    async def load_information(self) -> None:
+        # Empty or broken responses are rejected by the registry, which serves the last good payload instead.
+        json_object = await self.load_data_api(url=self.url, required_keys=("fieldOffices",))
+
+        fieldoffice_list = []
+        for street_id, office in json_object["fieldOffices"].items():
+            fieldoffice_list.append({
+                "difficulty": office["difficulty"] + 1,
+                "annexes": office["annexes"],
+                "street": self.zoneid_dict.get(street_id, street_id),
+                "open": office["open"]
+            })
+        self.fieldoffice_list = sorted(fieldoffice_list, key=operator.itemgetter("difficulty", "annexes"))
+
+
+    def get_normalized_payload(self) -> Any:
+        return self.fieldoffice_list
+
+
+    def get_snapshot(self) -> Any:
+        return self.fieldoffice_list
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        self.fieldoffice_list = [{
+            "difficulty": int(office["difficulty"]),
+            "annexes": int(office["annexes"]),
+            "street": office["street"],
+            "open": bool(office["open"])
+        } for office in model]
 
     
     def make_info_strings(self) -> List[Dict[str, str]]:
-        info_string = "**Stars** 　　 **Annexes**　  　     **Street**\n"
+        lines = ["**Stars** 　　 **Annexes**　  　     **Street**\n"]
         
         for office in self.fieldoffice_list:
             is_open = ":green_circle:" if office["open"] else ":x:"
             stars = ":black_large_square:" * (3 - office["difficulty"]) + \
                     ":star:" * office["difficulty"]
-            annexes = self.convert_number_to_fullwidth(str(office["annexes"]).rjust(3))
+            annexes = convert_number_to_fullwidth(str(office["annexes"]).rjust(3))
             street = office["street"]
-            info_string += f"{stars}　 {annexes}　 {is_open}  {street}\n"
+            lines.append(f"{stars}　 {annexes}　 {is_open}  {street}\n")
         
-        info_string += "\n:green_circle:：Open\n" + \
-                       ":x:：Closed\n\n"
+        lines.append("\n:green_circle:：Open\n:x:：Closed\n\n")
         
-        return [{"name": self.embed_field_tytle, "value": info_string}]
+        return [{"name": self.embed_field_tytle, "value": "".join(lines)}]
 
 
 class HQGroupTracker(Tracker):
     
-    def __init__(self, info_channel: TextChannel, bot_user: ClientUser) -> None:
-        super().__init__(info_channel, bot_user)
+    def __init__(self, info_channel: Optional[TextChannel], bot_user: ClientUser,
+                 heartbeat_interval: float=300.0) -> None:
+        super().__init__(info_channel, bot_user, heartbeat_interval)
         self.embed_color: int = embed_color.HQGROUP_INFO_COLOR
         self.embed_field_tytle: str = ":busts_in_silhouette: ToonHQグループ情報"
+        self.board_name: str = "hqgroup"
         self.url: str = "https://toonhq.org/groups/"
 
         self.group_list: list
-        self.allow_group_list: list = [3, 5, 6, 7, 8, 9, 46,]
+        self.allow_group_list: set = {3, 5, 6, 7, 8, 9, 46,}
+        # The groups page is the largest upstream payload.
+        self.fetch_deadline: float = 9.0
 
     
-    def load_information(self) -> None:
-        pr_soup = self.load_data_scraping(url=self.url, tag="script")
-        dict_string = re.search(r"window.STATE.*;", pr_soup[2].text).group()
-        replace_list = [
-            ("window.STATE = ", ""),
-            ("true", "True"),
-            ("false", "False"),
-            ("null", "None"),
-        ]
-        for rep in replace_list:
-            dict_string = dict_string.replace(rep[0], rep[1])
-        info_dict = ast.literal_eval(dict_string[:-1])
-
-        def search_id(data_list: list, search_id_name: str, search_id: int, 
-                      return_id: Optional[str]=None) -> Any:
-            for info in data_list:
-                if info[search_id_name] == search_id:
-                    if return_id is not None:
-                        return info[return_id]
-                    else:
-                        return info
-
-        self.group_list = []
-
-        for g in info_dict["groups"]:
-            if g["type"] not in self.allow_group_list:
-                continue
-            # District
-            district_name = search_id(data_list=info_dict["districts"], search_id_name="id",
-                                      search_id=g["district"], return_id="name")
-            # Location
-            location_name = search_id(data_list=info_dict["locations"], search_id_name="id",
-                                      search_id=g["location"], return_id="name")
-            # Group name
-            # Main Group name
-            main_group_name = search_id(data_list=info_dict["group_types"], search_id_name="id",
-                                        search_id=g["type"], return_id="name")
-            # Optional
-            optionals = []
-            for key, value in g["options"].items():
-                option_list = search_id(data_list=info_dict["group_types"], search_id_name="id", search_id=g["type"], return_id="options")
-                value_list = search_id(data_list=option_list, search_id_name="id", search_id=int(key), return_id="values")
-                optional_name = search_id(data_list=value_list, search_id_name="id", search_id=value, return_id="name")
-                optionals.append(optional_name)
-            optionals.append(main_group_name)
-            
-            if g["type"] == 6:  # DA Office
-                optionals.reverse()
-            
-            group_name = " ".join(optionals)
-
-            max_players = g["max_players"]
-            now_players = sum([member["num_players"] for member in g["members"] if member["left"] is None])
-            
-            self.group_list.append({
-                "district": district_name,
-                "location": location_name,
-                "name": group_name,
-                "max_players": max_players,
-                "now_players": now_players,
-            })
+    async def load_information(self) -> None:
+        html_object = await self.load_data_raw(url=self.url)
+        self.group_list = await self.parse_offloader.run(parse_toonhq_groups, html_object, self.allow_group_list)
+
+
+    def get_normalized_payload(self) -> Any:
+        return self.group_list
+
+
+    def get_snapshot(self) -> Any:
+        return self.group_list
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        self.group_list = [{key: group[key] for key in ("district", "location", "name", "max_players", "now_players")}
+                           for group in model]
 
     
     def make_info_strings(self) -> List[Dict[str, str]]:
@@ -483,8 +1100,8 @@ class HQGroupTracker(Tracker):
                 status = ":green_circle:"
             group_name = f"**{status} {group['name']}**"
 
-            info_string = f"ロビー ： **{group['district']}**\n" + \
-                          f"場所 ： **{group['location']}**\n" + \
+            info_string = f"ロビー ： **{group['district']}**\n" \
+                          f"場所 ： **{group['location']}**\n" \
                           f"人数 ： **{group['now_players']} / {group['max_players']}**\n\n"
 
             info_string_list.append({
@@ -0,0 +1,129 @@
+"""
+Population stats
+=====
+author: Snow Rabbit
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import discord
+from discord.embeds import Embed
+from discord.message import Message
+
+from . import embed_color
+from .util.formatting import format_jst
+from .util.outbound_queue import OutboundQueue, shared_outbound_queue
+from .util.population_history import PopulationHistory, shared_population_history
+
+
+class PopulationStatsListner:
+
+    def __init__(self) -> None:
+        self.reporter = PopulationStatsReporter()
+
+
+    async def listen_command(self, message: Message) -> None:
+        words = message.content.split(" ", 1)
+        if words[0].lower() == "/population":
+            district = words[1].strip() if len(words) > 1 else None
+            await self.reporter.report(message, district=district)
+
+
+class PopulationStatsReporter:
+    """
+    PopulationStatsReporter
+    ----------
+
+    Answers `/population [district]` from the population history.
+    Every query reads the ring buffers and the hour-of-day rollups,
+    so no upstream request is made.
+
+    Attributes:
+        history (:class:`PopulationHistory`):
+            History filled by the district and invasion trackers.
+        peak_hour_num (:class:`int`):
+            Number of busiest hours to show.
+    """
+
+    def __init__(self, peak_hour_num: int=3) -> None:
+        self.history: PopulationHistory = shared_population_history
+        self.outbound_queue: OutboundQueue = shared_outbound_queue
+        self.embed_color: int = embed_color.DISTRICT_INFO_COLOR
+        self.peak_hour_num: int = peak_hour_num
+
+
+    async def report(self, message: Message, district: Optional[str]=None) -> None:
+        if district is None:
+            key, title = self.history.TOTAL_KEY, "総プレイ人口"
+        else:
+            key = self.find_district_key(district)
+            if key is None:
+                info_string = f"ロビー「{district}」の記録はありません。:no_good:"
+                info_message = await self.outbound_queue.send(message.channel, info_string)
+                await info_message.delete(delay=30)
+                return
+            title = key
+
+        stats_embed = self.make_embed(key, title)
+        await self.outbound_queue.send(message.channel, embed=stats_embed)
+
+
+    def find_district_key(self, district: str) -> Optional[str]:
+        normalized = district.replace(" ", "").lower()
+        for key in self.history.get_keys():
+            if key.replace(" ", "").lower() == normalized:
+                return key
+        return None
+
+
+    def make_embed(self, key: str, title: str) -> Embed:
+        stats_embed = discord.Embed(title="**Population Statistics**", color=self.embed_color)
+        for info_string in self.make_info_strings(key, title):
+            stats_embed.add_field(name=info_string["name"], value=info_string["value"], inline=False)
+
+        return stats_embed
+
+
+    def make_info_strings(self, key: str, title: str) -> List[Dict[str, str]]:
+        now = time.time()
+        latest = self.history.get_latest(key, now)
+        if latest is None:
+            return [{"name": f":bar_chart: {title}", "value": "まだ記録がありません。"}]
+
+        info_string = f"現在：**{latest[1]}人**\n"
+
+        hour_ago = self.history.get_average(key, now - 3900, now - 3300)
+        if hour_ago is not None:
+            info_string += f"1時間前との差：**{latest[1] - round(hour_ago):+d}人**\n"
+
+        peak = self.history.get_peak(key, 24 * 3600, now)
+        if peak is not None:
+            info_string += f"24時間の最大：**{peak[1]}人**（{self.convert_epochtime_to_timestr(peak[0])}）\n"
+
+        week_peak = self.history.get_peak(key, 7 * 24 * 3600, now)
+        if week_peak is not None:
+            info_string += f"7日間の最大：**{week_peak[1]}人**\n"
+
+        info_string_list = [{"name": f":bar_chart: {title}", "value": info_string}]
+
+        peak_hour_string = self.make_peak_hour_string(key)
+        if peak_hour_string:
+            info_string_list.append({"name": ":clock3: 混雑する時間帯（日本時間）", "value": peak_hour_string})
+
+        if key != self.history.TOTAL_KEY:
+            invasion_num = self.history.invasion_log.count_starts(now - 24 * 3600, district=key)
+            info_string_list.append({"name": ":gear: 過去24時間のコグの侵略", "value": f"**{invasion_num}回**"})
+
+        return info_string_list
+
+
+    def make_peak_hour_string(self, key: str) -> str:
+        averages = self.history.hourly.get_averages(key)
+        hours = sorted((hour for hour in range(24) if averages[hour] is not None),
+                       key=lambda hour: averages[hour], reverse=True)
+        return "".join(f"{hour}時台：平均**{round(averages[hour])}人**\n" for hour in hours[:self.peak_hour_num])
+
+
+    def convert_epochtime_to_timestr(self, epochtime: float) -> str:
+        return format_jst("%m/%d %H:%M", epochtime)
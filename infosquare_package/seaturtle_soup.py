@@ -14,6 +14,7 @@ from discord.reaction import Reaction
 from discord.user import ClientUser
 
 from . import embed_color
+from .util.outbound_queue import shared_outbound_queue
 
 
 class SeaTurtleSoupListner:
@@ -66,6 +67,7 @@ class SeaTurtleSoupSupporter:
     def __init__(self, bot_user: ClientUser) -> None:
         self.bot_user = bot_user
         self.embed_color = embed_color.SEATURTLESOUP_COLOR
+        self.outbound_queue = shared_outbound_queue
         self.master = {"id": None, "name": ""}
         self.is_playing = False
         self.menu_message = None
@@ -97,7 +99,7 @@ class SeaTurtleSoupSupporter:
         menu_embed = discord.Embed(title="**ウミガメのスープ**", color=self.embed_color)
         menu_embed = menu_embed.add_field(name="ゲーム開始", value=info_string)
 
-        self.menu_message = await message.channel.send(embed=menu_embed)
+        self.menu_message = await self.outbound_queue.send(message.channel, embed=menu_embed)
         #await self.menu_message.add_reaction("👋")  # TODO: Break the game from reaction buttons.
 
 
@@ -117,16 +119,16 @@ class SeaTurtleSoupSupporter:
             return
         
         self.questions[message.id] = message
-        await message.add_reaction("⭕")
-        await message.add_reaction("❌")
-        await message.add_reaction("🤨")
+        await self.outbound_queue.add_reaction(message, "⭕")
+        await self.outbound_queue.add_reaction(message, "❌")
+        await self.outbound_queue.add_reaction(message, "🤨")
 
     
     async def respond(self, reaction: Reaction) -> None:
         reaction_list = ["⭕", "❌", "🤨"]
         for r in reaction_list:
             if str(r) != str(reaction):
-                await reaction.message.remove_reaction(r, self.bot_user)
+                await self.outbound_queue.remove_reaction(reaction.message, r, self.bot_user)
 
         del self.questions[reaction.message.id]
 
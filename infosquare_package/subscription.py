@@ -0,0 +1,141 @@
+"""
+Subscription
+=====
+author: Snow Rabbit
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+import discord
+from discord.channel import TextChannel
+from discord.message import Message
+
+from .info_tracker import Tracker
+from .util.board_store import BoardStore, shared_board_store
+from .util.outbound_queue import OutboundQueue, shared_outbound_queue
+
+
+class SubscriptionListner:
+
+    def __init__(self, trackers: Dict[str, Tracker]) -> None:
+        self.manager = SubscriptionManager(trackers)
+
+
+    async def listen_command(self, message: Message) -> None:
+        words = message.content.split()
+        if not words:
+            return
+
+        command = words[0].lower()
+        if command in ["/subscribe", "/unsubscribe"]:
+            board_name = words[1].lower() if len(words) > 1 else None
+            await self.manager.handle_command(message, board_name, is_subscribe=command == "/subscribe")
+
+
+class SubscriptionManager:
+    """
+    SubscriptionManager
+    ----------
+
+    Maps channels of any server to the information boards.
+    The trackers keep fetching and rendering each board once, and the same
+    embed is published to every subscribed channel, so the upstream cost
+    does not depend on the number of subscribers.
+
+    Attributes:
+        trackers (:class:`Dict[str, Tracker]`):
+            Trackers keyed by board name.
+        board_store (:class:`BoardStore`):
+            Store of the subscriptions and of the message id in each channel.
+    """
+
+    def __init__(self, trackers: Dict[str, Tracker]) -> None:
+        self.trackers: Dict[str, Tracker] = trackers
+        self.board_store: BoardStore = shared_board_store
+        self.outbound_queue: OutboundQueue = shared_outbound_queue
+
+
+    def restore_subscriptions(self, get_channel: Callable[[int], Any]) -> None:
+        # Called once the client is ready, so the stored channel ids can be resolved.
+        for board_name, tracker in self.trackers.items():
+            for channel_id in self.board_store.get_subscriptions(board_name):
+                channel = get_channel(channel_id)
+                if isinstance(channel, TextChannel):
+                    tracker.add_channel(channel)
+                else:
+                    # The channel has been deleted or the bot has left its server, so it would never be resolved.
+                    print(f"WARNING: The channel {channel_id} subscribed to '{board_name}' is not found, "
+                          f"so its subscription has been removed.")
+                    self.board_store.remove_subscription(board_name, channel_id)
+
+
+    async def handle_command(self, message: Message, board_name: Optional[str], is_subscribe: bool) -> None:
+        if not isinstance(message.channel, TextChannel):
+            await self.reply(message, "この機能はサーバーのテキストチャンネルでのみ利用できます。:no_good:")
+            return
+
+        if not message.channel.permissions_for(message.author).manage_channels:
+            await self.reply(message, "チャンネルの管理権限を持つメンバーのみ利用できます。:no_good:")
+            return
+
+        if board_name not in self.trackers:
+            board_names = " / ".join(self.trackers)
+            await self.reply(message, f"ボード名を指定してください。\n`/subscribe ボード名` ({board_names})")
+            return
+
+        home_channel = self.trackers[board_name].info_channel
+        if home_channel is not None and home_channel.id == message.channel.id:
+            await self.reply(message, f"このチャンネルは`{board_name}`の表示用チャンネルです。")
+            return
+
+        if is_subscribe:
+            await self.subscribe(message, board_name)
+        else:
+            await self.unsubscribe(message, board_name)
+
+
+    async def subscribe(self, message: Message, board_name: str) -> None:
+        tracker = self.trackers[board_name]
+        channel = message.channel
+        if not self.board_store.add_subscription(board_name, channel.id):
+            await self.reply(message, f"このチャンネルは既に`{board_name}`を購読しています。")
+            return
+
+        await self.reply(message, f"このチャンネルで`{board_name}`の表示を開始します。")
+
+        # Show the current board right away instead of waiting for the next change.
+        # The lock keeps a publish running at the same time from posting the board a second time.
+        async with tracker.get_publish_lock():
+            tracker.add_channel(channel)
+            if tracker.published_embeds:
+                try:
+                    await tracker.publish_to(channel, tracker.published_embeds)
+                except discord.Forbidden:
+                    print(f"WARNING: Not allowed to publish '{board_name}' to channel {channel.id}, "
+                          f"so its subscription has been removed.")
+                    tracker.drop_subscription(channel.id)
+                except discord.HTTPException as e:
+                    print(f"WARNING: Could not publish '{board_name}' to channel {channel.id}. ({e})")
+
+
+    async def unsubscribe(self, message: Message, board_name: str) -> None:
+        tracker = self.trackers[board_name]
+        channel = message.channel
+        if not self.board_store.remove_subscription(board_name, channel.id):
+            await self.reply(message, f"このチャンネルは`{board_name}`を購読していません。")
+            return
+
+        async with tracker.get_publish_lock():
+            info_messages = tracker.info_messages.get(channel.id, [])
+            tracker.remove_channel(channel.id)
+        for info_message in info_messages:
+            try:
+                await self.outbound_queue.delete(info_message)
+            except discord.HTTPException:
+                pass
+        await self.reply(message, f"このチャンネルでの`{board_name}`の表示を終了しました。")
+
+
+    async def reply(self, message: Message, info_string: str) -> None:
+        info_message = await self.outbound_queue.send(message.channel, info_string)
+        await self.outbound_queue.delete(info_message, delay=30)
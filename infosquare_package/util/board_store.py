@@ -0,0 +1,95 @@
+import json
+import os
+from typing import Any, Dict, List
+
+
+class BoardStore:
+    """
+    BoardStore
+    ----------
+
+    Small JSON file recording which message displays each board,
+    so that a tracker can reattach to its message after a restart,
+    and which channels have subscribed to each board.
+
+    The file maps "boards" -> board name -> channel id -> message ids of the pages,
+    and "subscriptions" -> board name -> list of channel ids.
+
+    Attributes:
+        path (:class:`str`):
+            Path of the JSON file.
+        boards (:class:`Dict[str, Dict[str, List[int]]]`):
+            Message ids of the pages by channel id, keyed by board name.
+        subscriptions (:class:`Dict[str, List[int]]`):
+            Subscribed channel ids, keyed by board name.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        data = self.load()
+        if "boards" not in data:
+            # Files written before subscriptions only held the message ids.
+            data = {"boards": data, "subscriptions": {}}
+        self.boards: Dict[str, Dict[str, List[int]]] = data["boards"]
+        self.subscriptions: Dict[str, List[int]] = data.get("subscriptions", {})
+
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    def save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a broken store behind.
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"boards": self.boards, "subscriptions": self.subscriptions}, f)
+        os.replace(tmp_path, self.path)
+
+
+    def get_message_ids(self, board_name: str, channel_id: int) -> List[int]:
+        message_ids = self.boards.get(board_name, {}).get(str(channel_id), [])
+        # Boards written before pagination held a single message id.
+        return [message_ids] if isinstance(message_ids, int) else list(message_ids)
+
+
+    def set_message_ids(self, board_name: str, channel_id: int, message_ids: List[int]) -> None:
+        if self.get_message_ids(board_name, channel_id) == message_ids:
+            return
+        self.boards.setdefault(board_name, {})[str(channel_id)] = list(message_ids)
+        self.save()
+
+
+    def remove_message_ids(self, board_name: str, channel_id: int) -> None:
+        if self.boards.get(board_name, {}).pop(str(channel_id), None) is not None:
+            self.save()
+
+
+    def get_subscriptions(self, board_name: str) -> List[int]:
+        return list(self.subscriptions.get(board_name, []))
+
+
+    def add_subscription(self, board_name: str, channel_id: int) -> bool:
+        channel_ids = self.subscriptions.setdefault(board_name, [])
+        if channel_id in channel_ids:
+            return False
+        channel_ids.append(channel_id)
+        self.save()
+        return True
+
+
+    def remove_subscription(self, board_name: str, channel_id: int) -> bool:
+        channel_ids = self.subscriptions.get(board_name, [])
+        if channel_id not in channel_ids:
+            return False
+        channel_ids.remove(channel_id)
+        self.boards.get(board_name, {}).pop(str(channel_id), None)
+        self.save()
+        return True
+
+
+# The store shared by all trackers in the bot.
+shared_board_store = BoardStore(path=os.environ.get("BOARD_STORE_PATH", "board_messages.json"))
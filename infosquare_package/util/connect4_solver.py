@@ -0,0 +1,397 @@
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+
+# Board geometry. Each column takes HEIGHT + 1 bits, the extra bit on top
+# keeps the shifts of the alignment checks from wrapping into the next column.
+WIDTH = 7
+HEIGHT = 6
+H1 = HEIGHT + 1
+CELL_NUM = WIDTH * HEIGHT
+
+# Scores follow connect4.gamesolver.org: positive when the player to move wins,
+# 22 minus the number of stones the winner has played, 0 for a draw.
+MIN_SCORE = -CELL_NUM // 2 + 3
+MAX_SCORE = (CELL_NUM + 1) // 2 - 3
+INVALID_SCORE = 100
+
+# Central columns take part in more alignments, so they are searched first.
+COLUMN_ORDER = [WIDTH // 2 + (1 - 2 * (i % 2)) * (i + 1) // 2 for i in range(WIDTH)]
+
+# Nodes searched between two checks of the budget and the deadline.
+CHECK_INTERVAL = 4096
+
+BOTTOM_MASK = sum(1 << (column * H1) for column in range(WIDTH))
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+
+
+def get_top_mask(column: int) -> int:
+    return (1 << (HEIGHT - 1)) << (column * H1)
+
+
+def get_bottom_mask(column: int) -> int:
+    return 1 << (column * H1)
+
+
+def get_column_mask(column: int) -> int:
+    return ((1 << HEIGHT) - 1) << (column * H1)
+
+
+TOP_MASKS = [get_top_mask(column) for column in range(WIDTH)]
+BOTTOM_MASKS = [get_bottom_mask(column) for column in range(WIDTH)]
+COLUMN_MASKS = [get_column_mask(column) for column in range(WIDTH)]
+ORDERED_COLUMN_MASKS = [COLUMN_MASKS[column] for column in COLUMN_ORDER]
+
+
+def compute_winning_position(position: int, mask: int) -> int:
+    # Empty cells that would complete an alignment of four for the stones in `position`.
+    # Unrolled, since it runs several times for every searched position.
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+
+    # Horizontal
+    p = (position << 7) & (position << 14)
+    r |= p & (position << 21)
+    r |= p & (position >> 7)
+    p = (position >> 7) & (position >> 14)
+    r |= p & (position << 7)
+    r |= p & (position >> 21)
+
+    # Diagonal (/)
+    p = (position << 8) & (position << 16)
+    r |= p & (position << 24)
+    r |= p & (position >> 8)
+    p = (position >> 8) & (position >> 16)
+    r |= p & (position << 8)
+    r |= p & (position >> 24)
+
+    # Diagonal (\)
+    p = (position << 6) & (position << 12)
+    r |= p & (position << 18)
+    r |= p & (position >> 6)
+    p = (position >> 6) & (position >> 12)
+    r |= p & (position << 6)
+    r |= p & (position >> 18)
+
+    return r & (BOARD_MASK ^ mask)
+
+
+def popcount(bitboard: int) -> int:
+    return bin(bitboard).count("1")
+
+
+def parse_history(history: str) -> Tuple[int, int, int]:
+    """
+    Returns (stones of the player to move, stones of both players, number of moves)
+    for a history of 1-indexed columns such as "4453".
+    Raises ValueError for a column that is out of range or full, and for a history
+    that continues after a win.
+    """
+    position, mask, moves = 0, 0, 0
+    for char in history:
+        if not ("1" <= char <= str(WIDTH)):
+            raise ValueError(f"Invalid column '{char}' in the history '{history}'.")
+        column = int(char) - 1
+        if mask & TOP_MASKS[column]:
+            raise ValueError(f"The column {column + 1} is full in the history '{history}'.")
+        move = (mask + BOTTOM_MASKS[column]) & COLUMN_MASKS[column]
+        if compute_winning_position(position, mask) & move:
+            raise ValueError(f"The game is already over in the history '{history}'.")
+        position ^= mask
+        mask |= move
+        moves += 1
+
+    return position, mask, moves
+
+
+def get_next_histories(history: str) -> List[str]:
+    # Histories after every move that leaves the game going, central columns first.
+    position, mask, moves = parse_history(history)
+    if moves + 1 >= CELL_NUM:
+        return []
+
+    own_win = compute_winning_position(position, mask)
+    next_histories = []
+    for column in COLUMN_ORDER:
+        move = (mask + BOTTOM_MASKS[column]) & COLUMN_MASKS[column]
+        if not mask & TOP_MASKS[column] and not own_win & move:
+            next_histories.append(history + str(column + 1))
+
+    return next_histories
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchBudgetExceeded(Exception):
+
+    def __init__(self, min_score: int=-CELL_NUM, max_score: int=CELL_NUM) -> None:
+        super().__init__(min_score, max_score)
+        # Bounds of the score proven before the budget ran out.
+        self.min_score: int = min_score
+        self.max_score: int = max_score
+
+
+class TranspositionTable:
+    """
+    TranspositionTable
+    ----------
+
+    Fixed-size hash table of upper bounds of position scores.
+    A newer entry simply overwrites an older one at the same index,
+    so the memory used never grows with the number of searched positions.
+
+    Attributes:
+        size (:class:`int`):
+            Number of entries. A prime, so that keys spread evenly.
+        keys (:class:`array`):
+            Position key stored at each index.
+        values (:class:`array`):
+            Stored value, or 0 for an empty entry.
+    """
+
+    def __init__(self, size: int=1048573) -> None:
+        self.size: int = size
+        self.keys: array = array("Q", [0]) * size
+        self.values: array = array("b", [0]) * size
+
+
+    def get(self, key: int) -> int:
+        index = key % self.size
+        return self.values[index] if self.keys[index] == key else 0
+
+
+    def put(self, key: int, value: int) -> None:
+        index = key % self.size
+        self.keys[index] = key
+        self.values[index] = value
+
+
+    def reset(self) -> None:
+        self.keys = array("Q", [0]) * self.size
+        self.values = array("b", [0]) * self.size
+
+
+class Connect4Solver:
+    """
+    Connect4Solver
+    ----------
+
+    Perfect Connect 4 solver on 7x6 bitboards: negamax with alpha-beta pruning,
+    null-window search, moves ordered by the threats they create, and a
+    fixed-size transposition table.
+    Returns the same per-column score vector as connect4.gamesolver.org.
+
+    Attributes:
+        node_budget (:class:`int`):
+            Maximum number of positions searched for one score vector.
+            Columns left unsolved when it runs out get `fallback_score`.
+        fallback_score (:class:`int`):
+            Score of a column that could not be solved within the budget.
+        node_count (:class:`int`):
+            Number of positions searched for the last score vector.
+        is_exact (:class:`bool`):
+            Whether every column of the last score vector was solved within the budget
+            and without reaching the search horizon.
+        table (:class:`TranspositionTable`):
+            Bounds shared by all searches of the solver.
+    """
+
+    def __init__(self, node_budget: int=200000, fallback_score: int=0, table_size: int=1048573) -> None:
+        self.node_budget: int = node_budget
+        self.fallback_score: int = fallback_score
+        self.node_count: int = 0
+        self.node_limit: int = 0
+        self.column_limit: int = 0
+        self.deadline: Optional[float] = None
+        self.horizon: int = CELL_NUM
+        self.horizon_hits: int = 0
+        self.is_exact: bool = True
+        self.table: TranspositionTable = TranspositionTable(table_size)
+
+
+    def get_scores(self, history: str, max_depth: Optional[int]=None, deadline: Optional[float]=None) -> List[int]:
+        """
+        Returns the score of every column for the player to move.
+        With `max_depth`, positions that many moves ahead are scored 0 (unknown)
+        and the result is not exact. With `deadline` (time.monotonic()),
+        SearchTimeout is raised when the search is still running at that time.
+        """
+        position, mask, moves = parse_history(history)
+        self.node_count = 0
+        self.is_exact = True
+        self.horizon = CELL_NUM if max_depth is None else moves + max_depth
+        self.horizon_hits = 0
+        self.deadline = deadline
+
+        scores: List[Optional[int]] = [None] * WIDTH
+        own_win = compute_winning_position(position, mask)
+        pending = []
+        for column in COLUMN_ORDER:
+            if mask & TOP_MASKS[column]:
+                scores[column] = INVALID_SCORE
+                continue
+
+            move = (mask + BOTTOM_MASKS[column]) & COLUMN_MASKS[column]
+            if own_win & move:
+                scores[column] = (CELL_NUM + 1 - moves) // 2
+            else:
+                pending.append((column, move))
+
+        for i, (column, move) in enumerate(pending):
+            # What is left of the budget is shared by the columns still to solve.
+            self.column_limit = self.node_count + (self.node_budget - self.node_count) // (len(pending) - i)
+            self.node_limit = self.node_count
+            try:
+                scores[column] = -self.solve(position ^ mask, mask | move, moves + 1)
+            except SearchBudgetExceeded as e:
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    raise SearchTimeout() from None
+                # The fallback is kept within the bounds proven so far.
+                self.node_count = self.column_limit
+                self.is_exact = False
+                scores[column] = -min(max(-self.fallback_score, e.min_score), e.max_score)
+
+        if self.horizon_hits:
+            self.is_exact = False
+        return scores
+
+
+    def check_limits(self) -> None:
+        # Called every CHECK_INTERVAL nodes, so the search loop only compares two integers.
+        if self.node_count > self.column_limit or \
+                self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchBudgetExceeded()
+        self.node_limit = min(self.node_count + CHECK_INTERVAL, self.column_limit)
+
+
+    def solve(self, position: int, mask: int, moves: int) -> int:
+        if compute_winning_position(position, mask) & ((mask + BOTTOM_MASK) & BOARD_MASK):
+            return (CELL_NUM + 1 - moves) // 2
+
+        # Narrow the score window with null-window searches, starting near 0 to prune the most.
+        min_score = -((CELL_NUM - moves) // 2)
+        max_score = (CELL_NUM + 1 - moves) // 2
+        while min_score < max_score:
+            med = min_score + (max_score - min_score) // 2
+            if med <= 0 and int(min_score / 2) < med:
+                med = int(min_score / 2)
+            elif med >= 0 and int(max_score / 2) > med:
+                med = int(max_score / 2)
+            try:
+                score = self.negamax(position, mask, moves, med, med + 1)
+            except SearchBudgetExceeded:
+                raise SearchBudgetExceeded(min_score, max_score)
+            if score <= med:
+                max_score = score
+            else:
+                min_score = score
+
+        return min_score
+
+
+    def negamax(self, position: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+        # The player to move cannot win with the next stone; callers check it first.
+        self.node_count += 1
+        if self.node_count > self.node_limit:
+            self.check_limits()
+
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent_win = compute_winning_position(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                # Two threats cannot both be blocked.
+                return -((CELL_NUM - moves) // 2)
+            possible = forced
+        non_losing = possible & ~(opponent_win >> 1)
+        if not non_losing:
+            return -((CELL_NUM - moves) // 2)
+
+        if moves >= CELL_NUM - 2:
+            return 0
+
+        if moves >= self.horizon:
+            self.horizon_hits += 1
+            return 0
+
+        min_score = -((CELL_NUM - 2 - moves) // 2)
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+
+        max_score = (CELL_NUM - 1 - moves) // 2
+        key = position + mask
+        table = self.table
+        index = key % table.size
+        if table.keys[index] == key:
+            max_score = table.values[index] + MIN_SCORE - 1
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        # Moves that create the most threats first, then the central ones.
+        candidates = []
+        for order, column_mask in enumerate(ORDERED_COLUMN_MASKS):
+            move = non_losing & column_mask
+            if move:
+                threats = bin(compute_winning_position(position | move, mask)).count("1")
+                candidates.append((threats, -order, move))
+        candidates.sort(reverse=True)
+
+        horizon_hits = self.horizon_hits
+        next_position = position ^ mask
+        next_moves = moves + 1
+        for _, _, move in candidates:
+            score = -self.negamax(next_position, mask | move, next_moves, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        # A bound is only stored when no position under it was cut off by the horizon.
+        if self.horizon_hits == horizon_hits:
+            table.keys[index] = key
+            table.values[index] = alpha - MIN_SCORE + 1
+        return alpha
+
+
+# Solver of each worker process, kept between searches so its table is reused.
+worker_solver: Optional[Connect4Solver] = None
+
+
+def search_scores(history: str, time_budget: float) -> Tuple[List[int], int, bool]:
+    """
+    Iterative deepening for a worker process: searches deeper and deeper until the
+    position is solved or `time_budget` seconds have passed, and returns the scores
+    of the deepest finished search, the depth of that search, and whether it is exact.
+    """
+    global worker_solver
+    if worker_solver is None:
+        # Time is the budget here, so the node budget never runs out first.
+        worker_solver = Connect4Solver(node_budget=1 << 62)
+
+    deadline = time.monotonic() + time_budget
+    remaining = CELL_NUM - len(history)
+    # The shallowest search only looks for immediate wins and losses, and always finishes.
+    depth, last_seconds = 1, 0.0
+    scores = worker_solver.get_scores(history, max_depth=depth)
+    while not worker_solver.is_exact:
+        started_at = time.monotonic()
+        # A search two moves deeper costs about three times the last one. When that does not fit,
+        # the rest of the time goes to a full search, which often costs less than a deep limited one.
+        next_depth = depth + 2
+        if next_depth >= remaining or started_at + 3 * last_seconds > deadline:
+            next_depth = remaining
+        try:
+            next_scores = worker_solver.get_scores(history, max_depth=None if next_depth >= remaining else next_depth,
+                                                   deadline=deadline)
+        except SearchTimeout:
+            return scores, depth, False
+        scores, depth, last_seconds = next_scores, next_depth, time.monotonic() - started_at
+
+    return scores, depth, True
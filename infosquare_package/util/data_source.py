@@ -0,0 +1,282 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .metrics import shared_metrics
+from .web_stream import get_host
+
+
+Loader = Callable[[str], Awaitable[Any]]
+# Returns whether a loaded payload is usable.
+Validator = Callable[[Any], bool]
+
+CIRCUIT_OPENINGS = shared_metrics.counter(
+    "infosquare_circuit_openings_total", "Times the circuit of an upstream host opened.", ["host"])
+STALE_PAYLOADS = shared_metrics.counter(
+    "infosquare_stale_payloads_total", "Stale payloads served instead of failing.", ["url"])
+
+
+class InvalidPayloadError(ValueError):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class StalePayloadError(Exception):
+
+    def __init__(self, url: str, error: Exception) -> None:
+        super().__init__(f"The last good payload of {url} was served. ({type(error).__name__}: {error})")
+        self.url: str = url
+        self.error: Exception = error
+        # Passed on, so that a poller backing off honours the Retry-After of the upstream.
+        self.status: Optional[int] = getattr(error, "status", None)
+        self.headers: Any = getattr(error, "headers", None)
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker
+    ----------
+
+    Failure tracker of a single upstream host.
+    The circuit opens after `failure_threshold` consecutive failures, and no
+    request is made while it is open. Once `reset_timeout` has passed, a single
+    probe request is let through (half-open): a success closes the circuit and
+    a failure opens it again with a doubled timeout.
+
+    Attributes:
+        host (:class:`str`):
+            Host the circuit protects.
+        failure_threshold (:class:`int`):
+            Consecutive failures after which the circuit opens.
+        reset_timeout (:class:`float`):
+            Seconds the circuit stays open before the first probe.
+        max_reset_timeout (:class:`float`):
+            Upper bound of the open duration after repeated failed probes.
+        failures (:class:`int`):
+            Consecutive failures so far.
+        opened_at (:class:`Optional[float]`):
+            Monotonic time the circuit opened, or :class:`None` while it is closed.
+        open_timeout (:class:`float`):
+            Seconds the current opening lasts.
+        is_probing (:class:`bool`):
+            Whether a half-open probe is running.
+    """
+
+    def __init__(self, host: str, failure_threshold: int=3, reset_timeout: float=30.0,
+                 max_reset_timeout: float=600.0) -> None:
+        self.host: str = host
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self.max_reset_timeout: float = max_reset_timeout
+        self.failures: int = 0
+        self.opened_at: Optional[float] = None
+        self.open_timeout: float = reset_timeout
+        self.is_probing: bool = False
+
+
+    def get_state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        elif self.is_probing or time.monotonic() - self.opened_at >= self.open_timeout:
+            return "half_open"
+        else:
+            return "open"
+
+
+    def allow_request(self) -> bool:
+        state = self.get_state()
+        if state == "closed":
+            return True
+        elif state == "half_open" and not self.is_probing:
+            self.is_probing = True
+            return True
+        else:
+            return False
+
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.open_timeout = self.reset_timeout
+        self.is_probing = False
+
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.is_probing:
+            # The probe failed, so stay away for longer.
+            self.open_timeout = min(self.max_reset_timeout, self.open_timeout * 2)
+        elif self.failures == self.failure_threshold:
+            print(f"WARNING: The circuit of {self.host} is opened after {self.failures} consecutive failures.")
+            CIRCUIT_OPENINGS.inc(host=self.host)
+        else:
+            return
+
+        self.opened_at = time.monotonic()
+        self.is_probing = False
+
+
+class DataSource:
+    """
+    DataSource
+    ----------
+
+    Cached payload of a single upstream URL.
+    The last good payload is kept after it expires, so it can be served
+    while the upstream is failing.
+
+    Attributes:
+        url (:class:`str`):
+            Upstream URL of the payload.
+        ttl (:class:`float`):
+            Seconds the payload is treated as fresh.
+        payload (:class:`Any`):
+            The last payload loaded successfully.
+            It is set to :class:`None` until the first load finishes.
+        fetched_at (:class:`Optional[float]`):
+            Monotonic time when `payload` was loaded.
+        in_flight (:class:`Optional[asyncio.Task]`):
+            The running load shared by every concurrent caller.
+        last_error (:class:`Optional[Exception]`):
+            Error of the last load, or :class:`None` if it succeeded.
+    """
+
+    def __init__(self, url: str, ttl: float) -> None:
+        self.url: str = url
+        self.ttl: float = ttl
+        self.payload: Any = None
+        self.fetched_at: Optional[float] = None
+        self.in_flight: Optional[asyncio.Task] = None
+        self.last_error: Optional[Exception] = None
+
+
+    def is_fresh(self, max_age: Optional[float]=None) -> bool:
+        # A caller polling less often than the source may accept an older payload than `ttl`.
+        ttl = self.ttl if max_age is None else max(self.ttl, max_age)
+        return self.fetched_at is not None and time.monotonic() - self.fetched_at < ttl
+
+
+class DataSourceRegistry:
+    """
+    DataSourceRegistry
+    ----------
+
+    Registry of upstream data sources shared by the trackers.
+    Each URL is loaded at most once per freshness window, and callers arriving
+    while a load is running wait on that same load instead of starting another.
+
+    Requests go through a circuit breaker per host. While a host is failing
+    or its circuit is open, the last good payload is served for up to
+    `max_stale` seconds (stale-while-revalidate), so callers keep working
+    and the struggling upstream is not hit on every poll. Callers learn
+    that they have been served a stale payload through `get_stale_error`.
+
+    Attributes:
+        default_ttl (:class:`float`):
+            Freshness window in seconds used when `get` is not given one.
+        max_stale (:class:`float`):
+            Seconds after which a stale payload is no longer served.
+        sources (:class:`Dict[str, DataSource]`):
+            Registered sources keyed by URL.
+        breakers (:class:`Dict[str, CircuitBreaker]`):
+            Circuit breakers keyed by host.
+    """
+
+    def __init__(self, default_ttl: float=5.0, max_stale: float=3600.0) -> None:
+        self.default_ttl: float = default_ttl
+        self.max_stale: float = max_stale
+        self.sources: Dict[str, DataSource] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+
+    async def get(self, url: str, loader: Loader, ttl: Optional[float]=None,
+                  validator: Optional[Validator]=None, max_age: Optional[float]=None) -> Any:
+        source = self.sources.get(url)
+        if source is None:
+            source = DataSource(url=url, ttl=self.default_ttl if ttl is None else ttl)
+            self.sources[url] = source
+
+        if source.is_fresh(max_age):
+            return source.payload
+
+        if source.in_flight is None:
+            breaker = self.get_breaker(url)
+            if not breaker.allow_request():
+                if self.has_stale_payload(source):
+                    STALE_PAYLOADS.inc(url=url)
+                    return source.payload
+                raise CircuitOpenError(f"The circuit of {breaker.host} is open.")
+
+            source.in_flight = asyncio.ensure_future(self.load(source, loader, breaker, validator))
+            # Retrieve the result even if every caller has been cancelled.
+            source.in_flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        try:
+            # A cancelled caller must not cancel the load the other callers are waiting on.
+            return await asyncio.shield(source.in_flight)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.has_stale_payload(source):
+                print(f"WARNING: Serving the last good payload of {url}. ({type(e).__name__}: {e})")
+                STALE_PAYLOADS.inc(url=url)
+                return source.payload
+            raise
+
+
+    async def load(self, source: DataSource, loader: Loader, breaker: CircuitBreaker,
+                   validator: Optional[Validator]=None) -> Any:
+        try:
+            payload = await loader(source.url)
+            if validator is not None and not validator(payload):
+                raise InvalidPayloadError(f"Unexpected payload from {source.url}")
+        except asyncio.CancelledError:
+            breaker.is_probing = False
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            source.last_error = e
+            raise
+        else:
+            breaker.record_success()
+            source.last_error = None
+            source.payload = payload
+            source.fetched_at = time.monotonic()
+            return payload
+        finally:
+            source.in_flight = None
+
+
+    def get_breaker(self, url: str) -> CircuitBreaker:
+        host = get_host(url)
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host=host)
+            self.breakers[host] = breaker
+
+        return breaker
+
+
+    def has_stale_payload(self, source: DataSource) -> bool:
+        return source.fetched_at is not None and time.monotonic() - source.fetched_at < self.max_stale
+
+
+    def get_fetched_at(self, url: str) -> Optional[float]:
+        source = self.sources.get(url)
+        return None if source is None else source.fetched_at
+
+
+    def get_stale_error(self, url: str, max_age: Optional[float]=None) -> Optional[StalePayloadError]:
+        # `get` does not fail while it serves a stale payload, so callers ask for the error behind it.
+        source = self.sources.get(url)
+        if source is None or source.last_error is None or source.is_fresh(max_age):
+            return None
+
+        return StalePayloadError(url, source.last_error)
+
+
+# The registry shared by all trackers in the bot.
+shared_data_sources = DataSourceRegistry()
@@ -1,3 +1,5 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
 import firebase_admin
 from firebase_admin import credentials, firestore
 
@@ -12,15 +14,76 @@ AESCipher().dectypt_file(
     dec_filepath=snippet_path
 )
 
+# A write batch holds at most 500 operations.
+MAX_BATCH_SIZE = 500
+
 cred = credentials.Certificate(snippet_path)
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
 
-def set_doc(collection_name: str, doc_dict: dict) -> None:
-    docs = db.collection(collection_name).document()
+def set_doc(collection_name: str, doc_dict: dict, doc_id: Optional[str]=None) -> None:
+    docs = db.collection(collection_name).document(doc_id)
     docs.set(doc_dict)
 
 
+def get_doc(collection_name: str, doc_id: str) -> Optional[dict]:
+    snapshot = db.collection(collection_name).document(doc_id).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
 def get_doc_list(collection_name: str) -> list:
     return [doc.to_dict() for doc in db.collection(collection_name).get()]
+
+
+def iterate_doc_list(collection_name: str, page_size: int=MAX_BATCH_SIZE) -> Iterator[dict]:
+    # Reads the collection one page at a time, so that its size never has to fit in memory.
+    query = db.collection(collection_name).order_by("__name__").limit(page_size)
+    last_snapshot = None
+    while True:
+        page_query = query if last_snapshot is None else query.start_after(last_snapshot)
+        snapshots = list(page_query.stream())
+        for snapshot in snapshots:
+            yield snapshot.to_dict()
+        if len(snapshots) < page_size:
+            return
+        last_snapshot = snapshots[-1]
+
+
+def set_doc_and_increment(collection_name: str, doc_dict: dict,
+                          counters: Dict[Tuple[str, str], Dict[str, int]]) -> None:
+    """
+    Adds a document and the values in `counters` ((collection, document id) -> field -> amount)
+    in one batch, so that the counters never miss or double count a document.
+    """
+    batch = db.batch()
+    batch.set(db.collection(collection_name).document(), doc_dict)
+    for (counter_collection, counter_id), increments in counters.items():
+        fields = {field: firestore.Increment(amount) for field, amount in increments.items()}
+        batch.set(db.collection(counter_collection).document(counter_id), fields, merge=True)
+    batch.commit()
+
+
+def set_doc_dict(collection_name: str, doc_dicts: Dict[str, dict]) -> None:
+    # Overwrites many documents by id, in as few batches as possible.
+    doc_items = list(doc_dicts.items())
+    for start in range(0, len(doc_items), MAX_BATCH_SIZE):
+        batch = db.batch()
+        for doc_id, doc_dict in doc_items[start:start + MAX_BATCH_SIZE]:
+            batch.set(db.collection(collection_name).document(doc_id), doc_dict)
+        batch.commit()
+
+
+def get_doc_ids(collection_name: str) -> List[str]:
+    # Only the references are listed, so no document is read.
+    return [doc_ref.id for doc_ref in db.collection(collection_name).list_documents()]
+
+
+def delete_doc_ids(collection_name: str, doc_ids: Iterable[str]) -> None:
+    # Deletes many documents by id, in as few batches as possible.
+    doc_ids = list(doc_ids)
+    for start in range(0, len(doc_ids), MAX_BATCH_SIZE):
+        batch = db.batch()
+        for doc_id in doc_ids[start:start + MAX_BATCH_SIZE]:
+            batch.delete(db.collection(collection_name).document(doc_id))
+        batch.commit()
@@ -0,0 +1,96 @@
+import os
+import re
+import urllib.parse
+from typing import Callable
+
+from .web_stream import AsyncWebSession
+
+
+def get_fixture_name(url: str) -> str:
+    # "https://toonhq.org/api/v1/invasion/" -> "toonhq_org_api_v1_invasion"
+    parts = urllib.parse.urlsplit(url)
+    return re.sub(r"[^0-9A-Za-z]+", "_", parts.netloc + parts.path).strip("_")
+
+
+class RecordingWebSession(AsyncWebSession):
+    """
+    RecordingWebSession
+    ----------
+
+    Web session that saves every raw upstream response to a fixture file
+    named after its URL, so it can be replayed by `ReplayWebSession`.
+
+    Attributes:
+        fixture_dir (:class:`str`):
+            Directory the fixtures are written to.
+    """
+
+    def __init__(self, fixture_dir: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.fixture_dir: str = fixture_dir
+
+
+    async def get_bytes(self, url: str) -> bytes:
+        body = await super().get_bytes(url)
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        with open(os.path.join(self.fixture_dir, get_fixture_name(url)), "wb") as f:
+            f.write(body)
+
+        return body
+
+
+    async def feed_chunks(self, url: str, feeder: Callable[[bytes], bool], chunk_size: int=8192) -> None:
+        # Streaming stops early, so the whole body is downloaded to record a complete fixture.
+        body = await self.get_bytes(url)
+        for start in range(0, len(body), chunk_size):
+            if feeder(body[start:start + chunk_size]):
+                break
+
+
+class ReplayWebSession(AsyncWebSession):
+    """
+    ReplayWebSession
+    ----------
+
+    Web session answering every request from the fixture recorded for its URL,
+    without any network access.
+
+    Attributes:
+        fixture_dir (:class:`str`):
+            Directory the fixtures are read from.
+        requests (:class:`int`):
+            Number of requests answered.
+    """
+
+    def __init__(self, fixture_dir: str) -> None:
+        super().__init__()
+        self.fixture_dir: str = fixture_dir
+        self.requests: int = 0
+        self.bodies: dict = {}
+
+
+    def get_fixture(self, url: str) -> bytes:
+        # Fixtures are kept in memory after the first read, so replays measure the trackers, not the disk.
+        name = get_fixture_name(url)
+        if name not in self.bodies:
+            with open(os.path.join(self.fixture_dir, name), "rb") as f:
+                self.bodies[name] = f.read()
+
+        return self.bodies[name]
+
+
+    async def get_bytes(self, url: str) -> bytes:
+        self.requests += 1
+        return self.get_fixture(url)
+
+
+    async def feed_chunks(self, url: str, feeder: Callable[[bytes], bool], chunk_size: int=8192) -> None:
+        self.requests += 1
+        body = self.get_fixture(url)
+        for start in range(0, len(body), chunk_size):
+            if feeder(body[start:start + chunk_size]):
+                break
+
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+from discord.embeds import Embed
+
+
+# Every time on the boards is shown in Japan Standard Time.
+JST = timezone(timedelta(hours=+9), "JST")
+
+# ASCII to fullwidth, with the space mapped to the ideographic space so that columns line up.
+FULLWIDTH_TABLE = str.maketrans({**{chr(0x0021 + i): chr(0xFF01 + i) for i in range(94)}, " ": "　"})
+
+NUMBER_EMOJI_TABLE = str.maketrans({
+    "1": ":one:", "2": ":two:", "3": ":three:",
+    "4": ":four:", "5": ":five:", "6": ":six:",
+    "7": ":seven:", "8": ":eight:", "9": ":nine:",
+    "0": ":zero:"
+})
+
+# District attributes shown on the district board.
+SPEEDCHAT_ONLY_DISTRICTS = frozenset(["Boingbury", "Gulp Gulch", "Whoosh Rapids"])
+NO_EVENT_DISTRICTS = frozenset(["Blam Canyon", "Fizzlefield", "Gulp Gulch", "Splat Summit", "Zapwood"])
+NO_SUMMON_DISTRICTS = frozenset(["Gulp Gulch", "Splat Summit"])
+
+
+def convert_number_to_fullwidth(number: Union[int, str]) -> str:
+    return str(number).translate(FULLWIDTH_TABLE)
+
+
+def convert_number_to_emoji(number: Union[int, str]) -> str:
+    return str(number).translate(NUMBER_EMOJI_TABLE)
+
+
+def get_population_emoji(population: int) -> str:
+    if population <= 300:
+        return ":blue_circle:"
+    elif population > 500:
+        return ":red_circle:"
+    else:
+        return ":green_circle:"
+
+
+def get_district_marks(district: str, invasion_districts: Iterable[str]) -> str:
+    return "".join([
+        ":speech_balloon:" if district in SPEEDCHAT_ONLY_DISTRICTS else "",
+        ":shield:" if district in NO_EVENT_DISTRICTS else "",
+        ":sparkles:" if district in NO_SUMMON_DISTRICTS else "",
+        ":gear:" if district in invasion_districts else "",
+    ])
+
+
+def format_jst(format_string: str, epochtime: Optional[float]=None) -> str:
+    moment = datetime.now(JST) if epochtime is None else datetime.fromtimestamp(epochtime, JST)
+    return moment.strftime(format_string)
+
+
+def get_field_length(info_string: Dict[str, str]) -> int:
+    return len(info_string["name"]) + len(info_string["value"])
+
+
+def get_embed_length(embed: Embed) -> int:
+    # Counted the way Discord counts the 6000 character limit of an embed.
+    length = len(embed.title or "") + len(embed.description or "") + len(embed.footer.text or "")
+    return length + sum(len(field.name) + len(field.value) for field in embed.fields)
+
+
+def get_payload_size(info_string_list: List[Dict[str, str]]) -> int:
+    # Bytes of the field texts sent to Discord.
+    return sum(len(info_string["name"].encode("utf-8")) + len(info_string["value"].encode("utf-8"))
+               for info_string in info_string_list)
@@ -0,0 +1,202 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+
+    TYPE = "untyped"
+
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]=()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self.metric_type: str = self.TYPE
+
+
+    def get_label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+
+    def format_labels(self, label_values: LabelValues, extra: Optional[Dict[str, str]]=None) -> str:
+        pairs = list(zip(self.label_names, label_values))
+        if extra is not None:
+            pairs += list(extra.items())
+        if not pairs:
+            return ""
+        escaped = [(k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs]
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+    def render_samples(self) -> List[str]:
+        raise NotImplementedError()
+
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"] + self.render_samples()
+
+
+class Counter(Metric):
+
+    TYPE = "counter"
+
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]=()) -> None:
+        super().__init__(name, documentation, label_names)
+        self.values: Dict[LabelValues, float] = {}
+
+
+    def inc(self, amount: float=1, **labels: str) -> None:
+        label_values = self.get_label_values(labels)
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+
+    def render_samples(self) -> List[str]:
+        return [f"{self.name}{self.format_labels(label_values)} {value}"
+                for label_values, value in sorted(self.values.items())]
+
+
+class Histogram(Metric):
+
+    TYPE = "histogram"
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]=(),
+                 buckets: Sequence[float]=DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # Per label values: [count in each bucket..., count above the last bucket], sum
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+
+    def observe(self, value: float, **labels: str) -> None:
+        label_values = self.get_label_values(labels)
+        if label_values not in self.values:
+            self.values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = self.values[label_values]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+
+    def render_samples(self) -> List[str]:
+        lines = []
+        for label_values, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bucket, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self.format_labels(label_values, {'le': repr(bucket)})} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{self.format_labels(label_values, {'le': '+Inf'})} {cumulative}")
+            lines.append(f"{self.name}_sum{self.format_labels(label_values)} {total[0]}")
+            lines.append(f"{self.name}_count{self.format_labels(label_values)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    CallbackMetric
+    ----------
+
+    Metric whose value is read from a callback when the metrics are scraped.
+    Used to export the statistics other components already keep.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], type_: str="gauge") -> None:
+        super().__init__(name, documentation)
+        self.callback: Callable[[], float] = callback
+        self.metric_type = type_
+
+
+    def render_samples(self) -> List[str]:
+        return [f"{self.name} {self.callback()}"]
+
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+
+    def register(self, metric: Metric) -> Metric:
+        # Registering the same name again returns the metric registered first.
+        return self.metrics.setdefault(metric.name, metric)
+
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str]=()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str]=(),
+                  buckets: Sequence[float]=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+
+    def callback(self, name: str, documentation: str, callback: Callable[[], float],
+                 type_: str="gauge") -> CallbackMetric:
+        metric = CallbackMetric(name, documentation, callback, type_)
+        # Callbacks are replaced, so the newest object is the one reported.
+        self.metrics[name] = metric
+        return metric
+
+
+    def render(self) -> str:
+        lines = []
+        for _, metric in sorted(self.metrics.items()):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+# The registry shared by every module of the bot.
+shared_metrics = MetricsRegistry()
+
+
+class MetricsServer:
+    """
+    MetricsServer
+    ----------
+
+    Local HTTP endpoint serving the metrics in the Prometheus text format on `/metrics`.
+    """
+
+    def __init__(self, registry: MetricsRegistry=shared_metrics) -> None:
+        self.registry: MetricsRegistry = registry
+        self.runner: Optional[web.AppRunner] = None
+
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+    async def start(self, host: str="127.0.0.1", port: int=9100) -> None:
+        if self.runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+        self.runner = None
@@ -0,0 +1,234 @@
+"""
+Opening book
+=====
+Solved scores of the early Connect 4 positions, in a sorted binary file
+read through mmap, so a lookup costs a binary search over the page cache.
+
+Build the book from the repository root (it takes long, run it once):
+    python -m infosquare_package.util.opening_book [--depth N] [--workers N] [--node-budget N] [--output PATH]
+
+By default every position is solved however many nodes it takes, so the book
+always covers the shallowest positions, which the AI cannot solve within its
+time budget. In pure Python the first moves take hours each; a node budget
+makes the build faster but leaves those positions out of the book.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .connect4_solver import (BOTTOM_MASKS, COLUMN_MASKS, H1, TOP_MASKS, WIDTH, Connect4Solver,
+                              compute_winning_position, parse_history)
+
+
+# Header: magic, format version, depth, number of records.
+HEADER = struct.Struct("<4sHHI")
+MAGIC = b"C4OB"
+VERSION = 1
+
+# Record: position key, then the score of every column.
+RECORD = struct.Struct(f"<Q{WIDTH}b")
+
+DEFAULT_BOOK_PATH = "infosquare_package/resource/findfour/opening_book.bin"
+
+
+def mirror_bitboard(bitboard: int) -> int:
+    column_bits = (1 << H1) - 1
+    mirrored = 0
+    for column in range(WIDTH):
+        mirrored |= ((bitboard >> (column * H1)) & column_bits) << ((WIDTH - 1 - column) * H1)
+    return mirrored
+
+
+def get_book_key(position: int, mask: int) -> Tuple[int, bool]:
+    """
+    Returns the key under which a position is stored, and whether it is the key
+    of the mirrored position. A position and its mirror share one record.
+    """
+    key = position + mask
+    mirrored_key = mirror_bitboard(position) + mirror_bitboard(mask)
+    return (mirrored_key, True) if mirrored_key < key else (key, False)
+
+
+class OpeningBook:
+    """
+    OpeningBook
+    ----------
+
+    Read-only view of an opening book file.
+    The file is mapped into memory when first used, so every process of the bot
+    shares the same pages and nothing is loaded up front.
+
+    Attributes:
+        path (:class:`str`):
+            Path of the book file.
+        depth (:class:`int`):
+            Number of moves up to which the book was built.
+        record_num (:class:`int`):
+            Number of positions in the book.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.depth: int = 0
+        self.record_num: int = 0
+        self.buffer: Optional[mmap.mmap] = None
+        self.is_opened: bool = False
+
+
+    def open(self) -> bool:
+        if self.is_opened:
+            return self.buffer is not None
+        self.is_opened = True
+
+        try:
+            with open(self.path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            print(f"WARNING: The opening book '{self.path}' is not found. Every position is searched.")
+            return False
+        except ValueError:
+            # An empty file cannot be mapped.
+            print(f"WARNING: The opening book '{self.path}' is broken. Every position is searched.")
+            return False
+
+        # A file cut short may not even hold the header.
+        is_valid = len(buffer) >= HEADER.size
+        if is_valid:
+            magic, version, depth, record_num = HEADER.unpack_from(buffer, 0)
+            is_valid = magic == MAGIC and version == VERSION and \
+                len(buffer) == HEADER.size + record_num * RECORD.size
+        if not is_valid:
+            print(f"WARNING: The opening book '{self.path}' is broken. Every position is searched.")
+            buffer.close()
+            return False
+
+        self.buffer = buffer
+        self.depth = depth
+        self.record_num = record_num
+        return True
+
+
+    def get_scores(self, history: str) -> Optional[List[int]]:
+        if not self.open() or len(history) > self.depth:
+            return None
+
+        position, mask, _ = parse_history(history)
+        key, is_mirrored = get_book_key(position, mask)
+
+        low, high = 0, self.record_num
+        while low < high:
+            middle = (low + high) // 2
+            record = RECORD.unpack_from(self.buffer, HEADER.size + middle * RECORD.size)
+            if record[0] < key:
+                low = middle + 1
+            elif record[0] > key:
+                high = middle
+            else:
+                scores = list(record[1:])
+                return scores[::-1] if is_mirrored else scores
+
+        return None
+
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+        self.buffer = None
+        self.is_opened = False
+
+
+def iterate_positions(depth: int) -> Iterator[str]:
+    # One history for every position (up to mirroring) with at most `depth` moves and no winner yet.
+    seen = set()
+    histories = [""]
+    for moves in range(depth + 1):
+        next_histories = []
+        for history in histories:
+            position, mask, _ = parse_history(history)
+            key, _ = get_book_key(position, mask)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield history
+
+            if moves == depth:
+                continue
+            own_win = compute_winning_position(position, mask)
+            for column in range(WIDTH):
+                move = (mask + BOTTOM_MASKS[column]) & COLUMN_MASKS[column]
+                if not mask & TOP_MASKS[column] and not own_win & move:
+                    next_histories.append(history + str(column + 1))
+        histories = next_histories
+
+
+# Solver of each builder process, kept between positions so its table is reused.
+builder_solver: Optional[Connect4Solver] = None
+
+
+def solve_position(history: str, node_budget: int) -> Tuple[str, Optional[List[int]]]:
+    global builder_solver
+    if builder_solver is None:
+        # A budget of 0 means no limit.
+        builder_solver = Connect4Solver(node_budget=node_budget or 1 << 62, table_size=8388593)
+
+    scores = builder_solver.get_scores(history)
+    # A column left to the fallback would not be exact, so the position is left out of the book.
+    return history, scores if builder_solver.is_exact else None
+
+
+def build_opening_book(path: str, depth: int, node_budget: int, workers: int) -> None:
+    histories = list(iterate_positions(depth))
+    print(f"Solving {len(histories)} positions up to {depth} moves.")
+
+    records: Dict[int, List[int]] = {}
+    skipped = 0
+    started_at = time.time()
+    # Deeper positions first: they are cheap, and their bounds stay in the tables of the workers for the shallow ones.
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(solve_position, reversed(histories), [node_budget] * len(histories), chunksize=16)
+        for i, (history, scores) in enumerate(results, 1):
+            if scores is None:
+                skipped += 1
+            else:
+                position, mask, _ = parse_history(history)
+                key, is_mirrored = get_book_key(position, mask)
+                records[key] = scores[::-1] if is_mirrored else scores
+            if i % 1000 == 0:
+                print(f"{i}/{len(histories)} positions, {time.time() - started_at:.0f} s")
+
+    # Write to a temporary file first so a crash never leaves a broken book behind.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, depth, len(records)))
+        for key in sorted(records):
+            f.write(RECORD.pack(key, *records[key]))
+    os.replace(tmp_path, path)
+
+    print(f"Wrote {len(records)} positions to '{path}'.")
+    if skipped:
+        print(f"WARNING: {skipped} positions exceeded the node budget and are searched by the AI instead.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=4, help="maximum number of moves of a book position")
+    parser.add_argument("--node-budget", type=int, default=0, help="maximum nodes searched per position, 0 for no limit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of solver processes")
+    parser.add_argument("--output", default=os.environ.get("OPENING_BOOK_PATH", DEFAULT_BOOK_PATH))
+    args = parser.parse_args()
+
+    build_opening_book(args.output, args.depth, args.node_budget, args.workers)
+
+
+# The book shared by every game of the bot.
+shared_opening_book = OpeningBook(os.environ.get("OPENING_BOOK_PATH", DEFAULT_BOOK_PATH))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from discord.abc import Messageable
+from discord.errors import HTTPException
+from discord.message import Message
+
+from .metrics import shared_metrics
+
+
+# Lower values are sent first.
+PRIORITY_GAME = 0
+PRIORITY_BOARD = 1
+
+Action = Callable[[], Awaitable[Any]]
+
+
+class OutboundOperation:
+
+    def __init__(self, action: Action, priority: int, coalesce_key: Optional[str]) -> None:
+        self.action: Action = action
+        self.priority: int = priority
+        self.coalesce_key: Optional[str] = coalesce_key
+        self.enqueued_at: float = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_event_loop().create_future()
+        # Retrieve the error even if every caller has been cancelled.
+        self.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+
+class OutboundLane:
+
+    def __init__(self, key: Hashable) -> None:
+        self.key: Hashable = key
+        self.operations: Deque[OutboundOperation] = deque()
+        self.is_running: bool = False
+
+
+    def get_priority(self) -> int:
+        return min(operation.priority for operation in self.operations)
+
+
+class RateLimitLogHandler(logging.Handler):
+    """
+    RateLimitLogHandler
+    ----------
+
+    Collects the time discord.py spends sleeping on rate limits from the log records of `discord.http`.
+    The messages matched here are the ones written by discord.py 1.7.
+    Most of them are written at the DEBUG level, so the logger has to be lowered to DEBUG,
+    which makes discord.py log every request. It is therefore only attached on request.
+
+    Attributes:
+        wait_seconds (:class:`float`):
+            Total seconds discord.py has slept on rate limits.
+        hits (:class:`int`):
+            Number of rate limit sleeps.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+        self.wait_seconds: float = 0.0
+        self.hits: int = 0
+
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = str(record.msg)
+        try:
+            if message.startswith("A rate limit bucket has been exhausted"):
+                self.wait_seconds += float(record.args[1])
+            elif message.startswith("We are being rate limited") or message.startswith("Global rate limit"):
+                self.wait_seconds += float(record.args[0])
+            else:
+                return
+        except (IndexError, TypeError, ValueError):
+            return
+        self.hits += 1
+
+
+class OutboundQueue:
+    """
+    OutboundQueue
+    ----------
+
+    Central queue of the requests the bot sends to Discord.
+    Operations are grouped into lanes, one per channel for sends and one per message
+    for edits, reactions and deletes, and each lane runs one operation at a time.
+    Workers always pick the lane with the most urgent operation, so game interactions
+    go before information board refreshes, and one worker only serves game operations,
+    so a long run of slow board edits never holds every worker. A queued edit of a message is replaced
+    by a newer edit of the same message, so only the newest content is sent.
+
+    Attributes:
+        workers (:class:`int`):
+            Number of lanes served at the same time, including the one reserved for game operations.
+        track_rate_limits (:class:`bool`):
+            Whether `rate_limit` collects the rate limit sleeps of discord.py.
+            It lowers the `discord.http` logger to DEBUG, so it is off unless asked for.
+        lanes (:class:`Dict[Hashable, OutboundLane]`):
+            Lanes with queued or running operations.
+        submitted (:class:`int`):
+            Number of operations submitted.
+        coalesced (:class:`int`):
+            Number of edits merged into an already queued edit.
+        completed (:class:`int`):
+            Number of operations finished successfully.
+        failed (:class:`int`):
+            Number of operations that raised an error.
+        queue_wait_seconds (:class:`Dict[int, float]`):
+            Total seconds operations waited in the queue, by priority.
+        call_seconds (:class:`float`):
+            Total seconds spent in the Discord calls themselves.
+        rate_limit (:class:`RateLimitLogHandler`):
+            Time spent sleeping on Discord rate limits, while `track_rate_limits` is set.
+    """
+
+    def __init__(self, workers: int=4, track_rate_limits: bool=False) -> None:
+        # At least one worker for game operations and one for everything.
+        self.workers: int = max(2, workers)
+        self.track_rate_limits: bool = track_rate_limits
+        self.lanes: Dict[Hashable, OutboundLane] = {}
+        self.wakeup: Optional[asyncio.Event] = None
+        self.worker_tasks: List[asyncio.Task] = []
+
+        self.submitted: int = 0
+        self.coalesced: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.queue_wait_seconds: Dict[int, float] = {PRIORITY_GAME: 0.0, PRIORITY_BOARD: 0.0}
+        self.call_seconds: float = 0.0
+        self.rate_limit: RateLimitLogHandler = RateLimitLogHandler()
+
+
+    def start(self) -> None:
+        if self.wakeup is not None:
+            return
+
+        self.wakeup = asyncio.Event()
+        self.worker_tasks = [asyncio.ensure_future(self.run_worker(max_priority=PRIORITY_GAME))]
+        self.worker_tasks += [asyncio.ensure_future(self.run_worker()) for _ in range(self.workers - 1)]
+
+        if self.track_rate_limits:
+            http_logger = logging.getLogger("discord.http")
+            http_logger.addHandler(self.rate_limit)
+            if http_logger.getEffectiveLevel() > logging.DEBUG:
+                http_logger.setLevel(logging.DEBUG)
+
+
+    async def submit(self, lane_key: Hashable, action: Action, priority: int,
+                     coalesce_key: Optional[str]=None) -> Any:
+        self.start()
+        self.submitted += 1
+
+        lane = self.lanes.get(lane_key)
+        if lane is None:
+            lane = OutboundLane(lane_key)
+            self.lanes[lane_key] = lane
+
+        operation = None
+        if coalesce_key is not None:
+            for queued_operation in lane.operations:
+                if queued_operation.coalesce_key == coalesce_key:
+                    # Latest wins: the queued operation now sends the newest content.
+                    operation = queued_operation
+                    operation.action = action
+                    operation.priority = min(operation.priority, priority)
+                    self.coalesced += 1
+                    break
+
+        if operation is None:
+            operation = OutboundOperation(action=action, priority=priority, coalesce_key=coalesce_key)
+            lane.operations.append(operation)
+            self.wakeup.set()
+
+        return await asyncio.shield(operation.future)
+
+
+    def pop_ready_lane(self, max_priority: Optional[int]=None) -> Optional[OutboundLane]:
+        ready_lanes = [lane for lane in self.lanes.values() if lane.operations and not lane.is_running and
+                       (max_priority is None or lane.get_priority() <= max_priority)]
+        if not ready_lanes:
+            return None
+
+        return min(ready_lanes, key=lambda lane: (lane.get_priority(), lane.operations[0].enqueued_at))
+
+
+    async def run_worker(self, max_priority: Optional[int]=None) -> None:
+        # A worker with `max_priority` only serves lanes with an operation at least that urgent.
+        while True:
+            lane = self.pop_ready_lane(max_priority)
+            if lane is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            operation = lane.operations.popleft()
+            lane.is_running = True
+            started_at = time.monotonic()
+            self.queue_wait_seconds[operation.priority] = \
+                self.queue_wait_seconds.get(operation.priority, 0.0) + started_at - operation.enqueued_at
+
+            try:
+                result = await operation.action()
+            except asyncio.CancelledError:
+                operation.future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                operation.future.set_exception(e)
+            else:
+                self.completed += 1
+                operation.future.set_result(result)
+            finally:
+                self.call_seconds += time.monotonic() - started_at
+                lane.is_running = False
+                if lane.operations:
+                    self.wakeup.set()
+                else:
+                    del self.lanes[lane.key]
+
+
+    def get_queue_depth(self) -> int:
+        return sum(len(lane.operations) + lane.is_running for lane in self.lanes.values())
+
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.get_queue_depth(),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "game_queue_wait_seconds": self.queue_wait_seconds.get(PRIORITY_GAME, 0.0),
+            "board_queue_wait_seconds": self.queue_wait_seconds.get(PRIORITY_BOARD, 0.0),
+            "call_seconds": self.call_seconds,
+            "rate_limit_wait_seconds": self.rate_limit.wait_seconds,
+            "rate_limit_hits": self.rate_limit.hits,
+        }
+
+
+    async def send(self, channel: Messageable, content: Optional[str]=None,
+                   priority: int=PRIORITY_GAME, **kwargs: Any) -> Message:
+        return await self.submit(("channel", channel.id), lambda: channel.send(content, **kwargs), priority)
+
+
+    async def edit(self, message: Message, priority: int=PRIORITY_GAME, **kwargs: Any) -> None:
+        await self.submit(("message", message.id), lambda: message.edit(**kwargs), priority, coalesce_key="edit")
+
+
+    async def add_reaction(self, message: Message, emoji: str, priority: int=PRIORITY_GAME) -> None:
+        await self.submit(("message", message.id), lambda: message.add_reaction(emoji), priority)
+
+
+    async def remove_reaction(self, message: Message, emoji: str, member: Any, priority: int=PRIORITY_GAME) -> None:
+        await self.submit(("message", message.id), lambda: message.remove_reaction(emoji, member), priority)
+
+
+    async def delete(self, message: Message, priority: int=PRIORITY_GAME, delay: Optional[float]=None) -> None:
+        if delay is not None:
+            # Like `Message.delete`, return at once and delete the message in the background.
+            asyncio.ensure_future(self.delete_later(message, priority, delay))
+            return
+        await self.submit(("message", message.id), lambda: message.delete(), priority)
+
+
+    async def delete_later(self, message: Message, priority: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.delete(message, priority)
+        except HTTPException:
+            pass
+
+
+# The queue shared by every module of the bot.
+shared_outbound_queue = OutboundQueue(track_rate_limits=os.environ.get("TRACK_RATE_LIMITS") == "1")
+
+for metric_key, metric_type, documentation in [
+        ("queue_depth", "gauge", "Discord operations queued or running."),
+        ("submitted", "counter", "Discord operations submitted."),
+        ("coalesced", "counter", "Edits merged into an already queued edit of the same message."),
+        ("completed", "counter", "Discord operations finished successfully."),
+        ("failed", "counter", "Discord operations that raised an error."),
+        ("game_queue_wait_seconds", "counter", "Seconds game operations waited in the queue."),
+        ("board_queue_wait_seconds", "counter", "Seconds board operations waited in the queue."),
+        ("call_seconds", "counter", "Seconds spent in Discord calls."),
+        ("rate_limit_wait_seconds", "counter", "Seconds discord.py slept on rate limits, if TRACK_RATE_LIMITS=1."),
+        ("rate_limit_hits", "counter", "Rate limit sleeps in discord.py, if TRACK_RATE_LIMITS=1.")]:
+    metric_name = f"infosquare_outbound_{metric_key}" + ("_total" if metric_type == "counter" else "")
+    shared_metrics.callback(metric_name, documentation,
+                            lambda metric_key=metric_key: shared_outbound_queue.get_metrics()[metric_key],
+                            type_=metric_type)
@@ -0,0 +1,228 @@
+import codecs
+import json
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class ToonHQStateIndex:
+    """
+    ToonHQStateIndex
+    ----------
+
+    Id to record lookup tables built from the static tables of the ToonHQ state.
+
+    Attributes:
+        districts (:class:`Dict[int, str]`):
+            District name by district id.
+        locations (:class:`Dict[int, str]`):
+            Location name by location id.
+        group_types (:class:`Dict[int, str]`):
+            Group type name by group type id.
+        option_values (:class:`Dict[Tuple[int, int], Dict[int, str]]`):
+            Value name by value id, keyed by (group type id, option id).
+    """
+
+    def __init__(self, state: dict) -> None:
+        self.districts: Dict[int, str] = {district["id"]: district["name"] for district in state["districts"]}
+        self.locations: Dict[int, str] = {location["id"]: location["name"] for location in state["locations"]}
+        self.group_types: Dict[int, str] = {}
+        self.option_values: Dict[Tuple[int, int], Dict[int, str]] = {}
+
+        for group_type in state["group_types"]:
+            self.group_types[group_type["id"]] = group_type["name"]
+            for option in group_type["options"]:
+                self.option_values[(group_type["id"], option["id"])] = {
+                    value["id"]: value["name"] for value in option["values"]
+                }
+
+
+class ToonHQGroupParser:
+    """
+    ToonHQGroupParser
+    ----------
+
+    Parser of the ToonHQ groups page.
+    The state object embedded in the page is decoded as JSON, and the lookup
+    tables are reused until the static tables of the state change.
+
+    Attributes:
+        index (:class:`Optional[ToonHQStateIndex]`):
+            Lookup tables built from the last static tables.
+        static_tables (:class:`Optional[list]`):
+            The static tables `index` was built from.
+    """
+
+    STATE_MARKER = "window.STATE = "
+    STATIC_TABLE_KEYS = ("districts", "locations", "group_types")
+
+
+    def __init__(self) -> None:
+        self.index: Optional[ToonHQStateIndex] = None
+        self.static_tables: Optional[list] = None
+
+
+    def decode_state(self, html_object: bytes) -> dict:
+        html_string = html_object.decode("utf-8")
+        start = html_string.find(self.STATE_MARKER)
+        if start < 0:
+            raise ValueError("The state object is not found in the ToonHQ groups page.")
+
+        # raw_decode stops at the end of the object, so the rest of the script is never parsed.
+        state, _ = json.JSONDecoder().raw_decode(html_string, start + len(self.STATE_MARKER))
+        return state
+
+
+    def get_index(self, state: dict) -> ToonHQStateIndex:
+        static_tables = [state[key] for key in self.STATIC_TABLE_KEYS]
+        if self.index is None or static_tables != self.static_tables:
+            self.index = ToonHQStateIndex(state)
+            self.static_tables = static_tables
+
+        return self.index
+
+
+    def parse(self, html_object: bytes, allow_group_types: Any) -> List[Dict[str, Any]]:
+        state = self.decode_state(html_object)
+        index = self.get_index(state)
+
+        group_list = []
+
+        for g in state["groups"]:
+            if g["type"] not in allow_group_types:
+                continue
+
+            optionals = []
+            for key, value in g["options"].items():
+                optional_name = index.option_values.get((g["type"], int(key)), {}).get(value)
+                if optional_name is not None:
+                    optionals.append(optional_name)
+            optionals.append(index.group_types[g["type"]])
+
+            if g["type"] == 6:  # DA Office
+                optionals.reverse()
+
+            group_list.append({
+                "district": index.districts.get(g["district"]),
+                "location": index.locations.get(g["location"]),
+                "name": " ".join(optionals),
+                "max_players": g["max_players"],
+                "now_players": sum(member["num_players"] for member in g["members"] if member["left"] is None),
+            })
+
+        return group_list
+
+
+# Each worker process keeps its own parser, so the lookup tables stay cached between pages.
+toonhq_group_parser = ToonHQGroupParser()
+
+
+def parse_toonhq_groups(html_object: bytes, allow_group_types: Any) -> List[Dict[str, Any]]:
+    return toonhq_group_parser.parse(html_object, allow_group_types=allow_group_types)
+
+
+class StatusComponentExtractor(HTMLParser):
+    """
+    StatusComponentExtractor
+    ----------
+
+    Streaming extractor of the component statuses on the TTR status page.
+    The page is fed chunk by chunk as it is downloaded, and only the
+    `list-group-item sub-component` elements are kept: their text is the
+    component name and the text of their `<small>` element is the status.
+
+    Attributes:
+        components (:class:`Dict[str, str]`):
+            Status string by component name.
+        keywords (:class:`Optional[List[Tuple[str, ...]]]`):
+            Lower case keywords of the components to look for.
+            The extraction is done once every keyword group has matched a component.
+        is_done (:class:`bool`):
+            Whether the rest of the page can be skipped.
+    """
+
+    COMPONENT_CLASSES = frozenset(["list-group-item", "sub-component"])
+
+
+    def __init__(self, keywords: Optional[Iterable[Tuple[str, ...]]]=None) -> None:
+        super().__init__(convert_charrefs=True)
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.components: Dict[str, str] = {}
+        self.keywords: Optional[List[Tuple[str, ...]]] = list(keywords) if keywords is not None else None
+        self.is_done: bool = False
+
+        self.component_tag: Optional[str] = None
+        self.component_depth: int = 0
+        self.in_status: bool = False
+        self.name_parts: List[str] = []
+        self.status_parts: List[str] = []
+
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        if not self.is_done:
+            self.feed(self.decoder.decode(chunk))
+        return self.is_done
+
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self.is_done:
+            return
+
+        if self.component_tag is not None:
+            if tag == self.component_tag:
+                self.component_depth += 1
+            elif tag == "small":
+                self.in_status = True
+            return
+
+        for name, value in attrs:
+            if name == "class" and value is not None and self.COMPONENT_CLASSES.issubset(value.split()):
+                self.component_tag = tag
+                self.component_depth = 1
+                return
+
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.component_tag is None:
+            return
+
+        if tag == "small":
+            self.in_status = False
+        elif tag == self.component_tag:
+            self.component_depth -= 1
+            if self.component_depth == 0:
+                self.finish_component()
+
+
+    def handle_data(self, data: str) -> None:
+        if self.component_tag is None:
+            return
+
+        if self.in_status:
+            self.status_parts.append(data)
+        else:
+            self.name_parts.append(data)
+
+
+    def finish_component(self) -> None:
+        name = " ".join("".join(self.name_parts).split())
+        status = " ".join("".join(self.status_parts).split())
+        if name:
+            self.components[name] = status
+
+        self.component_tag = None
+        self.in_status = False
+        self.name_parts = []
+        self.status_parts = []
+
+        if self.keywords is not None:
+            self.is_done = all(self.find_status(self.components, keyword_group) is not None
+                               for keyword_group in self.keywords)
+
+
+    @staticmethod
+    def find_status(components: Dict[str, str], keyword_group: Tuple[str, ...]) -> Optional[str]:
+        for name, status in components.items():
+            lower_name = name.lower()
+            if any(keyword in lower_name for keyword in keyword_group):
+                return status
+        return None
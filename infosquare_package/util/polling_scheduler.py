@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from .metrics import shared_metrics
+
+
+# Returns whether the polled data has changed, and raises when the poll failed.
+Poller = Callable[[], Awaitable[bool]]
+
+POLL_SECONDS = shared_metrics.histogram(
+    "infosquare_poll_seconds", "Duration of a polling cycle.", ["job"])
+POLL_OVERRUNS = shared_metrics.counter(
+    "infosquare_poll_overruns_total", "Polling cycles that took longer than the interval of the job.", ["job"])
+POLL_FAILURES = shared_metrics.counter(
+    "infosquare_poll_failures_total", "Polling cycles that failed.", ["job"])
+
+
+class PollingPolicy:
+    """
+    PollingPolicy
+    ----------
+
+    Polling intervals of a single job.
+
+    Attributes:
+        idle_interval (:class:`float`):
+            Interval in seconds while the polled data stays the same.
+        active_interval (:class:`float`):
+            Interval in seconds right after the polled data has changed.
+        decay (:class:`float`):
+            Factor by which the interval grows back toward `idle_interval`
+            on every poll without a change.
+        base_backoff (:class:`float`):
+            Delay in seconds after the first failed poll.
+            It doubles on every consecutive failure.
+        max_backoff (:class:`float`):
+            Upper bound of the delay after failed polls.
+        jitter (:class:`float`):
+            Relative amount of randomness added to the backoff delay.
+    """
+
+    def __init__(self, idle_interval: float, active_interval: float, decay: float=1.5,
+                 base_backoff: float=10.0, max_backoff: float=600.0, jitter: float=0.3) -> None:
+        self.idle_interval: float = idle_interval
+        self.active_interval: float = active_interval
+        self.decay: float = decay
+        self.base_backoff: float = base_backoff
+        self.max_backoff: float = max_backoff
+        self.jitter: float = jitter
+
+
+class PollingJob:
+
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+    def __init__(self, name: str, poller: Poller, policy: PollingPolicy) -> None:
+        self.name: str = name
+        self.poller: Poller = poller
+        self.policy: PollingPolicy = policy
+        self.interval: float = policy.active_interval
+        self.failures: int = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+    def get_next_delay(self, is_changed: bool) -> float:
+        self.failures = 0
+        if is_changed:
+            self.interval = self.policy.active_interval
+        else:
+            self.interval = min(self.policy.idle_interval, self.interval * self.policy.decay)
+
+        return self.interval
+
+
+    def get_backoff_delay(self, error: Exception) -> float:
+        self.failures += 1
+        self.interval = self.policy.active_interval
+
+        backoff = min(self.policy.max_backoff, self.policy.base_backoff * 2 ** (self.failures - 1))
+        backoff *= random.uniform(1 - self.policy.jitter, 1 + self.policy.jitter)
+
+        # Respect the upstream when it asks us to come back later.
+        if getattr(error, "status", None) in self.RETRYABLE_STATUSES:
+            headers = getattr(error, "headers", None) or {}
+            try:
+                backoff = max(backoff, float(headers.get("Retry-After", 0)))
+            except ValueError:
+                pass
+
+        return backoff
+
+
+class PollingScheduler:
+    """
+    PollingScheduler
+    ----------
+
+    Runs each registered job in its own loop with its own polling policy.
+    A job polls faster while its data is changing, relaxes back to the idle
+    interval while it is not, and backs off exponentially with jitter on errors.
+
+    Attributes:
+        jobs (:class:`Dict[str, PollingJob]`):
+            Registered jobs keyed by name.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: Dict[str, PollingJob] = {}
+
+
+    def add_job(self, name: str, poller: Poller, policy: PollingPolicy) -> None:
+        # Replacing a job stops the loop of the old one.
+        if name in self.jobs and self.jobs[name].task is not None:
+            self.jobs[name].task.cancel()
+        self.jobs[name] = PollingJob(name=name, poller=poller, policy=policy)
+
+
+    def start(self) -> None:
+        for job in self.jobs.values():
+            if job.task is None or job.task.done():
+                job.task = asyncio.ensure_future(self.run_job(job))
+
+
+    def stop(self) -> None:
+        for job in self.jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+                job.task = None
+
+
+    async def run_job(self, job: PollingJob) -> None:
+        while True:
+            started_at = time.perf_counter()
+            try:
+                is_changed = await job.poller()
+                delay = job.get_next_delay(is_changed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = job.get_backoff_delay(e)
+                POLL_FAILURES.inc(job=job.name)
+                print(f"WARNING: Polling '{job.name}' failed {job.failures} time(s). Retry in {delay:.0f} seconds.")
+
+            elapsed = time.perf_counter() - started_at
+            POLL_SECONDS.observe(elapsed, job=job.name)
+            if elapsed > job.policy.active_interval:
+                POLL_OVERRUNS.inc(job=job.name)
+
+            await asyncio.sleep(delay)
@@ -0,0 +1,240 @@
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+
+# Marks a slot without a sample. Populations are clamped below it.
+MISSING = 0xFFFF
+
+# Offset of JST, used for the hour-of-day statistics.
+JST_OFFSET = 9 * 3600
+
+
+class SeriesTier:
+    """
+    SeriesTier
+    ----------
+
+    Fixed-size ring of samples at a single resolution.
+    Every key (district) has its own typed array of 16 bit values, and all keys
+    share one array of slot numbers, so the memory used never grows with time.
+    Samples falling into the same slot are averaged.
+
+    Attributes:
+        resolution (:class:`int`):
+            Seconds covered by one slot.
+        capacity (:class:`int`):
+            Number of slots kept.
+        slots (:class:`array`):
+            Slot number (epoch time // resolution) stored at each index.
+        values (:class:`Dict[str, array]`):
+            Values by key, or `MISSING` where the key had no sample.
+        current_slot (:class:`int`):
+            Slot number of the newest sample.
+    """
+
+    def __init__(self, resolution: int, capacity: int) -> None:
+        self.resolution: int = resolution
+        self.capacity: int = capacity
+        self.slots: array = array("I", [0]) * capacity
+        self.values: Dict[str, array] = {}
+        self.current_slot: int = -1
+        self.sums: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+
+
+    def get_span(self) -> int:
+        return self.resolution * self.capacity
+
+
+    def record(self, timestamp: float, samples: Dict[str, int]) -> None:
+        slot = int(timestamp // self.resolution)
+        if slot < self.current_slot:
+            return
+
+        index = slot % self.capacity
+        if slot != self.current_slot:
+            self.current_slot = slot
+            self.slots[index] = slot
+            for values in self.values.values():
+                values[index] = MISSING
+            self.sums.clear()
+            self.counts.clear()
+
+        for key, value in samples.items():
+            values = self.values.get(key)
+            if values is None:
+                values = array("H", [MISSING]) * self.capacity
+                self.values[key] = values
+            self.sums[key] = self.sums.get(key, 0) + value
+            self.counts[key] = self.counts.get(key, 0) + 1
+            values[index] = min(MISSING - 1, round(self.sums[key] / self.counts[key]))
+
+
+    def query(self, key: str, start: float, end: float) -> List[Tuple[int, int]]:
+        values = self.values.get(key)
+        if values is None:
+            return []
+
+        end_slot = min(int(end // self.resolution), self.current_slot)
+        start_slot = max(int(start // self.resolution), end_slot - self.capacity + 1)
+        samples = []
+        for slot in range(start_slot, end_slot + 1):
+            index = slot % self.capacity
+            if self.slots[index] == slot and values[index] != MISSING:
+                samples.append((slot * self.resolution, values[index]))
+
+        return samples
+
+
+class HourOfDayRollup:
+    """
+    HourOfDayRollup
+    ----------
+
+    Running sums and counts of the samples by hour of the day (JST) for each key,
+    updated as samples arrive so that peak hour queries read 24 numbers.
+    """
+
+    def __init__(self) -> None:
+        self.sums: Dict[str, array] = {}
+        self.counts: Dict[str, array] = {}
+
+
+    def record(self, timestamp: float, samples: Dict[str, int]) -> None:
+        hour = int((timestamp + JST_OFFSET) // 3600) % 24
+        for key, value in samples.items():
+            if key not in self.sums:
+                self.sums[key] = array("d", [0.0]) * 24
+                self.counts[key] = array("I", [0]) * 24
+            self.sums[key][hour] += value
+            self.counts[key][hour] += 1
+
+
+    def get_averages(self, key: str) -> List[Optional[float]]:
+        if key not in self.sums:
+            return [None] * 24
+
+        return [total / count if count else None for total, count in zip(self.sums[key], self.counts[key])]
+
+
+class InvasionEventLog:
+    """
+    InvasionEventLog
+    ----------
+
+    Bounded log of invasion starts and ends, derived from successive invasion lists.
+
+    Attributes:
+        events (:class:`Deque[Tuple[int, bool, str, str]]`):
+            (epoch time, whether it is a start, district, cog) from oldest to newest.
+        active (:class:`Dict[Tuple[str, str], int]`):
+            Start time by (district, cog) of the invasions in progress.
+    """
+
+    def __init__(self, capacity: int=4096) -> None:
+        self.events: Deque[Tuple[int, bool, str, str]] = deque(maxlen=capacity)
+        self.active: Dict[Tuple[str, str], int] = {}
+
+
+    def record(self, timestamp: float, invasions: Iterable[Tuple[str, str]]) -> None:
+        timestamp = int(timestamp)
+        keys = set(invasions)
+        for district, cog in sorted(keys - self.active.keys()):
+            self.events.append((timestamp, True, district, cog))
+            self.active[(district, cog)] = timestamp
+        for district, cog in sorted(self.active.keys() - keys):
+            self.events.append((timestamp, False, district, cog))
+            del self.active[(district, cog)]
+
+
+    def count_starts(self, since: float, district: Optional[str]=None) -> int:
+        count = 0
+        for timestamp, is_start, event_district, _ in reversed(self.events):
+            if timestamp < since:
+                break
+            if is_start and (district is None or event_district == district):
+                count += 1
+
+        return count
+
+
+class PopulationHistory:
+    """
+    PopulationHistory
+    ----------
+
+    In-process time series of the district populations and the invasions.
+    Each sample goes into three tiers: 10 seconds for 7 days, 1 minute for
+    30 days and 10 minutes for a year. Queries read from the finest tier
+    that covers the requested range within a bounded number of slots.
+
+    Attributes:
+        tiers (:class:`List[SeriesTier]`):
+            Tiers from the finest to the coarsest.
+        hourly (:class:`HourOfDayRollup`):
+            Averages by hour of the day.
+        invasion_log (:class:`InvasionEventLog`):
+            Invasion starts and ends.
+    """
+
+    TOTAL_KEY = "__total__"
+
+
+    def __init__(self) -> None:
+        self.tiers: List[SeriesTier] = [
+            SeriesTier(resolution=10, capacity=7 * 24 * 360),
+            SeriesTier(resolution=60, capacity=30 * 24 * 60),
+            SeriesTier(resolution=600, capacity=365 * 24 * 6),
+        ]
+        self.hourly: HourOfDayRollup = HourOfDayRollup()
+        self.invasion_log: InvasionEventLog = InvasionEventLog()
+
+
+    def record_population(self, timestamp: float, total_population: int,
+                          population_by_district: Iterable[Tuple[str, int]]) -> None:
+        samples = dict(population_by_district)
+        samples[self.TOTAL_KEY] = total_population
+        for tier in self.tiers:
+            tier.record(timestamp, samples)
+        self.hourly.record(timestamp, samples)
+
+
+    def record_invasions(self, timestamp: float, invasions: Iterable[Tuple[str, str]]) -> None:
+        self.invasion_log.record(timestamp, invasions)
+
+
+    def get_keys(self) -> List[str]:
+        return sorted(key for key in self.tiers[0].values if key != self.TOTAL_KEY)
+
+
+    def get_series(self, key: str, seconds: float, now: Optional[float]=None,
+                   max_points: int=2048) -> List[Tuple[int, int]]:
+        # Long ranges are read from coarser tiers, so a query never scans more than `max_points` slots.
+        now = time.time() if now is None else now
+        for tier in self.tiers:
+            if seconds <= tier.get_span() and seconds / tier.resolution <= max_points:
+                return tier.query(key, now - seconds, now)
+
+        return self.tiers[-1].query(key, now - seconds, now)
+
+
+    def get_latest(self, key: str, now: Optional[float]=None) -> Optional[Tuple[int, int]]:
+        # The newest sample of the last few minutes.
+        series = self.get_series(key, 300, now)
+        return series[-1] if series else None
+
+
+    def get_peak(self, key: str, seconds: float, now: Optional[float]=None) -> Optional[Tuple[int, int]]:
+        series = self.get_series(key, seconds, now)
+        return max(series, key=lambda sample: sample[1]) if series else None
+
+
+    def get_average(self, key: str, start: float, end: float) -> Optional[float]:
+        values = [value for _, value in self.get_series(key, end - start, end)]
+        return sum(values) / len(values) if values else None
+
+
+# The history shared by all trackers and commands in the bot.
+shared_population_history = PopulationHistory()
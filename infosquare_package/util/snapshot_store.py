@@ -0,0 +1,62 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class SnapshotStore:
+    """
+    SnapshotStore
+    ----------
+
+    Compact JSON file holding the last good model of each tracker,
+    so that boards can be rendered right after a restart before any upstream answers.
+
+    The file maps board name -> {"fetched_at": epoch time of the data, "model": model}.
+
+    Attributes:
+        path (:class:`str`):
+            Path of the JSON file.
+        snapshots (:class:`Dict[str, Dict[str, Any]]`):
+            Snapshot by board name.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.snapshots: Dict[str, Dict[str, Any]] = self.load()
+
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    def save(self) -> None:
+        # Write to a temporary file first so a crash never leaves a broken store behind.
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshots, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+    def get_snapshot(self, board_name: str, max_age: float) -> Optional[Tuple[Any, float]]:
+        snapshot = self.snapshots.get(board_name)
+        if snapshot is None or time.time() - snapshot["fetched_at"] > max_age:
+            return None
+
+        return snapshot["model"], snapshot["fetched_at"]
+
+
+    def set_snapshot(self, board_name: str, model: Any, fetched_at: float) -> None:
+        self.snapshots[board_name] = {"fetched_at": fetched_at, "model": model}
+        try:
+            self.save()
+        except OSError as e:
+            print(f"WARNING: Could not save the snapshot of '{board_name}'. ({e})")
+
+
+# The store shared by all trackers in the bot.
+shared_snapshot_store = SnapshotStore(path=os.environ.get("SNAPSHOT_STORE_PATH", "tracker_snapshots.json"))
@@ -1,39 +1,139 @@
+import asyncio
 import json
-import urllib.request
-from typing import Optional
+import time
+import urllib.parse
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
 
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet
-from requests.models import Response
+import aiohttp
 
+from .metrics import shared_metrics
 
-class JsonStream:
 
-    def get_json_object(self, url: str) -> dict:
-        headers = {"User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:47.0) Gecko/20100101 Firefox/47.0"}
-        request = urllib.request.Request(url=url, headers=headers)
-        response = urllib.request.urlopen(request)
-        json_object = json.loads(response.read().decode("utf8"))
+USER_AGENT = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:47.0) Gecko/20100101 Firefox/47.0"
+
+UPSTREAM_REQUEST_SECONDS = shared_metrics.histogram(
+    "infosquare_upstream_request_seconds", "Latency of upstream HTTP requests.", ["host"])
+UPSTREAM_RESPONSES = shared_metrics.counter(
+    "infosquare_upstream_responses_total", "Upstream HTTP responses by status ('error' if none was received).",
+    ["host", "status"])
+UPSTREAM_BYTES = shared_metrics.counter(
+    "infosquare_upstream_bytes_total", "Bytes read from upstream response bodies.", ["host"])
+
+
+def get_host(url: str) -> str:
+    return urllib.parse.urlsplit(url).hostname or ""
+
+
+class AsyncWebSession:
+    """
+    AsyncWebSession
+    ----------
+
+    Shared `aiohttp` session used by the asynchronous streams.
+    The session is created lazily on the running event loop, keeps connections
+    alive per host and caps the number of requests in flight.
+
+    Attributes:
+        timeout (:class:`float`):
+            Total time limit of a request in seconds.
+        max_connections (:class:`int`):
+            Maximum number of requests in flight at the same time.
+        max_connections_per_host (:class:`int`):
+            Maximum number of pooled connections to a single host.
+        keepalive_timeout (:class:`float`):
+            Seconds an idle connection is kept in the pool.
+    """
+
+    def __init__(self, timeout: float=10.0, max_connections: int=8,
+                 max_connections_per_host: int=4, keepalive_timeout: float=60.0) -> None:
+        self.timeout: float = timeout
+        self.max_connections: int = max_connections
+        self.max_connections_per_host: int = max_connections_per_host
+        self.keepalive_timeout: float = keepalive_timeout
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 headers={"User-Agent": USER_AGENT},
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self.semaphore = asyncio.Semaphore(self.max_connections)
+
+        return self.session
+
+
+    @asynccontextmanager
+    async def request(self, url: str) -> AsyncIterator[aiohttp.ClientResponse]:
+        session = self.get_session()
+        host = get_host(url)
+        started_at = time.perf_counter()
+        status = "error"
+        try:
+            async with self.semaphore:
+                async with session.get(url) as response:
+                    status = str(response.status)
+                    response.raise_for_status()
+                    yield response
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started_at, host=host)
+            UPSTREAM_RESPONSES.inc(host=host, status=status)
+
+
+    async def get_bytes(self, url: str) -> bytes:
+        async with self.request(url) as response:
+            body = await response.read()
+            UPSTREAM_BYTES.inc(len(body), host=get_host(url))
+            return body
+
+
+    async def feed_chunks(self, url: str, feeder: Callable[[bytes], bool], chunk_size: int=8192) -> None:
+        # Stop downloading as soon as the feeder reports it has what it needs.
+        async with self.request(url) as response:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                UPSTREAM_BYTES.inc(len(chunk), host=get_host(url))
+                if feeder(chunk):
+                    break
+
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+
+# The session shared by all asynchronous streams in the bot.
+shared_web_session = AsyncWebSession()
+
+
+class AsyncJsonStream:
+
+    def __init__(self, web_session: Optional[AsyncWebSession]=None) -> None:
+        self.web_session: AsyncWebSession = web_session if web_session is not None else shared_web_session
+
+
+    async def get_json_object(self, url: str) -> dict:
+        body = await self.web_session.get_bytes(url)
+        json_object = json.loads(body.decode("utf8"))
 
         return json_object
 
 
-class HTMLStream:
-    
-    def get_html_object(self, url: str) -> Response:
-        headers = {"User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:47.0) Gecko/20100101 Firefox/47.0"}
-        html_object = requests.get(url, headers=headers)
+class AsyncHTMLStream:
+
+    def __init__(self, web_session: Optional[AsyncWebSession]=None) -> None:
+        self.web_session: AsyncWebSession = web_session if web_session is not None else shared_web_session
+
 
-        return html_object
+    async def get_html_object(self, url: str) -> bytes:
+        return await self.web_session.get_bytes(url)
 
-    
-    def get_soup_object(self, url: str, tag: Optional[str]=None, class_: Optional[str]=None) -> ResultSet:
-        html_object = self.get_html_object(url)
-        soup = BeautifulSoup(html_object.content, "html.parser")
-        if class_ is not None:
-            pr_soup = soup.find_all(class_=class_)
-        else:
-            pr_soup = soup.find_all(tag)
 
-        return pr_soup
+    async def feed_html_object(self, url: str, feeder: Callable[[bytes], bool]) -> None:
+        await self.web_session.feed_chunks(url, feeder)
@@ -18,6 +18,7 @@ from discord.message import Message
 from discord.reaction import Reaction
 
 from . import embed_color
+from .util.outbound_queue import shared_outbound_queue
 
 
 class WordWolfGame:
@@ -218,6 +219,7 @@ class WordWolfGameMaster:
         self.wolf_num = wolf_num
         self.available_genre = available_genre
         self.embed_color = embed_color.WORDWOLF_COLOR
+        self.outbound_queue = shared_outbound_queue
 
         self.is_playing = False
         self.is_ready = False
@@ -277,13 +279,13 @@ class WordWolfGameMaster:
         menu_embed = discord.Embed(title="**Word wolf** (beta)", color=self.embed_color)
         menu_embed = menu_embed.add_field(name="メニュー画面", value=info_string)
         if self.menu_message is None:
-            self.menu_message = await channel.send(embed=menu_embed)
-            await self.menu_message.add_reaction("▶️")
-            await self.menu_message.add_reaction("🙋")
-            await self.menu_message.add_reaction("👋")
-            await self.menu_message.add_reaction("❓")
+            self.menu_message = await self.outbound_queue.send(channel, embed=menu_embed)
+            await self.outbound_queue.add_reaction(self.menu_message, "▶️")
+            await self.outbound_queue.add_reaction(self.menu_message, "🙋")
+            await self.outbound_queue.add_reaction(self.menu_message, "👋")
+            await self.outbound_queue.add_reaction(self.menu_message, "❓")
         else:
-            await self.menu_message.edit(embed=menu_embed)
+            await self.outbound_queue.edit(self.menu_message, embed=menu_embed)
 
 
     async def join(self, channel: TextChannel, user: Member) -> None:
@@ -319,7 +321,7 @@ class WordWolfGameMaster:
             word_notice_embed = word_notice_embed.add_field(name="お題確認", value=info_string)
             word_notice_embed = word_notice_embed.set_footer(text=hash_string)
             player_dm_channel = await player.create_dm()
-            await player_dm_channel.send(embed=word_notice_embed)
+            await self.outbound_queue.send(player_dm_channel, embed=word_notice_embed)
         
         # Send the message about starting thinking.
         info_string = "参加者にダイレクトメッセージでお題を送信しました。\n" + \
@@ -329,8 +331,8 @@ class WordWolfGameMaster:
         start_thinking_embed = start_thinking_embed.add_field(name="議論スタート！", value=info_string)
         start_thinking_embed = start_thinking_embed.set_footer(text=hash_string)
 
-        self.start_thinking_message = await channel.send(embed=start_thinking_embed)
-        await self.start_thinking_message.add_reaction("💡")
+        self.start_thinking_message = await self.outbound_queue.send(channel, embed=start_thinking_embed)
+        await self.outbound_queue.add_reaction(self.start_thinking_message, "💡")
     
 
     async def show_result(self) -> None:
@@ -355,9 +357,9 @@ class WordWolfGameMaster:
         result_embed = discord.Embed(title="**Word wolf** (beta)", color=self.embed_color)
         result_embed = result_embed.add_field(name="結果発表", value=info_string)
 
-        self.result_message = await send_channel.send(embed=result_embed)
-        await self.result_message.add_reaction("🔁")
-        await self.result_message.add_reaction("🔧")
+        self.result_message = await self.outbound_queue.send(send_channel, embed=result_embed)
+        await self.outbound_queue.add_reaction(self.result_message, "🔁")
+        await self.outbound_queue.add_reaction(self.result_message, "🔧")
 
 
     async def repeat_game(self, channel: TextChannel) -> None:
@@ -0,0 +1,6 @@
+import sys
+import types
+
+# The real module decrypts the Firebase credentials when it is imported, so the tests never import it.
+sys.modules.setdefault("infosquare_package.util.firebase_operator",
+                       types.ModuleType("infosquare_package.util.firebase_operator"))
@@ -0,0 +1,49 @@
+import asyncio
+import time
+import unittest
+from typing import List
+
+from infosquare_package.connect4 import SolverPool, UnbeatableAI
+
+
+class TestConcurrentGames(unittest.TestCase):
+
+    time_budget = 0.5
+    timeout_margin = 1.0
+
+
+    def make_ai(self, pool: SolverPool) -> UnbeatableAI:
+        ai = UnbeatableAI(time_budget=self.time_budget, prefetch_time_budget=self.time_budget)
+        ai.pool = pool
+        return ai
+
+
+    async def play(self, ai: UnbeatableAI, pos: str, thinking_time: float) -> float:
+        # The AI searches the possible moves while the opponent thinks.
+        ai.prefetch(pos)
+        await asyncio.sleep(thinking_time)
+        started_at = time.monotonic()
+        # The edge column is the last one searched speculatively.
+        await ai.get_hand(pos + "1")
+        return time.monotonic() - started_at
+
+
+    async def play_two_games(self) -> List[float]:
+        pool = SolverPool(max_workers=2, max_prefetching=1, timeout_margin=self.timeout_margin)
+        try:
+            # The worker processes are started before the clock runs.
+            await asyncio.gather(pool.run("", 0.0), pool.run("", 0.0))
+            # The second game replies while the speculative searches of the first one are still queued.
+            return await asyncio.gather(self.play(self.make_ai(pool), "4343", 1.0),
+                                        self.play(self.make_ai(pool), "4444", 0.05))
+        finally:
+            pool.shutdown()
+
+
+    def test_reply_is_not_held_back_by_other_game(self):
+        for elapsed in asyncio.run(self.play_two_games()):
+            self.assertLess(elapsed, self.time_budget + self.timeout_margin)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import random
+import unittest
+from typing import List
+
+from infosquare_package.util.connect4_solver import (CELL_NUM, HEIGHT, INVALID_SCORE, WIDTH, Connect4Solver,
+                                                     get_next_histories, parse_history, search_scores)
+
+
+def make_grid(history: str) -> List[List[int]]:
+    # grid[column] lists the players (0 or 1) of the stones in the column from the bottom.
+    grid = [[] for _ in range(WIDTH)]
+    for moves, char in enumerate(history):
+        grid[int(char) - 1].append(moves % 2)
+    return grid
+
+
+def is_winning_move(grid: List[List[int]], column: int, player: int) -> bool:
+    row = len(grid[column])
+    for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        count = 1
+        for sign in [1, -1]:
+            x, y = column + sign * dx, row + sign * dy
+            while 0 <= x < WIDTH and 0 <= y < len(grid[x]) and grid[x][y] == player:
+                count += 1
+                x, y = x + sign * dx, y + sign * dy
+        if count >= 4:
+            return True
+    return False
+
+
+def brute_force(grid: List[List[int]], moves: int) -> int:
+    # Plain negamax over every move, scored like the solver.
+    if moves == CELL_NUM:
+        return 0
+
+    player = moves % 2
+    best_score = -CELL_NUM
+    for column in range(WIDTH):
+        if len(grid[column]) == HEIGHT:
+            continue
+        if is_winning_move(grid, column, player):
+            return (CELL_NUM + 1 - moves) // 2
+        grid[column].append(player)
+        best_score = max(best_score, -brute_force(grid, moves + 1))
+        grid[column].pop()
+    return best_score
+
+
+def brute_force_scores(history: str) -> List[int]:
+    grid = make_grid(history)
+    moves = len(history)
+    scores = []
+    for column in range(WIDTH):
+        if len(grid[column]) == HEIGHT:
+            scores.append(INVALID_SCORE)
+        elif is_winning_move(grid, column, moves % 2):
+            scores.append((CELL_NUM + 1 - moves) // 2)
+        else:
+            grid[column].append(moves % 2)
+            scores.append(-brute_force(grid, moves + 1))
+            grid[column].pop()
+    return scores
+
+
+def make_random_history(rng: random.Random, moves: int) -> str:
+    # A game that is still going after `moves` moves.
+    while True:
+        history = ""
+        while len(history) < moves:
+            next_histories = get_next_histories(history)
+            if not next_histories:
+                break
+            history = rng.choice(next_histories)
+        if len(history) == moves:
+            return history
+
+
+class TestConnect4Solver(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(20210601)
+
+
+    def test_scores_match_brute_force(self):
+        solver = Connect4Solver()
+        for _ in range(20):
+            history = make_random_history(self.rng, CELL_NUM - 12)
+            with self.subTest(history=history):
+                self.assertEqual(solver.get_scores(history), brute_force_scores(history))
+                self.assertTrue(solver.is_exact)
+
+
+    def test_search_scores_is_exact_near_the_end(self):
+        history = make_random_history(self.rng, CELL_NUM - 12)
+        scores, _, is_exact = search_scores(history, time_budget=5.0)
+        self.assertTrue(is_exact)
+        self.assertEqual(scores, brute_force_scores(history))
+
+
+    def test_depth_limit_is_not_exact(self):
+        solver = Connect4Solver()
+        solver.get_scores("4453", max_depth=2)
+        self.assertFalse(solver.is_exact)
+
+
+    def test_parse_history_rejects_invalid_histories(self):
+        for history in ["8", "4444444", "1212121"]:
+            with self.subTest(history=history):
+                with self.assertRaises(ValueError):
+                    parse_history(history)
+
+
+if __name__ == "__main__":
+    unittest.main()
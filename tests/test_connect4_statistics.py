@@ -0,0 +1,111 @@
+import itertools
+import unittest
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from unittest import mock
+
+from infosquare_package.connect4 import Connect4Statistics
+
+
+BOT_ID = 1
+
+
+class FakeFirestore:
+    # The functions of firebase_operator used by the statistics, on collections kept in memory.
+
+    def __init__(self) -> None:
+        self.collections: Dict[str, Dict[str, dict]] = {}
+        self.doc_ids: Iterator[int] = itertools.count()
+        # Called while the results are read, as if a game finished in the middle of a rebuild.
+        self.on_iterate: Optional[Callable[[], None]] = None
+
+
+    def get_collection(self, collection_name: str) -> Dict[str, dict]:
+        return self.collections.setdefault(collection_name, {})
+
+
+    def set_doc(self, collection_name: str, doc_dict: dict, doc_id: Optional[str]=None) -> None:
+        self.get_collection(collection_name)[doc_id or str(next(self.doc_ids))] = dict(doc_dict)
+
+
+    def get_doc(self, collection_name: str, doc_id: str) -> Optional[dict]:
+        return self.get_collection(collection_name).get(doc_id)
+
+
+    def iterate_doc_list(self, collection_name: str) -> Iterator[dict]:
+        for i, doc_dict in enumerate(list(self.get_collection(collection_name).values())):
+            if i == 1 and self.on_iterate is not None:
+                self.on_iterate()
+            yield doc_dict
+
+
+    def set_doc_and_increment(self, collection_name: str, doc_dict: dict,
+                              counters: Dict[Tuple[str, str], Dict[str, int]]) -> None:
+        self.set_doc(collection_name, doc_dict)
+        for (counter_collection, doc_id), increments in counters.items():
+            counter = self.get_collection(counter_collection).setdefault(doc_id, {})
+            for field, amount in increments.items():
+                counter[field] = counter.get(field, 0) + amount
+
+
+    def set_doc_dict(self, collection_name: str, doc_dicts: Dict[str, dict]) -> None:
+        for doc_id, doc_dict in doc_dicts.items():
+            self.set_doc(collection_name, doc_dict, doc_id=doc_id)
+
+
+    def get_doc_ids(self, collection_name: str) -> List[str]:
+        return list(self.get_collection(collection_name))
+
+
+    def delete_doc_ids(self, collection_name: str, doc_ids: Iterable[str]) -> None:
+        for doc_id in doc_ids:
+            self.get_collection(collection_name).pop(doc_id, None)
+
+
+def make_result(players: List[int], winner: int) -> dict:
+    return {"players": players, "winner": winner, "vs_ai": BOT_ID in players}
+
+
+class TestConnect4Statistics(unittest.TestCase):
+
+    def setUp(self):
+        self.firestore = FakeFirestore()
+        patcher = mock.patch("infosquare_package.connect4.firebase_operator", self.firestore)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.statistics = Connect4Statistics(bot_user_id=BOT_ID)
+
+
+    def test_record_adds_to_totals(self):
+        self.statistics.record(make_result([BOT_ID, 2], winner=0))
+        self.statistics.record(make_result([2, 3], winner=-1))
+        summary = self.firestore.get_doc(Connect4Statistics.SUMMARY_COLLECTION, Connect4Statistics.SUMMARY_ID)
+        self.assertEqual(summary, {"all_match_num": 2, "vs_ai_num": 1, "ai_win_num": 1})
+        self.assertEqual(self.firestore.get_doc(Connect4Statistics.PLAYER_COLLECTION, "2"),
+                         {"win": 0, "lose": 1, "draw": 1})
+        # Totals counted only by increments are not trusted until a rebuild.
+        self.assertIsNone(self.statistics.get_summary())
+
+
+    def test_rebuild_holds_back_results_recorded_meanwhile(self):
+        for winner in [0, 1, 0]:
+            self.firestore.set_doc(Connect4Statistics.RESULT_COLLECTION, make_result([BOT_ID, 2], winner))
+        late_result = make_result([2, 3], winner=0)
+        self.firestore.on_iterate = lambda: self.statistics.record(late_result)
+
+        self.assertEqual(self.statistics.rebuild(), (4, 3, 2))
+        self.assertEqual(self.statistics.get_summary(), (4, 3, 2))
+        self.assertEqual(self.firestore.get_doc(Connect4Statistics.PLAYER_COLLECTION, "2"),
+                         {"win": 2, "lose": 2, "draw": 0})
+        self.assertEqual(len(self.firestore.get_collection(Connect4Statistics.RESULT_COLLECTION)), 4)
+        self.assertEqual(self.statistics.pending_docs, [])
+
+
+    def test_rebuild_deletes_players_without_results(self):
+        self.firestore.set_doc(Connect4Statistics.PLAYER_COLLECTION, {"win": 5, "lose": 0, "draw": 0}, doc_id="9")
+        self.firestore.set_doc(Connect4Statistics.RESULT_COLLECTION, make_result([2, 3], winner=1))
+        self.assertEqual(self.statistics.rebuild(), (1, 0, 0))
+        self.assertEqual(sorted(self.firestore.get_doc_ids(Connect4Statistics.PLAYER_COLLECTION)), ["2", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from infosquare_package.util.data_source import (CircuitBreaker, CircuitOpenError, DataSourceRegistry,
+                                                 StalePayloadError)
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("infosquare_package.util.data_source.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("example.com", failure_threshold=3, reset_timeout=30.0, max_reset_timeout=100.0)
+
+
+    def open_circuit(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.get_state(), "closed")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.get_state(), "open")
+        self.assertFalse(self.breaker.allow_request())
+
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.get_state(), "closed")
+
+
+    def test_lets_a_single_probe_through_after_reset_timeout(self):
+        self.open_circuit()
+        self.clock.now += 29.0
+        self.assertEqual(self.breaker.get_state(), "open")
+        self.clock.now += 1.0
+        self.assertEqual(self.breaker.get_state(), "half_open")
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+
+    def test_successful_probe_closes_circuit(self):
+        self.open_circuit()
+        self.clock.now += 30.0
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.get_state(), "closed")
+        self.assertEqual(self.breaker.open_timeout, 30.0)
+
+
+    def test_failed_probe_doubles_timeout_up_to_maximum(self):
+        self.open_circuit()
+        for open_timeout in [60.0, 100.0, 100.0]:
+            self.clock.now += self.breaker.open_timeout
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+            self.assertEqual(self.breaker.get_state(), "open")
+            self.assertEqual(self.breaker.open_timeout, open_timeout)
+
+
+class UpstreamError(Exception):
+
+    status = 503
+    headers = {"Retry-After": "120"}
+
+
+class TestDataSourceRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = DataSourceRegistry(default_ttl=0.0)
+        self.url = "https://example.com/api"
+        self.is_failing = False
+        self.loads = 0
+
+
+    async def loader(self, url: str) -> dict:
+        self.loads += 1
+        await asyncio.sleep(0)
+        if self.is_failing:
+            raise UpstreamError("down")
+        return {"loads": self.loads}
+
+
+    def get(self):
+        return asyncio.run(self.registry.get(self.url, loader=self.loader))
+
+
+    def test_serves_stale_payload_with_error(self):
+        self.assertEqual(self.get(), {"loads": 1})
+        self.assertIsNone(self.registry.get_stale_error(self.url))
+
+        self.is_failing = True
+        self.assertEqual(self.get(), {"loads": 1})
+        stale_error = self.registry.get_stale_error(self.url)
+        self.assertIsInstance(stale_error, StalePayloadError)
+        self.assertEqual(stale_error.status, 503)
+        self.assertEqual(stale_error.headers, {"Retry-After": "120"})
+
+        self.is_failing = False
+        self.assertEqual(self.get(), {"loads": 3})
+        self.assertIsNone(self.registry.get_stale_error(self.url))
+
+
+    def test_open_circuit_without_payload_raises(self):
+        self.is_failing = True
+        for _ in range(3):
+            with self.assertRaises(UpstreamError):
+                self.get()
+        with self.assertRaises(CircuitOpenError):
+            self.get()
+        self.assertEqual(self.loads, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
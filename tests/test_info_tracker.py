@@ -0,0 +1,85 @@
+import unittest
+from typing import Any, Dict, List
+
+from infosquare_package.info_tracker import MAX_EMBED_FIELDS, MAX_EMBED_LENGTH, Tracker
+from infosquare_package.util.formatting import get_embed_length
+
+
+class BoardTracker(Tracker):
+
+    def __init__(self) -> None:
+        super().__init__(info_channel=None, bot_user=None)
+        self.embed_color: int = 0x000000
+        self.board_name: str = "test"
+
+
+    async def load_information(self) -> None:
+        pass
+
+
+    def get_normalized_payload(self) -> Any:
+        return None
+
+
+    def make_info_strings(self) -> List[Dict[str, str]]:
+        return []
+
+
+    def get_snapshot(self) -> Any:
+        return None
+
+
+    def restore_snapshot(self, model: Any) -> None:
+        pass
+
+
+def make_info_strings(number: int, value_length: int) -> List[Dict[str, str]]:
+    return [{"name": f"field {i}", "value": "x" * value_length} for i in range(number)]
+
+
+class TestMakeEmbeds(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = BoardTracker()
+
+
+    def assert_pages(self, info_string_list: List[Dict[str, str]], page_num: int, stale_minutes: int=0) -> None:
+        info_embeds = self.tracker.make_embeds(info_string_list, stale_minutes)
+        self.assertEqual(len(info_embeds), page_num)
+        for info_embed in info_embeds:
+            self.assertLessEqual(len(info_embed.fields), MAX_EMBED_FIELDS)
+            self.assertLessEqual(get_embed_length(info_embed), MAX_EMBED_LENGTH)
+        # Every field is kept, in order.
+        self.assertEqual([field.name for info_embed in info_embeds for field in info_embed.fields],
+                         [info_string["name"] for info_string in info_string_list])
+
+
+    def test_single_page_has_no_page_number(self):
+        info_embeds = self.tracker.make_embeds(make_info_strings(MAX_EMBED_FIELDS, 10))
+        self.assertEqual(len(info_embeds), 1)
+        self.assertEqual(info_embeds[0].title, "**TTR Realtime Information Board**")
+
+
+    def test_splits_at_field_limit(self):
+        self.assert_pages(make_info_strings(MAX_EMBED_FIELDS + 1, 10), 2)
+        self.assert_pages(make_info_strings(3 * MAX_EMBED_FIELDS, 10), 3)
+        info_embeds = self.tracker.make_embeds(make_info_strings(MAX_EMBED_FIELDS + 1, 10))
+        self.assertEqual([info_embed.title for info_embed in info_embeds],
+                         ["**TTR Realtime Information Board** (1/2)", "**TTR Realtime Information Board** (2/2)"])
+
+
+    def test_splits_at_length_limit(self):
+        # Five fields of 1000 characters fit in a page, the sixth does not.
+        self.assert_pages(make_info_strings(6, 1000), 2)
+        self.assert_pages(make_info_strings(12, 1000), 3)
+        self.assert_pages(make_info_strings(12, 1000), 3, stale_minutes=15)
+
+
+    def test_stale_marker_only_on_first_page(self):
+        info_embeds = self.tracker.make_embeds(make_info_strings(MAX_EMBED_FIELDS + 1, 10), stale_minutes=5)
+        self.assertIn("5分前", info_embeds[0].description)
+        self.assertFalse(info_embeds[1].description)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from typing import List
+
+from infosquare_package.util.outbound_queue import PRIORITY_BOARD, PRIORITY_GAME, OutboundQueue
+
+
+class FakeMessage:
+
+    def __init__(self, message_id: int, log: List[tuple], delay: float=0.0) -> None:
+        self.id: int = message_id
+        self.log: List[tuple] = log
+        self.delay: float = delay
+
+
+    async def edit(self, **kwargs) -> None:
+        self.log.append(("edit", self.id, kwargs.get("content")))
+        await asyncio.sleep(self.delay)
+
+
+    async def delete(self) -> None:
+        self.log.append(("delete", self.id))
+
+
+class TestOutboundQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.log: List[tuple] = []
+
+
+    def test_queued_edits_of_a_message_are_coalesced(self):
+        async def run():
+            queue = OutboundQueue(workers=2)
+            message = FakeMessage(1, self.log, delay=0.05)
+            first = asyncio.ensure_future(queue.edit(message, content="1"))
+            await asyncio.sleep(0.01)
+            # The first edit is running, so the next ones are merged into a single queued edit.
+            await asyncio.gather(first, *[queue.edit(message, content=str(i)) for i in range(2, 5)])
+            return queue
+
+        queue = asyncio.run(run())
+        self.assertEqual(self.log, [("edit", 1, "1"), ("edit", 1, "4")])
+        self.assertEqual(queue.coalesced, 2)
+        self.assertEqual(queue.completed, 2)
+
+
+    def test_game_operations_go_before_board_operations(self):
+        async def run():
+            queue = OutboundQueue(workers=2)
+            slow_board = asyncio.ensure_future(
+                queue.edit(FakeMessage(1, self.log, delay=0.05), content="board", priority=PRIORITY_BOARD))
+            await asyncio.sleep(0.01)
+            # The only worker serving boards is busy, but one worker is kept for game operations.
+            next_board = asyncio.ensure_future(
+                queue.edit(FakeMessage(2, self.log), content="board", priority=PRIORITY_BOARD))
+            await queue.edit(FakeMessage(3, self.log), content="game", priority=PRIORITY_GAME)
+            self.assertFalse(next_board.done())
+            await asyncio.gather(slow_board, next_board)
+
+        asyncio.run(run())
+        self.assertEqual([entry[1] for entry in self.log], [1, 3, 2])
+
+
+    def test_delayed_delete_returns_at_once(self):
+        async def run():
+            queue = OutboundQueue(workers=2)
+            await queue.delete(FakeMessage(1, self.log), delay=0.02)
+            self.assertEqual(self.log, [])
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        self.assertEqual(self.log, [("delete", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
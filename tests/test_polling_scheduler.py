@@ -0,0 +1,64 @@
+import unittest
+
+from infosquare_package.util.polling_scheduler import PollingJob, PollingPolicy
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status: int, retry_after: str) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status: int = status
+        self.headers: dict = {"Retry-After": retry_after}
+
+
+async def poller() -> bool:
+    return False
+
+
+class TestPollingJob(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = PollingPolicy(idle_interval=30.0, active_interval=10.0, decay=1.5,
+                                    base_backoff=10.0, max_backoff=600.0, jitter=0.3)
+        self.job = PollingJob("test", poller, self.policy)
+
+
+    def test_interval_relaxes_to_idle_and_resets_on_change(self):
+        delays = [self.job.get_next_delay(is_changed=False) for _ in range(4)]
+        self.assertEqual(delays, [15.0, 22.5, 30.0, 30.0])
+        self.assertEqual(self.job.get_next_delay(is_changed=True), 10.0)
+
+
+    def test_backoff_doubles_within_jitter_bounds(self):
+        for failures in range(1, 12):
+            backoff = min(self.policy.max_backoff, self.policy.base_backoff * 2 ** (failures - 1))
+            delay = self.job.get_backoff_delay(Exception("error"))
+            self.assertEqual(self.job.failures, failures)
+            self.assertGreaterEqual(delay, backoff * (1 - self.policy.jitter))
+            self.assertLessEqual(delay, backoff * (1 + self.policy.jitter))
+
+
+    def test_jitter_spreads_delays(self):
+        delays = set()
+        for _ in range(20):
+            self.job.failures = 0
+            delays.add(self.job.get_backoff_delay(Exception("error")))
+        self.assertGreater(len(delays), 1)
+
+
+    def test_success_resets_backoff(self):
+        for _ in range(5):
+            self.job.get_backoff_delay(Exception("error"))
+        self.job.get_next_delay(is_changed=False)
+        self.assertEqual(self.job.failures, 0)
+        self.assertLessEqual(self.job.get_backoff_delay(Exception("error")), 10.0 * 1.3)
+
+
+    def test_retry_after_is_honoured_for_retryable_statuses(self):
+        self.assertEqual(self.job.get_backoff_delay(HTTPError(503, "120")), 120.0)
+        self.assertLess(self.job.get_backoff_delay(HTTPError(404, "120")), 120.0)
+        self.assertLess(self.job.get_backoff_delay(HTTPError(429, "soon")), 120.0)
+
+
+if __name__ == "__main__":
+    unittest.main()